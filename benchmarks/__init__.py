@@ -0,0 +1,4 @@
+"""Parser and matcher benchmarks over synthetic category pages.
+
+Run with ``uv run python -m benchmarks.run``.
+"""
@@ -0,0 +1,138 @@
+import json
+import random
+from dataclasses import dataclass, field
+
+PART_WORDS = (
+    "Kattoverhoilu", "Hattuhylly", "Oviverhoilu", "Istuin", "Turvavyö", "Kojelauta", "Peili",
+    "Lukko", "Sarana", "Ikkunannostin", "Kaiutin", "Valo", "Puskuri", "Lokasuoja", "Konepelti",
+    "Jäähdytin", "Vaimennin", "Jarrusatula", "Tukivarsi", "Vetoakseli", "Ohjausvaihde", "Anturi",
+)
+GROUP_WORDS = (
+    "Sisusta", "Ovet", "Kori", "Moottori", "Jarrut", "Jousitus", "Sähkö", "Voimansiirto",
+    "Ohjaus", "Ilmastointi", "Pakoputkisto", "Polttoaine",
+)
+SIDES = ("Vasen", "Oikea", "Etu", "Taka", "Vasen etu", "Oikea etu", "Vasen taka", "Oikea taka")
+
+
+@dataclass(frozen=True)
+class PageSpec:
+    """Shape of a synthetic category page.
+
+    ``containers_per_group`` ngbdropdown containers go in each of ``groups``
+    sections. A ``dropdown_ratio`` share of them are dropdowns with
+    ``items_per_dropdown`` sub-items (plus "Kaikki"). ``noise_kib`` of Angular
+    transfer state and markup surrounds the grid.
+    """
+
+    groups: int = 10
+    containers_per_group: int = 10
+    dropdown_ratio: float = 0.3
+    items_per_dropdown: int = 6
+    active_ratio: float = 0.5
+    noise_kib: int = 64
+    popular: int = 8
+    seed: int = 0
+
+    @classmethod
+    def for_size(cls, categories: int, **overrides) -> "PageSpec":
+        """A page with about ``categories`` categories and the default proportions."""
+        spec = cls(**overrides)
+        per_container = 1 + spec.dropdown_ratio * spec.items_per_dropdown
+        containers = max(1, round(categories / per_container))
+        groups = max(1, min(spec.groups, containers))
+        return cls(**{**overrides, "groups": groups, "containers_per_group": max(1, round(containers / groups))})
+
+
+@dataclass
+class GeneratedPage:
+    html: str
+    # Every category as (group, parent, title, active), in page order
+    categories: list[tuple[str, str | None, str, bool]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+
+def generate_page(spec: PageSpec) -> GeneratedPage:
+    rng = random.Random(spec.seed)
+    page = GeneratedPage(html="")
+    ng = f"_ngcontent-ng-c{rng.randrange(10**9)}"
+    out: list[str] = [
+        '<!DOCTYPE html><html lang="fi"><head><meta charset="utf-8"><title>Varaosahaku</title>',
+        '<link rel="stylesheet" href="styles.css"></head><body>',
+        f'<app-root ng-version="17.3.0" ng-server-context="ssr"><nav {ng} class="navbar">',
+        *(f'<a {ng} class="nav-link" href="/fi-fi/link/{i}">Linkki {i}</a>' for i in range(20)),
+        f'</nav><main {ng} class="container"><div {ng} class="row">',
+    ]
+
+    serial = 0
+    for g in range(spec.groups):
+        group = f"{GROUP_WORDS[g % len(GROUP_WORDS)]} {g + 1}"
+        out.append(f'<div {ng} class="col-12"><h4 {ng} class="mt-3">{group}</h4>')
+        for _ in range(spec.containers_per_group):
+            serial += 1
+            title = f"{PART_WORDS[serial % len(PART_WORDS)]} {serial}"
+            if rng.random() < spec.dropdown_ratio:
+                _dropdown(out, page, rng, spec, ng, group, title, serial)
+            else:
+                active = rng.random() < spec.active_ratio
+                page.categories.append((group, None, title, active))
+                out.append(f'<div {ng} ngbdropdown class="col-lg-4 col-sm-12 my-1">')
+                out.append(_link(ng, title, f"/osa/{serial}", active, toggle=False))
+                out.append("</div>")
+        out.append("</div>")
+
+    if spec.popular:
+        # Duplicates of real categories, skipped by the parser
+        out.append(f'<div {ng} class="col-12"><h4 {ng}>Suosittuja osia</h4>')
+        for group, _parent, title, active in page.categories[: spec.popular]:
+            out.append(f'<div {ng} ngbdropdown class="col-lg-4 col-sm-12 my-1">')
+            out.append(_link(ng, title, "/suosittu", active, toggle=False))
+            out.append("</div>")
+        out.append("</div>")
+
+    out.append(f'</div></main><footer {ng} class="footer">')
+    out.append(_noise(rng, spec.noise_kib * 1024 // 2))
+    out.append("</footer></app-root>")
+    state = {"k": _noise(rng, spec.noise_kib * 1024 // 2)}
+    out.append(f'<script id="ng-state" type="application/json">{json.dumps(state)}</script>')
+    out.append("</body></html>")
+    page.html = "\n".join(out)
+    return page
+
+
+def _dropdown(out, page, rng, spec, ng, group, title, serial) -> None:
+    active = rng.random() < spec.active_ratio
+    page.categories.append((group, None, title, active))
+    out.append(f'<div {ng} ngbdropdown class="col-lg-4 col-sm-12 my-1">')
+    out.append(_link(ng, title, f"/osa/{serial}", active, toggle=True))
+    out.append(f'<div {ng} ngbdropdownmenu class="dropdown-menu">')
+    out.append(_link(ng, "Kaikki", f"/osa/{serial}", True, item=True))
+    for i in range(spec.items_per_dropdown):
+        side = SIDES[i % len(SIDES)] if i < len(SIDES) else f"{SIDES[i % len(SIDES)]} {i}"
+        item_active = rng.random() < spec.active_ratio
+        page.categories.append((group, title, side, item_active))
+        out.append(_link(ng, side, f"/osa/{serial}/{i}", item_active, item=True))
+    out.append("</div></div>")
+
+
+def _link(ng: str, title: str, href: str, active: bool, *, toggle: bool = False, item: bool = False) -> str:
+    attrs = "ngbdropdownitem" if item else 'queryparamshandling="preserve"'
+    if toggle:
+        attrs = f"ngbdropdowntoggle {attrs}"
+    if active:
+        state = 'class="my-2" rel="follow" tabindex="0"'
+    else:
+        state = 'class="my-2 disabled-link text-danger" rel="nofollow" tabindex="-1" disabled="true"'
+    return f'<a {ng} {attrs} {state} href="{href}" title="{title}"><span {ng}>{title}</span></a>'
+
+
+def _noise(rng: random.Random, size: int) -> str:
+    words = [f"w{rng.randrange(10**6):x}" for _ in range(256)]
+    chunks: list[str] = []
+    total = 0
+    while total < size:
+        chunk = " ".join(rng.choices(words, k=32))
+        chunks.append(chunk)
+        total += len(chunk) + 1
+    return " ".join(chunks)
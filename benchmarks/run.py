@@ -0,0 +1,219 @@
+"""Measure parse throughput, peak parse memory and matcher latency on synthetic pages.
+
+    uv run python -m benchmarks.run --output results.json
+    uv run python -m benchmarks.run --output new.json --compare results.json
+
+With ``--compare`` the exit status is 1 if any throughput metric regressed
+by more than ``--tolerance`` against the baseline file.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from benchmarks.pages import PageSpec, generate_page
+from varaosabotti.events import category_key
+from varaosabotti.index import CategoryIndex
+from varaosabotti.parsepool import ParsePool
+from varaosabotti.scraper import PARSER_BACKENDS, find_category, parse_categories
+from varaosabotti.subscriptions import SubscriptionMatcher
+from varaosabotti.watchplan import WatchPlan
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Higher is better for these; every other metric is informational
+THROUGHPUT_METRICS = ("parses_per_sec", "finds_per_sec", "suggests_per_sec", "plan_scans_per_sec", "match_passes_per_sec")
+
+
+def measure(fn: Callable[[], object], *, min_time: float = 0.5, max_runs: int = 10_000) -> float:
+    """Return calls per second of ``fn``, running it for at least ``min_time`` seconds."""
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or runs >= max_runs:
+            return runs / elapsed
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """Peak Python heap use while ``fn`` runs; libxml2's own allocations are not traced."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(size: int, backends: tuple[str, ...], min_time: float) -> list[dict]:
+    page = generate_page(PageSpec.for_size(size))
+    rng = random.Random(size)
+    results = []
+
+    for backend in backends:
+        results.append(
+            {
+                "name": f"parse/{backend}",
+                "categories": len(page),
+                "html_kib": round(len(page.html.encode()) / 1024, 1),
+                "parses_per_sec": measure(lambda b=backend: parse_categories(page.html, b), min_time=min_time),
+                "peak_kib": round(peak_memory(lambda b=backend: parse_categories(page.html, b)) / 1024, 1),
+            }
+        )
+
+    categories = parse_categories(page.html)
+    # Exact names, parent / child paths and fully qualified paths
+    queries = []
+    for group, parent, title, _active in rng.sample(page.categories, min(len(page), 50)):
+        queries.append(title)
+        queries.append(f"{parent} / {title}" if parent else f"{group} / {title}")
+        queries.append(f"{group} / {parent} / {title}" if parent else title)
+    needles = [title[: max(3, len(title) // 2)] for _group, _parent, title, _active in page.categories[:20]]
+
+    build_started = time.perf_counter()
+    index = CategoryIndex(categories)
+    build_ms = (time.perf_counter() - build_started) * 1000
+
+    def find_all():
+        for q in queries:
+            index.find(q)
+
+    def suggest_all():
+        for n in needles:
+            index.suggest(n)
+
+    results.append(
+        {
+            "name": "match",
+            "categories": len(page),
+            "index_build_ms": round(build_ms, 3),
+            "finds_per_sec": measure(find_all, min_time=min_time) * len(queries),
+            "suggests_per_sec": measure(suggest_all, min_time=min_time) * len(needles),
+            # The pre-index API rebuilds the lookup tables on every call
+            "find_category_per_sec": measure(lambda: find_category(categories, queries[0]), min_time=min_time),
+        }
+    )
+
+    # Every query, plus a wildcard per group and a few regular expressions, in one pass
+    groups = sorted({group for group, _parent, _title, _active in page.categories})
+    expressions = queries + [f"{g} / *" for g in groups] + [f"re:^{t[:4]}.*\\d$" for t in needles[:5]]
+    matcher = SubscriptionMatcher(expressions)
+    results.append(
+        {
+            "name": "subscriptions",
+            "categories": len(page),
+            "subscriptions": len(matcher.expressions),
+            "match_passes_per_sec": measure(lambda: matcher.match(categories), min_time=min_time),
+        }
+    )
+
+    # What --fast-path does instead of a parse for a single watch
+    body = page.html.encode()
+    plan = WatchPlan.build(categories, [category_key(rng.choice(categories))])
+    if plan is not None:
+        results.append(
+            {
+                "name": "plan",
+                "categories": len(page),
+                "plan_scans_per_sec": measure(lambda: plan.apply(body, "utf-8", categories), min_time=min_time),
+            }
+        )
+    return results
+
+
+def bench_pool(size: int, workers: int, min_time: float) -> dict:
+    """Pages parsed per second by a ``ParsePool``, keeping every worker busy."""
+    page = generate_page(PageSpec.for_size(size))
+    body = page.html.encode()
+    batch = workers * 4
+
+    async def run() -> float:
+        with ParsePool(workers) as pool:
+            # Warm up the workers before timing
+            await asyncio.gather(*(pool.parse(body, "utf-8", "lxml") for _ in range(workers)))
+            pages = 0
+            started = time.perf_counter()
+            while (elapsed := time.perf_counter() - started) < min_time or not pages:
+                await asyncio.gather(*(pool.parse(body, "utf-8", "lxml") for _ in range(batch)))
+                pages += batch
+            return pages / max(elapsed, time.perf_counter() - started)
+
+    return {"name": f"pool/{workers}", "categories": len(page), "parses_per_sec": asyncio.run(run())}
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """Return a line for every throughput metric more than ``tolerance`` below the baseline."""
+    previous = {(r["name"], r["categories"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["categories"]))
+        if before is None:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if metric in result and before.get(metric):
+                change = result[metric] / before[metric] - 1
+                if change < -tolerance:
+                    regressions.append(
+                        f"{result['name']} @ {result['categories']}: {metric} "
+                        f"{before[metric]:.1f} -> {result[metric]:.1f} ({change:+.0%})"
+                    )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Category counts to test")
+    parser.add_argument("--backends", nargs="+", choices=PARSER_BACKENDS, default=PARSER_BACKENDS)
+    parser.add_argument(
+        "--pool-workers", type=int, nargs="*", default=[], help="Also measure a parse pool with these worker counts"
+    )
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds to run each measurement")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for result in bench_size(size, tuple(args.backends), args.min_time):
+            results.append(result)
+            metrics = ", ".join(f"{k}={v:.1f}" for k, v in result.items() if isinstance(v, float))
+            print(f"{result['name']:<12} {result['categories']:>6} categories  {metrics}")
+        for workers in args.pool_workers:
+            result = bench_pool(size, workers, args.min_time)
+            results.append(result)
+            rate = result["parses_per_sec"]
+            print(f"{result['name']:<12} {result['categories']:>6} categories  parses_per_sec={rate:.1f}")
+
+    if args.output:
+        document = {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
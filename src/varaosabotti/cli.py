@@ -1,19 +1,37 @@
 import argparse
+import contextlib
+import json
 import logging
 import os
 import sys
-import time
-
-import httpx
-
-from varaosabotti.models import CategoryStatus
-from varaosabotti.notifier import category_label, notify, send_pushover
-from varaosabotti.scraper import (
-    fetch_page,
-    find_category,
-    parse_categories,
-    suggest_categories,
+from typing import TYPE_CHECKING
+
+from varaosabotti.config import (
+    DEFAULT_PARSER,
+    PARSER_BACKENDS,
+    ConfigError,
+    Watch,
+    load_watches,
 )
+from varaosabotti.control import COMMANDS as CONTROL_COMMANDS
+from varaosabotti.control import ControlError, send_command
+from varaosabotti.models import Category, CategorySnapshot, CategoryStatus
+from varaosabotti.profiling import PROFILE_MODES
+from varaosabotti.snapshotcache import DEFAULT_TTL, SnapshotCache, default_cache_dir
+from varaosabotti.subscriptions import SubscriptionError, check_expression
+from varaosabotti.sweep import SWEEP_FORMATS, read_urls
+from varaosabotti.transport import (
+    TransportConfig,
+    TransportError,
+    add_transport_arguments,
+)
+
+# Only lightweight modules are imported up front. httpx, the parsers, asyncio
+# and sqlite3 are imported by the code paths that use them, so --help and
+# --test-notification start quickly.
+if TYPE_CHECKING:
+    from varaosabotti.engine import Monitor
+    from varaosabotti.state import StateStore
 
 logger = logging.getLogger("varaosabotti")
 
@@ -44,7 +62,12 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--category",
         default=os.environ.get("VARAOSABOTTI_CATEGORY"),
-        help="Category name to monitor (env: VARAOSABOTTI_CATEGORY)",
+        help="Category name, path or pattern to monitor (env: VARAOSABOTTI_CATEGORY)",
+    )
+    parser.add_argument(
+        "--config",
+        default=os.environ.get("VARAOSABOTTI_CONFIG"),
+        help="TOML file listing several [[watch]] entries to monitor (env: VARAOSABOTTI_CONFIG)",
     )
     parser.add_argument(
         "--interval",
@@ -52,6 +75,56 @@ def build_parser() -> argparse.ArgumentParser:
         default=int(os.environ.get("VARAOSABOTTI_INTERVAL", "300")),
         help="Polling interval in seconds (default: 300, env: VARAOSABOTTI_INTERVAL)",
     )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=float(os.environ.get("VARAOSABOTTI_JITTER", "0.1")),
+        help="Random spread of each poll as a fraction of the interval (default: 0.1, env: VARAOSABOTTI_JITTER)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=os.environ.get("VARAOSABOTTI_ADAPTIVE", "") not in ("", "0"),
+        help="Poll pages that change often more often, and static pages less often (env: VARAOSABOTTI_ADAPTIVE)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=int(os.environ.get("VARAOSABOTTI_MAX_CONCURRENCY", "10")),
+        help="Maximum number of pages fetched at once (default: 10, env: VARAOSABOTTI_MAX_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSER_BACKENDS,
+        default=os.environ.get("VARAOSABOTTI_PARSER", DEFAULT_PARSER),
+        help=f"HTML parser backend (default: {DEFAULT_PARSER}, env: VARAOSABOTTI_PARSER)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=os.environ.get("VARAOSABOTTI_STREAM", "") not in ("", "0"),
+        help="Parse pages while downloading and stop once the categories are read "
+        "(lxml parser only, env: VARAOSABOTTI_STREAM)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=int(os.environ.get("VARAOSABOTTI_PARSE_WORKERS", "0")),
+        help="Parse pages in this many worker processes (threads on free-threaded Python) "
+        "instead of the event loop (default: 0, env: VARAOSABOTTI_PARSE_WORKERS)",
+    )
+    parser.add_argument(
+        "--fast-path",
+        action="store_true",
+        default=os.environ.get("VARAOSABOTTI_FAST_PATH", "") not in ("", "0"),
+        help="Read only the watched categories' status from a changed page, parsing it in full "
+        "only when they can't be found (env: VARAOSABOTTI_FAST_PATH)",
+    )
+    parser.add_argument(
+        "--state",
+        default=os.environ.get("VARAOSABOTTI_STATE"),
+        help="SQLite file for keeping monitor state across restarts (env: VARAOSABOTTI_STATE)",
+    )
     parser.add_argument(
         "--pushover-token",
         default=os.environ.get("PUSHOVER_TOKEN"),
@@ -62,6 +135,95 @@ def build_parser() -> argparse.ArgumentParser:
         default=os.environ.get("PUSHOVER_USER"),
         help="Pushover user key (env: PUSHOVER_USER)",
     )
+    parser.add_argument(
+        "--notify-window",
+        type=float,
+        default=float(os.environ.get("VARAOSABOTTI_NOTIFY_WINDOW", "2")),
+        help="Seconds to wait for more alerts to combine into one Pushover message "
+        "(default: 2, env: VARAOSABOTTI_NOTIFY_WINDOW)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=(
+            int(os.environ["VARAOSABOTTI_METRICS_PORT"]) if os.environ.get("VARAOSABOTTI_METRICS_PORT") else None
+        ),
+        help="Serve Prometheus metrics at /metrics on this port (env: VARAOSABOTTI_METRICS_PORT)",
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default=os.environ.get("VARAOSABOTTI_METRICS_HOST", "127.0.0.1"),
+        help="Address the metrics endpoint listens on (default: 127.0.0.1, env: VARAOSABOTTI_METRICS_HOST)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=float(os.environ.get("VARAOSABOTTI_CACHE_TTL", str(DEFAULT_TTL))),
+        help="Seconds a parsed page is reused by --list-categories and category validation, 0 to disable "
+        f"(default: {DEFAULT_TTL}, env: VARAOSABOTTI_CACHE_TTL)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("VARAOSABOTTI_CACHE_DIR"),
+        help="Directory for cached category lists (default: ~/.cache/varaosabotti, env: VARAOSABOTTI_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        default=os.environ.get("VARAOSABOTTI_DAEMON", "") not in ("", "0"),
+        help="Keep running even with no watches, taking new ones over the control socket "
+        "(needs --control-socket, env: VARAOSABOTTI_DAEMON)",
+    )
+    parser.add_argument(
+        "--control-socket",
+        default=os.environ.get("VARAOSABOTTI_CONTROL_SOCKET"),
+        help="Unix socket for controlling a running monitor (env: VARAOSABOTTI_CONTROL_SOCKET)",
+    )
+    parser.add_argument(
+        "--ctl",
+        choices=CONTROL_COMMANDS,
+        help="Send a command to the monitor listening on --control-socket, print its reply and exit. "
+        "add and remove take --url and --category, check and categories take --url.",
+    )
+    parser.add_argument(
+        "--sweep",
+        metavar="URLS",
+        help="Look up --category on every URL listed in this file (- for standard input), "
+        "print each result as its page completes and exit.",
+    )
+    parser.add_argument(
+        "--sweep-format",
+        choices=SWEEP_FORMATS,
+        default="table",
+        help="Print sweep results as a table or as JSON lines (default: table)",
+    )
+    parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Follow category links from --url, write a catalog of every category found (CSV) and exit.",
+    )
+    parser.add_argument(
+        "--crawl-depth",
+        type=int,
+        default=int(os.environ.get("VARAOSABOTTI_CRAWL_DEPTH", "2")),
+        help="Links to follow from --url at most (default: 2, env: VARAOSABOTTI_CRAWL_DEPTH)",
+    )
+    parser.add_argument(
+        "--crawl-max-pages",
+        type=int,
+        default=int(os.environ.get("VARAOSABOTTI_CRAWL_MAX_PAGES", "200")),
+        help="Pages to crawl at most (default: 200, env: VARAOSABOTTI_CRAWL_MAX_PAGES)",
+    )
+    parser.add_argument(
+        "--crawl-checkpoint",
+        default=os.environ.get("VARAOSABOTTI_CRAWL_CHECKPOINT"),
+        help="Journal of crawled pages; an interrupted crawl resumes from it (env: VARAOSABOTTI_CRAWL_CHECKPOINT)",
+    )
+    parser.add_argument(
+        "--crawl-output",
+        default=os.environ.get("VARAOSABOTTI_CRAWL_OUTPUT"),
+        help="File the catalog is written to (default: standard output, env: VARAOSABOTTI_CRAWL_OUTPUT)",
+    )
     parser.add_argument(
         "--list-categories",
         action="store_true",
@@ -77,134 +239,316 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Run a single check and exit.",
     )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        metavar="CYCLES",
+        help="Run this many poll cycles under a profiler, write a report and exit "
+        "(notifications are not sent)",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default="cprofile",
+        help="Profile CPU time with cProfile or allocations with tracemalloc (default: cprofile)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default="varaosabotti-profile.txt",
+        help="File the profile report is written to (default: varaosabotti-profile.txt)",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
         help="Enable debug logging.",
     )
+    add_transport_arguments(parser)
     return parser
 
 
-def _create_client() -> httpx.Client:
-    return httpx.Client(
-        timeout=30.0,
-        headers={"User-Agent": "varaosabotti/0.1.0", "Accept-Language": "fi"},
-        follow_redirects=True,
-    )
-
+def list_categories(
+    url: str,
+    backend: str = DEFAULT_PARSER,
+    transport: TransportConfig | None = None,
+    control_socket: str | None = None,
+    cache: SnapshotCache | None = None,
+) -> None:
+    if cache is not None and (snapshot := cache.get(url)) is not None:
+        print_categories(snapshot.to_categories())
+        return
 
-def list_categories(url: str) -> None:
-    client = _create_client()
+    if control_socket:
+        # A running daemon has usually parsed the page already
+        try:
+            reply = send_command(control_socket, {"command": "categories", "url": url})
+        except ControlError as exc:
+            logger.debug("%s; fetching the page directly", exc)
+        else:
+            if reply["ok"]:
+                snapshot = CategorySnapshot.from_dict(reply["snapshot"])
+                if cache is not None:
+                    cache.put(url, snapshot)
+                print_categories(snapshot.to_categories())
+                return
+            logger.debug("The daemon could not list categories: %s", reply["error"])
+
+    from varaosabotti.scraper import fetch_page, parse_categories
+    from varaosabotti.transport import create_client
+
+    client = create_client(transport or TransportConfig())
     try:
         html = fetch_page(url, client)
-        categories = parse_categories(html)
-
-        if not categories:
-            print("No categories found. Check the URL.")
-            return
-
-        current_group = None
-        for cat in categories:
-            if cat.group != current_group:
-                current_group = cat.group
-                print(f"\n  {current_group or 'Uncategorized'}")
-                print(f"  {'─' * 50}")
-
-            status_marker = "+" if cat.status == CategoryStatus.ACTIVE else "-"
-            if cat.parent:
-                label = f"{cat.parent} / {cat.title}"
-                print(f"        [{status_marker}] {label}")
-            else:
-                print(f"    [{status_marker}] {cat.title}")
-
-        active = sum(1 for c in categories if c.status == CategoryStatus.ACTIVE)
-        total = len(categories)
-        print(f"\n  Total: {total} categories ({active} active, {total - active} inactive)")
+        categories = parse_categories(html, backend)
     finally:
         client.close()
+    # An empty page is more likely a wrong URL than one worth remembering
+    if cache is not None and categories:
+        cache.put(url, CategorySnapshot.from_categories(categories))
+    print_categories(categories)
+
+
+def print_categories(categories: list[Category]) -> None:
+    if not categories:
+        print("No categories found. Check the URL.")
+        return
+
+    current_group = None
+    for cat in categories:
+        if cat.group != current_group:
+            current_group = cat.group
+            print(f"\n  {current_group or 'Uncategorized'}")
+            print(f"  {'─' * 50}")
+
+        status_marker = "+" if cat.status == CategoryStatus.ACTIVE else "-"
+        if cat.parent:
+            label = f"{cat.parent} / {cat.title}"
+            print(f"        [{status_marker}] {label}")
+        else:
+            print(f"    [{status_marker}] {cat.title}")
+
+    active = sum(1 for c in categories if c.status == CategoryStatus.ACTIVE)
+    total = len(categories)
+    print(f"\n  Total: {total} categories ({active} active, {total - active} inactive)")
+
+
+def snapshot_cache(args: argparse.Namespace) -> SnapshotCache | None:
+    if args.cache_ttl <= 0:
+        return None
+    return SnapshotCache(args.cache_dir or default_cache_dir(), ttl=args.cache_ttl)
+
+
+def control(args: argparse.Namespace) -> int:
+    """Send ``--ctl`` to a running monitor and print its reply. Returns the exit status."""
+    request = {"command": args.ctl}
+    if args.url:
+        request["url"] = args.url
+    if args.category:
+        request["category"] = args.category
+    try:
+        reply = send_command(args.control_socket, request)
+    except ControlError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(json.dumps(reply, indent=2, ensure_ascii=False))
+    return 0 if reply["ok"] else 1
 
 
-def run_monitor(args: argparse.Namespace) -> None:
-    client = _create_client()
-    previously_active = False
+def run_sweep(args: argparse.Namespace, urls: list[str], transport: TransportConfig) -> None:
+    import asyncio
 
-    # Validate category exists before starting the polling loop
     try:
-        html = fetch_page(args.url, client)
-        categories = parse_categories(html)
-        matches = find_category(categories, args.category)
-
-        if not matches:
-            logger.error("Category '%s' not found on page.", args.category)
-            suggestions = suggest_categories(categories, args.category)
-            if suggestions:
-                logger.error("Did you mean one of these?")
-                for s in suggestions:
-                    logger.error("  - %s", s)
-            logger.error("Use --list-categories to see all available names.")
-            sys.exit(1)
-
-        logger.info(
-            "Monitoring '%s' (%d match(es)) on %s (interval: %ds)",
-            args.category,
-            len(matches),
-            args.url,
-            args.interval,
-        )
-        for m in matches:
-            logger.info("  Matched: %s", category_label(m))
-    except httpx.HTTPError:
-        logger.warning("Could not validate category (network error). Starting monitor anyway.")
-        html = None
-
-    if args.pushover_token and args.pushover_user:
-        logger.info("Pushover notifications enabled.")
+        asyncio.run(_sweep(args, urls, transport))
+    except KeyboardInterrupt:
+        logger.info("Sweep interrupted.")
+        sys.exit(1)
+
+
+async def _sweep(args: argparse.Namespace, urls: list[str], transport: TransportConfig) -> None:
+    from varaosabotti.parsepool import ParsePool
+    from varaosabotti.sweep import SweepPrinter, sweep
+    from varaosabotti.transport import create_async_client
+
+    printer = SweepPrinter(sys.stdout, args.sweep_format)
+    printer.header()
+    with contextlib.ExitStack() as stack:
+        pool = stack.enter_context(ParsePool(args.parse_workers)) if args.parse_workers else None
+        async with create_async_client(transport) as client:
+            async for result in sweep(
+                urls,
+                args.category,
+                client,
+                concurrency=args.max_concurrency,
+                backend=args.parser,
+                pool=pool,
+            ):
+                printer.add(result)
+    printer.summary()
+
+
+def run_crawl(args: argparse.Namespace, transport: TransportConfig) -> None:
+    import asyncio
 
     try:
-        first_iteration = True
-        while True:
-            try:
-                # Reuse the HTML from validation on the first iteration
-                if first_iteration and html:
-                    first_iteration = False
-                else:
-                    html = fetch_page(args.url, client)
-                    categories = parse_categories(html)
-
-                matches = find_category(categories, args.category)
-
-                if not matches:
-                    logger.warning(
-                        "Category '%s' no longer found on page.",
-                        args.category,
-                    )
-                elif any(m.status == CategoryStatus.ACTIVE for m in matches):
-                    if not previously_active:
-                        for m in matches:
-                            if m.status == CategoryStatus.ACTIVE:
-                                notify(m, args.url, args.pushover_token, args.pushover_user, client)
-                        previously_active = True
-                    else:
-                        logger.debug("Category '%s' is still active (already notified).", args.category)
-                else:
-                    for m in matches:
-                        logger.info("Still inactive: %s", category_label(m))
-                    previously_active = False
-
-            except httpx.HTTPStatusError as exc:
-                logger.warning("HTTP error %d fetching page. Will retry.", exc.response.status_code)
-            except httpx.HTTPError:
-                logger.warning("Network error fetching page. Will retry.", exc_info=True)
-
-            if args.once:
-                break
-
-            time.sleep(args.interval)
+        pages = asyncio.run(_crawl(args, transport))
+    except KeyboardInterrupt:
+        if args.crawl_checkpoint:
+            logger.info("Crawl interrupted. Run it again with the same --crawl-checkpoint to resume.")
+        else:
+            logger.info("Crawl interrupted.")
+        sys.exit(1)
+
+    from varaosabotti.crawler import write_catalog
+
+    if args.crawl_output:
+        with open(args.crawl_output, "w", encoding="utf-8", newline="") as f:
+            rows = write_catalog(pages, f)
+    else:
+        rows = write_catalog(pages, sys.stdout)
+    failed = sum(1 for p in pages if p.error)
+    logger.info("Catalog of %d categories from %d page(s) (%d failed).", rows, len(pages), failed)
+
+
+async def _crawl(args: argparse.Namespace, transport: TransportConfig) -> list:
+    import dataclasses
+
+    from varaosabotti.crawler import (
+        DEFAULT_HOST_CONCURRENCY,
+        DEFAULT_HOST_RATE,
+        CrawlCheckpoint,
+        Crawler,
+    )
+    from varaosabotti.parsepool import ParsePool
+    from varaosabotti.transport import create_async_client
+
+    transport = dataclasses.replace(
+        transport,
+        per_host_concurrency=transport.per_host_concurrency or DEFAULT_HOST_CONCURRENCY,
+        per_host_rate=transport.per_host_rate or DEFAULT_HOST_RATE,
+    )
+    checkpoint = CrawlCheckpoint(args.crawl_checkpoint) if args.crawl_checkpoint else None
+    with contextlib.ExitStack() as stack:
+        if checkpoint is not None:
+            stack.callback(checkpoint.close)
+        pool = stack.enter_context(ParsePool(args.parse_workers)) if args.parse_workers else None
+        async with create_async_client(transport) as client:
+            crawler = Crawler(
+                client,
+                max_depth=args.crawl_depth,
+                max_pages=args.crawl_max_pages,
+                concurrency=args.max_concurrency,
+                backend=args.parser,
+                pool=pool,
+                checkpoint=checkpoint,
+            )
+            return await crawler.crawl(args.url)
+
+
+def run_monitor(args: argparse.Namespace, watches: list[Watch]) -> None:
+    import asyncio
 
+    try:
+        ok = asyncio.run(_run_monitor(args, watches))
     except KeyboardInterrupt:
         logger.info("Monitor stopped.")
+        return
+    if not ok:
+        sys.exit(1)
+
+
+async def _run_monitor(args: argparse.Namespace, watches: list[Watch]) -> bool:
+    from varaosabotti.state import StateStore
+
+    # Profiling sends no alerts, so it must not record any as sent
+    store = StateStore(args.state) if args.state and not args.profile else None
+    try:
+        return await _run_engine(args, watches, store)
     finally:
-        client.close()
+        if store is not None:
+            store.close()
+
+
+async def _run_engine(args: argparse.Namespace, watches: list[Watch], store: "StateStore | None") -> bool:
+    from varaosabotti.control import ControlServer
+    from varaosabotti.engine import Monitor
+    from varaosabotti.metrics import Metrics, MetricsServer
+    from varaosabotti.notifier import NotificationQueue
+    from varaosabotti.parsepool import ParsePool
+    from varaosabotti.profiling import profile_cycles
+    from varaosabotti.transport import create_async_client
+
+    transport = TransportConfig.from_args(args)
+    metrics = Metrics()
+    async with contextlib.AsyncExitStack() as stack:
+        if args.metrics_port is not None:
+            await stack.enter_async_context(MetricsServer(metrics, args.metrics_host, args.metrics_port))
+        client = await stack.enter_async_context(create_async_client(transport))
+        parse_pool = stack.enter_context(ParsePool(args.parse_workers)) if args.parse_workers else None
+        notifications = None
+        if args.pushover_token and args.pushover_user and not args.profile:
+            # Alerts get their own pool so they never queue behind page fetches
+            pushover_client = await stack.enter_async_context(create_async_client(transport, host_limits=False))
+            notifications = await stack.enter_async_context(
+                NotificationQueue(
+                    args.pushover_token,
+                    args.pushover_user,
+                    window=args.notify_window,
+                    client=pushover_client,
+                    metrics=metrics,
+                )
+            )
+
+        monitor = Monitor(
+            watches,
+            client,
+            interval=args.interval,
+            notifications=notifications,
+            max_concurrency=args.max_concurrency,
+            parser=args.parser,
+            stream=args.stream,
+            store=store,
+            jitter=args.jitter,
+            adaptive=args.adaptive,
+            once=args.once,
+            metrics=metrics,
+            parse_pool=parse_pool,
+            snapshot_cache=snapshot_cache(args),
+            fast_path=args.fast_path,
+        )
+
+        # Validate every watch before starting the polling loop
+        if not await monitor.validate():
+            logger.error("Use --list-categories to see all available names.")
+            return False
+
+        if args.profile:
+            await profile_cycles(
+                lambda: _profile_cycle(monitor),
+                args.profile,
+                mode=args.profile_mode,
+                output=args.profile_output,
+            )
+            return True
+
+        if notifications is not None:
+            logger.info("Pushover notifications enabled.")
+
+        if args.control_socket:
+            try:
+                await stack.enter_async_context(ControlServer(monitor, args.control_socket))
+            except ControlError as exc:
+                logger.error("%s", exc)
+                return False
+
+        await monitor.run(forever=args.daemon)
+    return True
+
+
+async def _profile_cycle(monitor: "Monitor") -> None:
+    from varaosabotti.scraper import PageCache
+
+    # A fresh cache makes every cycle fetch and parse in full
+    monitor.cache = PageCache()
+    await monitor.check_all()
 
 
 def main() -> None:
@@ -213,11 +557,15 @@ def main() -> None:
 
     configure_logging(verbose=args.verbose)
 
+    transport = TransportConfig.from_args(args)
+    try:
+        transport.validate()
+    except TransportError as exc:
+        parser.error(str(exc))
+
     if args.test_notification:
         if not args.pushover_token or not args.pushover_user:
             parser.error("--pushover-token and --pushover-user are required for --test-notification")
-        from varaosabotti.models import Category, CategoryStatus
-
         test_cat = Category(
             name="Test",
             title="Test Notification",
@@ -225,21 +573,91 @@ def main() -> None:
             status=CategoryStatus.ACTIVE,
             group="varaosabotti",
         )
-        client = _create_client()
+        from varaosabotti.notifier import send_pushover
+        from varaosabotti.transport import create_client
+
+        client = create_client(transport)
         try:
             send_pushover(test_cat, "https://www.varaosahaku.fi", args.pushover_token, args.pushover_user, client)
         finally:
             client.close()
         sys.exit(0)
 
+    if args.stream and args.parser != "lxml":
+        parser.error("--stream requires --parser lxml")
+
+    if args.stream and args.parse_workers:
+        parser.error("--stream cannot be combined with --parse-workers")
+
+    if args.stream and args.fast_path:
+        parser.error("--stream cannot be combined with --fast-path")
+
+    if args.parse_workers < 0:
+        parser.error("--parse-workers cannot be negative")
+
+    if args.max_concurrency < 1:
+        parser.error("--max-concurrency must be at least 1")
+
+    if args.profile is not None and args.profile < 1:
+        parser.error("--profile needs at least one cycle")
+
+    if args.ctl:
+        if not args.control_socket:
+            parser.error("--ctl needs --control-socket (or set VARAOSABOTTI_CONTROL_SOCKET)")
+        sys.exit(control(args))
+
+    if args.daemon and not args.control_socket:
+        parser.error("--daemon needs --control-socket (or set VARAOSABOTTI_CONTROL_SOCKET)")
+
+    if args.daemon and (args.once or args.profile):
+        parser.error("--daemon cannot be combined with --once or --profile")
+
+    if args.config and not (args.list_categories or args.crawl or args.sweep):
+        try:
+            watches = load_watches(args.config)
+        except ConfigError as exc:
+            parser.error(str(exc))
+        run_monitor(args, watches)
+        return
+
+    if args.daemon and not (args.list_categories or args.crawl or args.sweep) and not (args.url and args.category):
+        # Watches are added over the control socket
+        run_monitor(args, [])
+        return
+
+    if args.sweep:
+        if not args.category:
+            parser.error("--sweep needs --category (or set VARAOSABOTTI_CATEGORY)")
+        try:
+            check_expression(args.category)
+            with contextlib.nullcontext(sys.stdin) if args.sweep == "-" else open(args.sweep) as f:
+                urls = read_urls(f)
+        except (SubscriptionError, OSError) as exc:
+            parser.error(str(exc))
+        if not urls:
+            parser.error(f"No URLs in {args.sweep}")
+        run_sweep(args, urls, transport)
+        sys.exit(0)
+
     if not args.url:
         parser.error("--url is required (or set VARAOSABOTTI_URL)")
 
+    if args.crawl:
+        if args.crawl_depth < 0 or args.crawl_max_pages < 1:
+            parser.error("--crawl-depth cannot be negative and --crawl-max-pages must be at least 1")
+        run_crawl(args, transport)
+        sys.exit(0)
+
     if args.list_categories:
-        list_categories(args.url)
+        list_categories(args.url, args.parser, transport, args.control_socket, snapshot_cache(args))
         sys.exit(0)
 
     if not args.category:
         parser.error("--category is required (or set VARAOSABOTTI_CATEGORY)")
 
-    run_monitor(args)
+    try:
+        check_expression(args.category)
+    except SubscriptionError as exc:
+        parser.error(str(exc))
+
+    run_monitor(args, [Watch(url=args.url, category=args.category)])
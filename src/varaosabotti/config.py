@@ -0,0 +1,68 @@
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from varaosabotti.subscriptions import SubscriptionError, check_expression
+
+PARSER_BACKENDS = ("lxml", "bs4")
+DEFAULT_PARSER = "lxml"
+
+
+class ConfigError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Watch:
+    url: str
+    category: str
+    # A watch is one category on one page, as in the state store, however often it is polled
+    interval: int | None = field(default=None, compare=False)
+
+
+def load_watches(path: str | Path) -> list[Watch]:
+    """Load watches from a TOML file with one ``[[watch]]`` table per watch."""
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except OSError as exc:
+        raise ConfigError(f"Cannot read config file {path}: {exc.strerror}") from exc
+    except tomllib.TOMLDecodeError as exc:
+        raise ConfigError(f"Invalid config file {path}: {exc}") from exc
+
+    entries = data.get("watch", [])
+    if not isinstance(entries, list) or not entries:
+        raise ConfigError(f"Config file {path} defines no [[watch]] entries")
+
+    # A top-level url applies to every watch that doesn't set its own
+    default_url = data.get("url")
+
+    watches: list[Watch] = []
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            raise ConfigError(f"Watch #{i} in {path} is not a table")
+        url = entry.get("url", default_url)
+        category = entry.get("category")
+        if not isinstance(url, str) or not url:
+            raise ConfigError(f"Watch #{i} in {path} is missing 'url'")
+        if not isinstance(category, str) or not category:
+            raise ConfigError(f"Watch #{i} in {path} is missing 'category'")
+        try:
+            check_expression(category)
+        except SubscriptionError as exc:
+            raise ConfigError(f"Watch #{i} in {path}: {exc}") from exc
+        interval = entry.get("interval")
+        if interval is not None and (not isinstance(interval, int) or interval <= 0):
+            raise ConfigError(f"Watch #{i} in {path} has an invalid 'interval'")
+        watch = Watch(url=url, category=category, interval=interval)
+        if watch not in watches:
+            watches.append(watch)
+    return watches
+
+
+def group_by_url(watches: list[Watch]) -> dict[str, list[Watch]]:
+    """Group watches by page URL, preserving first-seen order."""
+    pages: dict[str, list[Watch]] = {}
+    for watch in watches:
+        pages.setdefault(watch.url, []).append(watch)
+    return pages
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import socket
+from typing import TYPE_CHECKING
+
+from varaosabotti.config import Watch
+from varaosabotti.models import category_label
+from varaosabotti.subscriptions import check_expression
+
+# The client side runs in the CLI, which shouldn't pay for importing asyncio
+# and the engine just to send one request
+if TYPE_CHECKING:
+    import asyncio
+
+    from varaosabotti.engine import Monitor
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ("list", "add", "remove", "check", "dump", "categories", "stop")
+
+
+class ControlError(RuntimeError):
+    pass
+
+
+def send_command(path: str, request: dict, *, timeout: float = 60.0) -> dict:
+    """Send one request to a daemon's control socket and return its reply."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except OSError as exc:
+        raise ControlError(f"Cannot reach the daemon at {path}: {exc.strerror or exc}") from exc
+    if not line:
+        raise ControlError(f"The daemon at {path} closed the connection")
+    return json.loads(line)
+
+
+class ControlServer:
+    """Answers newline-delimited JSON requests on a Unix socket for a running ``Monitor``.
+
+    Each request is an object with a ``command`` (one of ``COMMANDS``) and its
+    arguments. Each reply has ``ok`` plus either the result or an ``error``.
+    """
+
+    def __init__(self, monitor: "Monitor", path: str) -> None:
+        self.monitor = monitor
+        self.path = path
+        self._server: asyncio.Server | None = None
+
+    async def __aenter__(self) -> "ControlServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        import asyncio
+
+        if os.path.exists(self.path):
+            try:
+                send_command(self.path, {"command": "list"}, timeout=2)
+            except ControlError:
+                # Left behind by a daemon that didn't shut down cleanly
+                os.unlink(self.path)
+            else:
+                raise ControlError(f"Another daemon is already listening on {self.path}")
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+        os.chmod(self.path, 0o600)
+        logger.info("Listening for control commands on %s", self.path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # The server removes its socket file on close
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter") -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    reply = await self.dispatch(request)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    reply = {"ok": False, "error": "Request is not valid JSON"}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: dict) -> dict:
+        command = request.get("command") if isinstance(request, dict) else None
+        handler = getattr(self, f"_{command}", None) if command in COMMANDS else None
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command {command!r}; expected one of {', '.join(COMMANDS)}"}
+        try:
+            return {"ok": True, **await handler(request)}
+        except KeyError as exc:
+            return {"ok": False, "error": f"Missing or unknown {exc.args[0]!r}"}
+        except LookupError as exc:
+            return {"ok": False, "error": str(exc), "suggestions": getattr(exc, "suggestions", [])}
+        except ValueError as exc:
+            return {"ok": False, "error": str(exc)}
+        except Exception as exc:
+            logger.warning("Control command %r failed", command, exc_info=True)
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+
+    async def _list(self, request: dict) -> dict:
+        return {
+            "watches": [
+                {
+                    "url": w.url,
+                    "category": w.category,
+                    "interval": w.interval,
+                    "active": self.monitor.previously_active[w],
+                }
+                for w in self.monitor.watches
+            ]
+        }
+
+    async def _add(self, request: dict) -> dict:
+        watch = _watch(request)
+        matches = await self.monitor.add_watch(watch)
+        return {"matches": [category_label(m) for m in matches]}
+
+    async def _remove(self, request: dict) -> dict:
+        if not self.monitor.remove_watch(_watch(request)):
+            raise ValueError("No such watch")
+        return {}
+
+    async def _check(self, request: dict) -> dict:
+        urls = [request["url"]] if request.get("url") else list(self.monitor.pages)
+        results = {}
+        for url in urls:
+            outcome = await self.monitor.check_now(url)
+            results[url] = {"ok": outcome.ok, "changed": outcome.changed, "status_code": outcome.status_code}
+        return {"pages": results}
+
+    async def _dump(self, request: dict) -> dict:
+        return self.monitor.dump()
+
+    async def _categories(self, request: dict) -> dict:
+        """The categories of a page, from the daemon's last parse when it has one.
+
+        A page polled through a watch plan has only its watched statuses
+        kept current, so it is fetched and parsed in full instead.
+        """
+        from varaosabotti.models import CategorySnapshot
+
+        url = request["url"]
+        snapshot = self.monitor.snapshots.get(url)
+        if snapshot is not None and not self.monitor.is_planned(url):
+            return {"snapshot": snapshot.to_dict(), "source": "poll"}
+        categories = await self.monitor.fetch_categories(url, full=True)
+        return {"snapshot": CategorySnapshot.from_categories(categories).to_dict(), "source": "fetch"}
+
+    async def _stop(self, request: dict) -> dict:
+        self.monitor.stop()
+        return {}
+
+
+def _watch(request: dict) -> Watch:
+    """The watch a request names, checked as ``load_watches`` checks a config entry."""
+    url, category, interval = request["url"], request["category"], request.get("interval")
+    if not isinstance(url, str) or not url:
+        raise ValueError("'url' must be a non-empty string")
+    if not isinstance(category, str) or not category:
+        raise ValueError("'category' must be a non-empty string")
+    check_expression(category)
+    if interval is not None and (not isinstance(interval, int) or isinstance(interval, bool) or interval <= 0):
+        raise ValueError("'interval' must be a whole number of seconds greater than 0")
+    return Watch(url=url, category=category, interval=interval)
@@ -0,0 +1,247 @@
+import asyncio
+import csv
+import json
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TextIO
+from urllib.parse import (
+    parse_qsl,
+    quote,
+    unquote,
+    urlencode,
+    urljoin,
+    urlsplit,
+    urlunsplit,
+)
+
+import httpx
+
+from varaosabotti.config import DEFAULT_PARSER
+from varaosabotti.models import Category, CategorySnapshot, CategoryStatus
+from varaosabotti.parsepool import ParsePool
+from varaosabotti.scraper import fetch_categories
+
+logger = logging.getLogger(__name__)
+
+# Applied when no --per-host-concurrency / --per-host-rate is given, so a crawl stays polite
+DEFAULT_HOST_CONCURRENCY = 2
+DEFAULT_HOST_RATE = 2.0
+
+CATALOG_FIELDS = ("url", "group", "parent", "title", "status", "href")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# RFC 3986 reserved and unreserved characters, left as they are in paths
+_PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def normalize_url(href: str, base: str) -> str | None:
+    """Resolve ``href`` against ``base`` into one canonical form, or None if it isn't a web page.
+
+    The scheme and host are lowercased, default ports, fragments and
+    trailing slashes dropped, percent-escapes normalised and query
+    parameters sorted, so every spelling of a page is crawled once.
+    """
+    parts = urlsplit(urljoin(base, href.strip()))
+    if parts.scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS[parts.scheme]:
+        netloc = f"{netloc}:{parts.port}"
+    path = quote(unquote(parts.path), safe=_PATH_SAFE) or "/"
+    while "//" in path:
+        path = path.replace("//", "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, netloc, path, query, ""))
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    depth: int
+    categories: list[Category] = field(default_factory=list)
+    # Normalised URLs of the page's in-scope category links
+    links: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "depth": self.depth,
+            "snapshot": CategorySnapshot.from_categories(self.categories).to_dict(),
+            "links": self.links,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CrawledPage":
+        return cls(
+            url=data["url"],
+            depth=data["depth"],
+            categories=CategorySnapshot.from_dict(data["snapshot"]).to_categories(),
+            links=data["links"],
+            error=data.get("error"),
+        )
+
+
+class CrawlCheckpoint:
+    """Append-only journal of crawled pages, one JSON line each, for resuming a crawl.
+
+    Every page is flushed as soon as it has been crawled, so an interrupted
+    crawl loses at most the pages in flight. The pages still to visit are
+    worked out again from the links of the pages already crawled.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._file: TextIO | None = None
+
+    def load(self) -> list[CrawledPage]:
+        pages = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        pages.append(CrawledPage.from_dict(json.loads(line)))
+                    except (ValueError, KeyError):
+                        # A line cut short when the crawl was killed
+                        logger.debug("Skipping an incomplete line in %s", self.path)
+        except FileNotFoundError:
+            pass
+        return pages
+
+    def append(self, page: CrawledPage) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(page.to_dict(), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Crawler:
+    """Follows category links breadth-first from a start page, a few pages at a time.
+
+    Only links to active categories on the start page's host are followed,
+    down to ``max_depth`` links from the start, and at most ``max_pages``
+    pages are crawled. Per-host rate limits are left to the client's
+    transport. With a ``checkpoint``, pages crawled by an earlier run of
+    the same crawl are not fetched again.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        max_depth: int = 2,
+        max_pages: int = 200,
+        concurrency: int = 10,
+        backend: str = DEFAULT_PARSER,
+        pool: ParsePool | None = None,
+        checkpoint: CrawlCheckpoint | None = None,
+    ) -> None:
+        self.client = client
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.backend = backend
+        self.pool = pool
+        self.checkpoint = checkpoint
+        self.pages: dict[str, CrawledPage] = {}
+        self._seen: set[str] = set()
+        self._queue: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+        self._host = ""
+
+    async def crawl(self, start: str) -> list[CrawledPage]:
+        """Crawl from ``start`` and return every crawled page, resumed ones included."""
+        start = normalize_url(start, start)
+        if start is None:
+            raise ValueError("The start URL must be an http(s) URL")
+        self._host = urlsplit(start).netloc
+
+        resumed = self.checkpoint.load() if self.checkpoint is not None else []
+        # Pages that failed are tried again; a later line for the same page supersedes an earlier one
+        resumed = [p for p in {p.url: p for p in resumed}.values() if p.error is None]
+        for page in resumed:
+            self.pages[page.url] = page
+            self._seen.add(page.url)
+        if resumed:
+            logger.info("Resuming the crawl with %d page(s) already crawled.", len(resumed))
+        self._enqueue(start, 0)
+        for page in sorted(resumed, key=lambda p: p.depth):
+            self._follow(page)
+
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return list(self.pages.values())
+
+    def _enqueue(self, url: str, depth: int) -> None:
+        if url in self._seen or len(self._seen) >= self.max_pages:
+            return
+        self._seen.add(url)
+        self._queue.put_nowait((url, depth))
+
+    def _follow(self, page: CrawledPage) -> None:
+        if page.depth < self.max_depth:
+            for link in page.links:
+                self._enqueue(link, page.depth + 1)
+
+    async def _worker(self) -> None:
+        while True:
+            url, depth = await self._queue.get()
+            try:
+                try:
+                    page = await self._crawl_page(url, depth)
+                except Exception as exc:
+                    logger.warning("Could not crawl %s", url, exc_info=True)
+                    page = CrawledPage(url, depth, error=type(exc).__name__)
+                self.pages[url] = page
+                if self.checkpoint is not None:
+                    self.checkpoint.append(page)
+                self._follow(page)
+            finally:
+                self._queue.task_done()
+
+    async def _crawl_page(self, url: str, depth: int) -> CrawledPage:
+        try:
+            categories = await fetch_categories(url, self.client, backend=self.backend, pool=self.pool)
+        except httpx.HTTPStatusError as exc:
+            logger.warning("HTTP error %d crawling %s", exc.response.status_code, url)
+            return CrawledPage(url, depth, error=f"HTTP {exc.response.status_code}")
+        except httpx.HTTPError as exc:
+            logger.warning("Network error crawling %s: %s", url, exc)
+            return CrawledPage(url, depth, error=type(exc).__name__)
+
+        links = []
+        for c in categories:
+            if c.status is not CategoryStatus.ACTIVE or not c.href:
+                continue
+            link = normalize_url(c.href, url)
+            if link is not None and link != url and urlsplit(link).netloc == self._host and link not in links:
+                links.append(link)
+        logger.info("Crawled %s: %d categories, %d link(s) (depth %d)", url, len(categories), len(links), depth)
+        return CrawledPage(url, depth, categories, links)
+
+
+def write_catalog(pages: Iterable[CrawledPage], out: TextIO) -> int:
+    """Write every category of the crawled pages as CSV and return the number of rows."""
+    writer = csv.writer(out)
+    writer.writerow(CATALOG_FIELDS)
+    rows = 0
+    for page in sorted(pages, key=lambda p: (p.depth, p.url)):
+        for c in page.categories:
+            writer.writerow((page.url, c.group or "", c.parent or "", c.title, c.status.value, c.href))
+            rows += 1
+    return rows
@@ -0,0 +1,506 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+from varaosabotti.config import Watch, group_by_url
+from varaosabotti.events import (
+    CategoryEvent,
+    CategoryKey,
+    ChangeKind,
+    category_key,
+    diff_snapshots,
+)
+from varaosabotti.index import CategoryIndex
+from varaosabotti.metrics import Metrics
+from varaosabotti.models import Category, CategorySnapshot, CategoryStatus
+from varaosabotti.notifier import NotificationQueue, category_label, log_alert
+from varaosabotti.parsepool import ParsePool
+from varaosabotti.profiling import span
+from varaosabotti.scheduler import PollOutcome, PollSchedule, parse_retry_after
+from varaosabotti.scraper import DEFAULT_PARSER, PageCache, fetch_categories
+from varaosabotti.snapshotcache import SnapshotCache
+from varaosabotti.state import StateStore
+from varaosabotti.subscriptions import SubscriptionMatcher, is_pattern
+from varaosabotti.transport import TransferLog
+from varaosabotti.watchplan import WatchPlan
+
+logger = logging.getLogger(__name__)
+
+
+class WatchNotFound(LookupError):
+    """A watch's category is not on its page."""
+
+    def __init__(self, watch: Watch, suggestions: list[str]) -> None:
+        super().__init__(f"Category '{watch.category}' not found on {watch.url}")
+        self.suggestions = suggestions
+
+
+class Monitor:
+    """Polls every watched page as its own task on a shared ``httpx.AsyncClient``.
+
+    Each page runs on its own ``PollSchedule``. A semaphore caps how many pages are
+    fetched and parsed at once, and alerts are handed to a ``NotificationQueue``
+    so a slow notification never delays the next fetch.
+    """
+
+    def __init__(
+        self,
+        watches: list[Watch],
+        client: httpx.AsyncClient,
+        *,
+        interval: int,
+        notifications: NotificationQueue | None = None,
+        max_concurrency: int = 10,
+        parser: str = DEFAULT_PARSER,
+        stream: bool = False,
+        store: StateStore | None = None,
+        jitter: float = 0.1,
+        adaptive: bool = False,
+        once: bool = False,
+        metrics: Metrics | None = None,
+        parse_pool: ParsePool | None = None,
+        snapshot_cache: SnapshotCache | None = None,
+        fast_path: bool = False,
+    ) -> None:
+        self.watches = list(watches)
+        self.pages = group_by_url(watches)
+        self.client = client
+        self.interval = interval
+        self.notifications = notifications
+        self.parser = parser
+        self.stream = stream
+        self.parse_pool = parse_pool
+        self.snapshot_cache = snapshot_cache
+        self.fast_path = fast_path
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.once = once
+        self.store = store
+        # Notified state as last saved, or None for watches never checked before
+        self._saved_active = {w: store.watch_active(w) if store else None for w in watches}
+        self.previously_active = {w: bool(active) for w, active in self._saved_active.items()}
+        self.snapshots: dict[str, CategorySnapshot] = {}
+        # Keys of each watch's matched categories; None until the watch is first checked
+        self._watched_keys: dict[Watch, set[CategoryKey] | None] = dict.fromkeys(watches)
+        self.cache = PageCache(store)
+        self.transfers = TransferLog()
+        self.metrics = metrics or Metrics()
+        self._restored: set[str] = set()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Pages parsed during validation, reused by each page's first poll
+        self._validated: dict[str, list[Category]] = {}
+        self._indexes: dict[str, CategoryIndex] = {}
+        # With fast_path, how to read a page's watched statuses without parsing it
+        self._plans: dict[str, WatchPlan] = {}
+        self._matchers: dict[str, SubscriptionMatcher] = {}
+        # A page is checked by one task at a time, be it its poller or a requested check
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._pollers: dict[str, asyncio.Task] = {}
+        self._task_group: asyncio.TaskGroup | None = None
+        self._stopping = asyncio.Event()
+
+    def page_interval(self, url: str) -> int:
+        """A page shared by several watches is polled as often as the most eager one wants."""
+        return min(w.interval or self.interval for w in self.pages[url])
+
+    async def fetch_categories(self, url: str, *, full: bool = False) -> list[Category]:
+        """Fetch a page's categories. With ``full``, never read it through a watch plan."""
+        async with self._semaphore:
+            started = time.perf_counter()
+            categories = await fetch_categories(
+                url,
+                self.client,
+                self.cache,
+                self.parser,
+                stream=self.stream,
+                stats=self.transfers,
+                pool=self.parse_pool,
+                plan=None if full else self._plans.get(url),
+            )
+            sample = self.transfers.latest[url]
+            self.metrics.observe_fetch(time.perf_counter() - started - sample.parse_seconds)
+            if sample.parsed:
+                self.metrics.observe_parse(sample.parse_seconds)
+            return categories
+
+    def index(self, url: str, categories: list[Category]) -> CategoryIndex:
+        """Return the lookup index for a page, rebuilding it only when the page was re-parsed."""
+        index = self._indexes.get(url)
+        if index is None or index.categories is not categories:
+            with span("index"):
+                index = self._indexes[url] = CategoryIndex(categories)
+        return index
+
+    async def validate(self) -> bool:
+        """Check that every watched category exists. Returns False if any is missing.
+
+        Watches found in the state store were validated by an earlier run, so
+        only pages with new watches are fetched. A page parsed within the
+        snapshot cache's TTL is checked against the cached categories instead.
+        """
+        for url in self.pages:
+            self._restore(url)
+        pages = {
+            url: page_watches
+            for url, page_watches in self.pages.items()
+            if any(self._saved_active[w] is None for w in page_watches)
+        }
+        results = await asyncio.gather(
+            *(self._categories_to_validate(url) for url in pages),
+            return_exceptions=True,
+        )
+        ok = True
+        for (url, page_watches), result in zip(pages.items(), results):
+            if isinstance(result, httpx.HTTPError):
+                logger.warning("Could not validate %s (network error). Starting monitor anyway.", url)
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            categories, fetched = result
+            if fetched:
+                self._validated[url] = categories
+            index = self.index(url, categories)
+            found = self._match(url, categories)
+
+            for watch in page_watches:
+                matches = found[watch.category]
+                if not matches:
+                    _report_not_found(index, watch)
+                    ok = False
+                    continue
+                logger.info(
+                    "Monitoring '%s' (%d match(es)) on %s (interval: %ds)",
+                    watch.category,
+                    len(matches),
+                    url,
+                    self.page_interval(url),
+                )
+                for m in matches:
+                    logger.info("  Matched: %s", category_label(m))
+        return ok
+
+    async def _categories_to_validate(self, url: str) -> tuple[list[Category], bool]:
+        """A page's categories, and whether they were fetched just now rather than cached."""
+        if self.snapshot_cache is None:
+            return await self.fetch_categories(url), True
+        snapshot = self.snapshot_cache.get(url)
+        if snapshot is not None:
+            return snapshot.to_categories(), False
+        categories = await self.fetch_categories(url)
+        self.snapshot_cache.put(url, CategorySnapshot.from_categories(categories))
+        return categories, True
+
+    async def run(self, *, forever: bool = False) -> None:
+        """Poll every page until cancelled.
+
+        With ``forever``, keep running even with no pages left, so watches
+        can be added later. Either way, ``stop`` ends the run.
+        """
+        if len(self.watches) > 1:
+            logger.info("Watching %d categories across %d page(s).", len(self.watches), len(self.pages))
+        stopper = asyncio.create_task(self._stop_when_asked(), name="stop")
+        try:
+            async with asyncio.TaskGroup() as tg:
+                self._task_group = tg
+                for url in self.pages:
+                    self._start_poller(url)
+                if forever:
+                    tg.create_task(self._stopping.wait(), name="idle")
+        finally:
+            stopper.cancel()
+            self._task_group = None
+            self.log_transfer_summary()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def _stop_when_asked(self) -> None:
+        await self._stopping.wait()
+        for task in self._pollers.values():
+            task.cancel()
+
+    def _start_poller(self, url: str, *, delay: float = 0.0) -> None:
+        self._pollers[url] = self._task_group.create_task(self._poll_page(url, delay=delay), name=f"poll {url}")
+
+    def is_planned(self, url: str) -> bool:
+        """True if the page's polls only read its watched statuses, leaving the others stale."""
+        return url in self._plans
+
+    def _reschedule(self, url: str, previous_interval: int) -> None:
+        """Restart a page's poller if its watches changed how often it is polled."""
+        interval = self.page_interval(url)
+        task = self._pollers.get(url)
+        if interval == previous_interval or task is None or task.done() or self._task_group is None:
+            return
+        task.cancel()
+        logger.debug("Polling %s every %ds now.", url, interval)
+        self._start_poller(url, delay=interval)
+
+    async def add_watch(self, watch: Watch) -> list[Category]:
+        """Start monitoring a watch at runtime and return its matches.
+
+        Raises ``WatchNotFound`` if its category is not on the page. A watch
+        on a page already being polled is checked right away; a new page
+        gets its own poller.
+        """
+        if watch in self.previously_active:
+            raise ValueError(f"Already watching '{watch.category}' on {watch.url}")
+        self._restore(watch.url)
+        new_page = watch.url not in self.pages
+        index = self._indexes.get(watch.url)
+        if new_page or index is None:
+            categories = await self.fetch_categories(watch.url)
+            index = self.index(watch.url, categories)
+            if new_page:
+                self._validated[watch.url] = categories
+        matches = index.find(watch.category)
+        if not matches:
+            raise WatchNotFound(watch, index.suggest(watch.category))
+
+        previous_interval = None if new_page else self.page_interval(watch.url)
+        self.watches.append(watch)
+        self.pages.setdefault(watch.url, []).append(watch)
+        self._saved_active[watch] = self.store.watch_active(watch) if self.store else None
+        self.previously_active[watch] = bool(self._saved_active[watch])
+        self._watched_keys[watch] = None
+        # The next parse plans and matches for the new watch too
+        self._plans.pop(watch.url, None)
+        self._matchers.pop(watch.url, None)
+        logger.info("Monitoring '%s' (%d match(es)) on %s", watch.category, len(matches), watch.url)
+        if not new_page:
+            self._update_watch(watch, matches)
+            self._reschedule(watch.url, previous_interval)
+        elif self._task_group is not None:
+            self._start_poller(watch.url)
+        return matches
+
+    def remove_watch(self, watch: Watch) -> bool:
+        """Stop monitoring a watch. Returns False if it wasn't being monitored."""
+        if watch not in self.previously_active:
+            return False
+        previous_interval = self.page_interval(watch.url)
+        self.watches.remove(watch)
+        page_watches = self.pages[watch.url]
+        page_watches.remove(watch)
+        for table in (self.previously_active, self._saved_active, self._watched_keys, self.metrics.last_success):
+            table.pop(watch, None)
+        self._plans.pop(watch.url, None)
+        self._matchers.pop(watch.url, None)
+        if not page_watches:
+            del self.pages[watch.url]
+            task = self._pollers.pop(watch.url, None)
+            if task is not None:
+                task.cancel()
+            for table in (self.snapshots, self._indexes, self._validated):
+                table.pop(watch.url, None)
+        else:
+            self._reschedule(watch.url, previous_interval)
+        logger.info("Stopped monitoring '%s' on %s", watch.category, watch.url)
+        return True
+
+    async def check_now(self, url: str) -> PollOutcome:
+        """Check a page right away, outside its polling schedule."""
+        if url not in self.pages:
+            raise KeyError(url)
+        async with self._lock(url):
+            return await self.check_page(url)
+
+    def _lock(self, url: str) -> asyncio.Lock:
+        lock = self._locks.get(url)
+        if lock is None:
+            lock = self._locks[url] = asyncio.Lock()
+        return lock
+
+    def dump(self) -> dict:
+        """The monitor's state in JSON-compatible form."""
+        pages = {}
+        for url, page_watches in self.pages.items():
+            snapshot = self.snapshots.get(url)
+            plan = self._plans.get(url)
+            pages[url] = {
+                "interval": self.page_interval(url),
+                "plan": {"hits": plan.hits, "misses": plan.misses} if plan is not None else None,
+                "categories": len(snapshot) if snapshot is not None else None,
+                "active_categories": snapshot.active_count if snapshot is not None else None,
+                "watches": [
+                    {"category": w.category, "active": self.previously_active[w]} for w in page_watches
+                ],
+            }
+        return {
+            "pages": pages,
+            "cache": {"hits": self.cache.hits, "misses": self.cache.misses},
+            "transfers": self.transfers.total().describe(),
+        }
+
+    def log_transfer_summary(self) -> None:
+        """Log what polling has cost so far, per page at debug level and in total."""
+        if not self.transfers.pages:
+            return
+        for url, totals in self.transfers.pages.items():
+            logger.debug("Transfers for %s: %s", url, totals.describe())
+        parser = f"{self.parser}, streaming" if self.stream else self.parser
+        logger.info("Transfer summary (%s): %s", parser, self.transfers.total().describe())
+
+    async def check_all(self) -> None:
+        """Check every page once, concurrently."""
+        await asyncio.gather(*(self.check_page(url) for url in self.pages))
+
+    async def check_page(self, url: str) -> PollOutcome:
+        self._restore(url)
+        try:
+            # Reuse the categories from validation on the first poll
+            categories = self._validated.pop(url, None)
+            if categories is None:
+                categories = await self.fetch_categories(url)
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            self.metrics.http_error(status)
+            logger.warning("HTTP error %d fetching %s. Will retry.", status, url)
+            return PollOutcome(
+                ok=False,
+                status_code=status,
+                retry_after=parse_retry_after(exc.response.headers.get("Retry-After")),
+            )
+        except httpx.HTTPError:
+            self.metrics.http_error(None)
+            logger.warning("Network error fetching %s. Will retry.", url, exc_info=True)
+            return PollOutcome(ok=False)
+
+        self.metrics.poll_succeeded(self.pages[url])
+        previous = self.snapshots.get(url)
+        index = self._indexes.get(url)
+        if previous is not None and index is not None and index.categories is categories:
+            # The fetch layer handed back the cached parse: nothing changed
+            logger.debug("No changes on %s.", url)
+            return PollOutcome()
+
+        index = self.index(url, categories)
+        snapshot = self.snapshots[url] = CategorySnapshot.from_categories(categories)
+        self.metrics.set_categories(url, snapshot.active_count, len(snapshot) - snapshot.active_count)
+        events = diff_snapshots(previous, snapshot)
+        for event in events:
+            logger.debug("%s: %s", event.kind.value.capitalize(), category_label(event.category))
+        self._dispatch(url, index, events, initial=previous is None)
+        if self.fast_path:
+            self._update_plan(url, categories)
+        return PollOutcome(changed=bool(events))
+
+    def _update_plan(self, url: str, categories: list[Category]) -> None:
+        """Plan the page's next polls, unless some watch has no match to plan for.
+
+        Patterns can match categories added later, which only a parse finds.
+        """
+        keys = [self._watched_keys[w] for w in self.pages[url]]
+        plannable = all(keys) and not any(is_pattern(w.category) for w in self.pages[url])
+        plan = WatchPlan.build(categories, set().union(*keys)) if plannable else None
+        if plan is None:
+            self._plans.pop(url, None)
+            logger.debug("No watch plan for %s; every change is parsed in full.", url)
+        else:
+            previous = self._plans.get(url)
+            if previous is not None:
+                plan.hits, plan.misses = previous.hits, previous.misses
+            self._plans[url] = plan
+
+    def _restore(self, url: str) -> None:
+        """Load the page as the previous run left it, so the first poll is compared against it."""
+        if self.store is None or url in self._restored:
+            return
+        self._restored.add(url)
+        cached = self.cache.get(url)
+        if cached is not None:
+            self.snapshots[url] = CategorySnapshot.from_categories(cached.categories)
+
+    def _dispatch(self, url: str, index: CategoryIndex, events: list[CategoryEvent], *, initial: bool) -> None:
+        """Re-check the watches that the page's change events concern."""
+        page_watches = self.pages[url]
+        if initial or any(e.kind in (ChangeKind.ADDED, ChangeKind.REMOVED) for e in events):
+            # The layout changed, so matches have to be looked up again
+            affected = page_watches
+        else:
+            changed = {e.key for e in events}
+            affected = [
+                w
+                for w in page_watches
+                if self._watched_keys[w] is None or not changed.isdisjoint(self._watched_keys[w])
+            ]
+
+        if not affected:
+            return
+        found = self._match(url, index.categories)
+        for watch in affected:
+            self._update_watch(watch, found[watch.category])
+
+    def _match(self, url: str, categories: list[Category]) -> dict[str, list[Category]]:
+        """The matches of every watch on a page, from one pass over its categories."""
+        matcher = self._matchers.get(url)
+        if matcher is None:
+            matcher = self._matchers[url] = SubscriptionMatcher(w.category for w in self.pages[url])
+        with span("find_category"):
+            return matcher.match(categories)
+
+    def _update_watch(self, watch: Watch, matches: list[Category]) -> None:
+        active = self.previously_active[watch] = self._check_watch(watch, matches)
+        if self.store is not None and self._saved_active[watch] != active:
+            self.store.set_watch_active(watch, active)
+            self._saved_active[watch] = active
+
+    async def _poll_page(self, url: str, *, delay: float = 0.0) -> None:
+        loop = asyncio.get_running_loop()
+        schedule = PollSchedule(self.page_interval(url), jitter=self.jitter, adaptive=self.adaptive)
+        if delay:
+            await asyncio.sleep(delay)
+        schedule.start(loop.time())
+        while True:
+            async with self._lock(url):
+                outcome = await self.check_page(url)
+            if self.once:
+                return
+            delay = schedule.next_delay(outcome, loop.time())
+            if schedule.failures:
+                logger.info("Backing off %s for %.0fs.", url, delay)
+            elif schedule.current != schedule.interval:
+                logger.debug("Polling %s every %.0fs.", url, schedule.current)
+            await asyncio.sleep(delay)
+
+    def _check_watch(self, watch: Watch, matches: list[Category]) -> bool:
+        """Check one watch against its matches on a fresh parse and return its new active state."""
+        previously_active = self.previously_active[watch]
+        self._watched_keys[watch] = {category_key(m) for m in matches}
+
+        if not matches:
+            logger.warning(
+                "Category '%s' no longer found on page.",
+                watch.category,
+            )
+            return previously_active
+
+        if any(m.status == CategoryStatus.ACTIVE for m in matches):
+            if not previously_active:
+                for m in matches:
+                    if m.status == CategoryStatus.ACTIVE:
+                        self._notify(m, watch.url)
+            else:
+                logger.debug("Category '%s' is still active (already notified).", watch.category)
+            return True
+
+        for m in matches:
+            logger.info("Still inactive: %s", category_label(m))
+        return False
+
+    def _notify(self, category: Category, url: str) -> None:
+        with span("notify"):
+            log_alert(category, url)
+            if self.notifications is not None:
+                self.notifications.put(category, url)
+
+
+def _report_not_found(index: CategoryIndex, watch: Watch) -> None:
+    logger.error("Category '%s' not found on %s.", watch.category, watch.url)
+    suggestions = index.suggest(watch.category)
+    if suggestions:
+        logger.error("Did you mean one of these?")
+        for s in suggestions:
+            logger.error("  - %s", s)
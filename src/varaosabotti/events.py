@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from enum import Enum
+
+from varaosabotti.models import Category, CategorySnapshot
+
+type CategoryKey = tuple[str | None, str | None, str]
+
+
+class ChangeKind(Enum):
+    ACTIVATED = "activated"
+    DEACTIVATED = "deactivated"
+    ADDED = "added"
+    REMOVED = "removed"
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryEvent:
+    kind: ChangeKind
+    category: Category
+
+    @property
+    def key(self) -> CategoryKey:
+        return category_key(self.category)
+
+
+def category_key(category: Category) -> CategoryKey:
+    """Identity of a category across polls: its place on the page, not its status."""
+    return (category.group, category.parent, category.title)
+
+
+def diff_snapshots(old: CategorySnapshot | None, new: CategorySnapshot) -> list[CategoryEvent]:
+    """Compare two consecutive snapshots of a page and describe what changed.
+
+    When the page layout is unchanged (the common case) only the status
+    bitmaps are compared. There is nothing to compare against for the first
+    snapshot, so it produces no events.
+    """
+    if old is None:
+        return []
+
+    if old.titles == new.titles and old.parents == new.parents and old.groups == new.groups:
+        return _status_events(new, old.active ^ new.active)
+
+    events: list[CategoryEvent] = []
+    old_positions = _positions(old)
+    new_positions = _positions(new)
+
+    for key, new_ids in new_positions.items():
+        old_ids = old_positions.get(key, [])
+        # Categories sharing a key are paired up in page order
+        for old_i, new_i in zip(old_ids, new_ids):
+            if old.status(old_i) is not new.status(new_i):
+                events.append(_status_event(new, new_i))
+        for new_i in new_ids[len(old_ids) :]:
+            events.append(CategoryEvent(ChangeKind.ADDED, new[new_i]))
+
+    for key, old_ids in old_positions.items():
+        new_ids = new_positions.get(key, [])
+        for old_i in old_ids[len(new_ids) :]:
+            events.append(CategoryEvent(ChangeKind.REMOVED, old[old_i]))
+
+    return events
+
+
+def _positions(snapshot: CategorySnapshot) -> dict[CategoryKey, list[int]]:
+    positions: dict[CategoryKey, list[int]] = {}
+    for i, key in enumerate(zip(snapshot.groups, snapshot.parents, snapshot.titles)):
+        positions.setdefault(key, []).append(i)
+    return positions
+
+
+def _status_events(snapshot: CategorySnapshot, changed: int) -> list[CategoryEvent]:
+    events: list[CategoryEvent] = []
+    while changed:
+        low = changed & -changed
+        events.append(_status_event(snapshot, low.bit_length() - 1))
+        changed ^= low
+    return events
+
+
+def _status_event(snapshot: CategorySnapshot, i: int) -> CategoryEvent:
+    category = snapshot[i]
+    kind = ChangeKind.ACTIVATED if snapshot.active >> i & 1 else ChangeKind.DEACTIVATED
+    return CategoryEvent(kind, category)
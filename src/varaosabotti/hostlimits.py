@@ -0,0 +1,91 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+
+import httpx
+
+
+class _HostSlot:
+    def __init__(self, concurrency: int | None, rate: float | None) -> None:
+        self.semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+        self.spacing = 1.0 / rate if rate else 0.0
+        self.next_start = 0.0
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Caps concurrent requests and request rate per host on top of another transport.
+
+    A request holds its host's slot until its response body is closed, so
+    streamed responses count as in flight while they are being read.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        *,
+        concurrency: int | None = None,
+        rate: float | None = None,
+    ) -> None:
+        self._transport = transport
+        self._concurrency = concurrency
+        self._rate = rate
+        self._hosts: dict[str, _HostSlot] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = _HostSlot(self._concurrency, self._rate)
+
+        if slot.semaphore is not None:
+            await slot.semaphore.acquire()
+        release = _once(slot.semaphore.release if slot.semaphore is not None else None)
+        try:
+            if slot.spacing:
+                loop = asyncio.get_running_loop()
+                now = loop.time()
+                start = max(now, slot.next_start)
+                slot.next_start = start + slot.spacing
+                if start > now:
+                    await asyncio.sleep(start - now)
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+
+        if response.is_closed:
+            # Already read in full (as with prebuilt responses), nothing to stream
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _once(fn: Callable[[], None] | None) -> Callable[[], None]:
+    done = False
+
+    def call() -> None:
+        nonlocal done
+        if not done and fn is not None:
+            done = True
+            fn()
+
+    return call
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from varaosabotti.models import Category, category_label
+from varaosabotti.subscriptions import SubscriptionMatcher, is_pattern
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class CategoryIndex:
+    """Lookup tables over one parsed page, built once and queried many times.
+
+    Keys are casefolded up front, so ``find`` answers every path form of a
+    category expression with dict lookups, and ``suggest`` narrows substring
+    candidates with a trigram index instead of scanning every category.
+    """
+
+    def __init__(self, categories: list[Category]) -> None:
+        self.categories = categories
+        self._by_name: dict[str, list[int]] = defaultdict(list)
+        self._by_parent: dict[tuple[str, str], list[int]] = defaultdict(list)
+        self._by_group: dict[tuple[str, str], list[int]] = defaultdict(list)
+        self._by_path: dict[tuple[str, str, str], list[int]] = defaultdict(list)
+        self._search_keys: list[tuple[str, str]] = []
+        self._trigrams: dict[str, set[int]] = defaultdict(set)
+
+        for i, c in enumerate(categories):
+            title, name = c.title.casefold(), c.name.casefold()
+            group = c.group.casefold() if c.group else None
+            parent = c.parent.casefold() if c.parent else None
+
+            for key in {title, name}:
+                self._by_name[key].append(i)
+                if parent:
+                    self._by_parent[parent, key].append(i)
+                if group:
+                    self._by_group[group, key].append(i)
+                if group and parent:
+                    self._by_path[group, parent, key].append(i)
+
+            self._search_keys.append((title, name))
+            for trigram in _trigrams(title) | _trigrams(name):
+                self._trigrams[trigram].add(i)
+
+        # Title and name are often equal; keep each category once, in page order
+        for table in (self._by_name, self._by_parent, self._by_group, self._by_path):
+            for key, ids in table.items():
+                table[key] = sorted(set(ids))
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def find(self, name: str) -> list[Category]:
+        """Exact, case-insensitive lookup of ``name``, ``parent / name`` or ``group / parent / name``.
+
+        Two segments are tried as parent / child first, then as group / name.
+        Wildcard and ``re:`` expressions are matched by a ``SubscriptionMatcher``
+        scan instead of a lookup.
+        """
+        if is_pattern(name):
+            return SubscriptionMatcher([name]).match(self.categories)[name]
+        parts = [p.strip().casefold() for p in name.split("/")]
+
+        if len(parts) == 3:
+            ids = self._by_path.get((parts[0], parts[1], parts[2]), [])
+        elif len(parts) == 2:
+            ids = self._by_parent.get((parts[0], parts[1])) or self._by_group.get((parts[0], parts[1]), [])
+        else:
+            ids = self._by_name.get(name.casefold(), [])
+        return [self.categories[i] for i in ids]
+
+    def suggest(self, name: str, limit: int = 5) -> list[str]:
+        """Return up to ``limit`` labels of categories containing ``name`` as a substring."""
+        needle = name.casefold()
+        if len(needle) >= 3:
+            # Every trigram of the needle must occur in a matching title or name
+            postings = sorted((self._trigrams.get(t, set()) for t in _trigrams(needle)), key=len)
+            candidates = sorted(set.intersection(*postings)) if postings[0] else []
+        else:
+            candidates = range(len(self.categories))
+
+        suggestions: list[str] = []
+        for i in candidates:
+            title, cat_name = self._search_keys[i]
+            if needle in title or needle in cat_name:
+                label = category_label(self.categories[i])
+                if label not in suggestions:
+                    suggestions.append(label)
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
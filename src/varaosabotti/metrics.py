@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from varaosabotti.config import Watch
+
+logger = logging.getLogger(__name__)
+
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+NOTIFY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        i = bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+
+    def render(self, name: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum:.6f}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class Metrics:
+    """Counters, gauges and histograms of the monitor loop, rendered in the Prometheus text format.
+
+    Everything is updated from the event loop, so no locking is needed.
+    """
+
+    def __init__(self) -> None:
+        self.fetch_seconds = Histogram(FETCH_BUCKETS)
+        self.parse_seconds = Histogram(PARSE_BUCKETS)
+        self.notification_seconds = Histogram(NOTIFY_BUCKETS)
+        self.http_errors: Counter[int] = Counter()
+        self.network_errors = 0
+        self.notification_failures = 0
+        self.categories: dict[str, tuple[int, int]] = {}
+        self.last_success: dict[Watch, float] = {}
+
+    def observe_fetch(self, seconds: float) -> None:
+        self.fetch_seconds.observe(seconds)
+
+    def observe_parse(self, seconds: float) -> None:
+        self.parse_seconds.observe(seconds)
+
+    def http_error(self, status_code: int | None) -> None:
+        """Count a failed fetch; ``None`` means a network error."""
+        if status_code is None:
+            self.network_errors += 1
+        else:
+            self.http_errors[status_code] += 1
+
+    def set_categories(self, url: str, active: int, inactive: int) -> None:
+        self.categories[url] = (active, inactive)
+
+    def poll_succeeded(self, watches: list[Watch], now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        for watch in watches:
+            self.last_success[watch] = now
+
+    def observe_notification(self, seconds: float, *, ok: bool) -> None:
+        self.notification_seconds.observe(seconds)
+        if not ok:
+            self.notification_failures += 1
+
+    def render(self, now: float | None = None) -> str:
+        now = time.time() if now is None else now
+        lines: list[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        header("varaosabotti_fetch_duration_seconds", "histogram", "Time to fetch a page, excluding parsing.")
+        lines += self.fetch_seconds.render("varaosabotti_fetch_duration_seconds")
+        header("varaosabotti_parse_duration_seconds", "histogram", "Time spent parsing a page.")
+        lines += self.parse_seconds.render("varaosabotti_parse_duration_seconds")
+
+        header("varaosabotti_categories", "gauge", "Categories on a page by status, as of its last parse.")
+        for url, (active, inactive) in self.categories.items():
+            lines.append(f'varaosabotti_categories{{url="{_escape(url)}",status="active"}} {active}')
+            lines.append(f'varaosabotti_categories{{url="{_escape(url)}",status="inactive"}} {inactive}')
+
+        header("varaosabotti_http_errors_total", "counter", "Failed page fetches by HTTP status code.")
+        for code, count in sorted(self.http_errors.items()):
+            lines.append(f'varaosabotti_http_errors_total{{code="{code}"}} {count}')
+        header("varaosabotti_network_errors_total", "counter", "Page fetches that failed without a response.")
+        lines.append(f"varaosabotti_network_errors_total {self.network_errors}")
+
+        header("varaosabotti_notification_duration_seconds", "histogram", "Time to deliver a notification.")
+        lines += self.notification_seconds.render("varaosabotti_notification_duration_seconds")
+        header("varaosabotti_notification_failures_total", "counter", "Notifications given up on.")
+        lines.append(f"varaosabotti_notification_failures_total {self.notification_failures}")
+
+        header("varaosabotti_last_success_age_seconds", "gauge", "Seconds since a watch's page was last polled.")
+        for watch, when in self.last_success.items():
+            labels = f'url="{_escape(watch.url)}",category="{_escape(watch.category)}"'
+            lines.append(f"varaosabotti_last_success_age_seconds{{{labels}}} {now - when:.3f}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """Serves ``Metrics.render`` at ``GET /metrics`` on the running event loop."""
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9108) -> None:
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: asyncio.Server | None = None
+
+    async def __aenter__(self) -> "MetricsServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Serving metrics on http://%s:%d/metrics", self.host, self.port)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            # Skip the request headers, there is no body to read
+            while await asyncio.wait_for(reader.readline(), 10) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] in ("GET", "HEAD") and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.metrics.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+            )
+            if parts[:1] != ["HEAD"]:
+                writer.write(body)
+            await writer.drain()
+        except (TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
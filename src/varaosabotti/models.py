@@ -1,3 +1,4 @@
+import sys
 from dataclasses import dataclass
 from enum import Enum
 
@@ -7,7 +8,7 @@ class CategoryStatus(Enum):
     INACTIVE = "inactive"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Category:
     name: str
     title: str
@@ -15,3 +16,89 @@ class Category:
     status: CategoryStatus
     group: str | None = None
     parent: str | None = None
+
+
+def category_label(cat: Category) -> str:
+    label = f"{cat.parent} / {cat.title}" if cat.parent else cat.title
+    if cat.group:
+        label += f"  ({cat.group})"
+    return label
+
+
+@dataclass(frozen=True, slots=True)
+class CategorySnapshot:
+    """Column-oriented copy of one parsed page.
+
+    Parallel tuples hold each category's fields and a single integer bitmap
+    holds the statuses (bit ``i`` set when category ``i`` is active), which is
+    far smaller than a list of ``Category`` objects when many pages are kept.
+    """
+
+    names: tuple[str, ...] = ()
+    titles: tuple[str, ...] = ()
+    hrefs: tuple[str, ...] = ()
+    groups: tuple[str | None, ...] = ()
+    parents: tuple[str | None, ...] = ()
+    active: int = 0
+
+    @classmethod
+    def from_categories(cls, categories: list[Category]) -> "CategorySnapshot":
+        active = 0
+        for i, c in enumerate(categories):
+            if c.status is CategoryStatus.ACTIVE:
+                active |= 1 << i
+        return cls(
+            names=tuple(c.name for c in categories),
+            titles=tuple(c.title for c in categories),
+            hrefs=tuple(c.href for c in categories),
+            groups=tuple(c.group for c in categories),
+            parents=tuple(c.parent for c in categories),
+            active=active,
+        )
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, i: int) -> Category:
+        if not 0 <= i < len(self.titles):
+            raise IndexError(i)
+        return Category(
+            name=self.names[i],
+            title=self.titles[i],
+            href=self.hrefs[i],
+            status=self.status(i),
+            group=self.groups[i],
+            parent=self.parents[i],
+        )
+
+    def status(self, i: int) -> CategoryStatus:
+        return CategoryStatus.ACTIVE if self.active >> i & 1 else CategoryStatus.INACTIVE
+
+    @property
+    def active_count(self) -> int:
+        return self.active.bit_count()
+
+    def to_categories(self) -> list[Category]:
+        return [self[i] for i in range(len(self))]
+
+    def to_dict(self) -> dict:
+        """Plain JSON-compatible form, for storing snapshots on disk."""
+        return {
+            "names": list(self.names),
+            "titles": list(self.titles),
+            "hrefs": list(self.hrefs),
+            "groups": list(self.groups),
+            "parents": list(self.parents),
+            "active": self.active,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CategorySnapshot":
+        return cls(
+            names=tuple(data["names"]),
+            titles=tuple(data["titles"]),
+            hrefs=tuple(data["hrefs"]),
+            groups=tuple(sys.intern(g) if g else g for g in data["groups"]),
+            parents=tuple(sys.intern(p) if p else p for p in data["parents"]),
+            active=data["active"],
+        )
@@ -1,21 +1,19 @@
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
 
 import httpx
 
-from varaosabotti.models import Category
+from varaosabotti.metrics import Metrics
+from varaosabotti.models import Category, category_label
+from varaosabotti.profiling import span
 
 logger = logging.getLogger(__name__)
 
 PUSHOVER_API_URL = "https://api.pushover.net/1/messages.json"
 
 
-def category_label(cat: Category) -> str:
-    label = f"{cat.parent} / {cat.title}" if cat.parent else cat.title
-    if cat.group:
-        label += f"  ({cat.group})"
-    return label
-
-
 def log_alert(category: Category, url: str) -> None:
     logger.warning(
         "ALERT: '%s' is now ACTIVE — parts are available! URL: %s",
@@ -24,15 +22,9 @@ def log_alert(category: Category, url: str) -> None:
     )
 
 
-def send_pushover(
-    category: Category,
-    url: str,
-    api_token: str,
-    user_key: str,
-    client: httpx.Client,
-) -> None:
+def _pushover_payload(category: Category, url: str, api_token: str, user_key: str) -> dict:
     label = category_label(category)
-    payload = {
+    return {
         "token": api_token,
         "user": user_key,
         "title": f"Varaosabotti: {label}",
@@ -42,21 +34,178 @@ def send_pushover(
         "priority": 1,
         "sound": "bugle",
     }
-    try:
-        response = client.post(PUSHOVER_API_URL, data=payload)
-        response.raise_for_status()
-        logger.info("Pushover notification sent for '%s'.", label)
-    except httpx.HTTPStatusError as exc:
+
+
+def _log_pushover_error(exc: httpx.HTTPError) -> None:
+    if isinstance(exc, httpx.HTTPStatusError):
         try:
             errors = exc.response.json().get("errors", [])
             detail = "; ".join(errors) if errors else f"HTTP {exc.response.status_code}"
         except Exception:
             detail = f"HTTP {exc.response.status_code}"
         logger.error("Pushover error: %s", detail)
-    except httpx.HTTPError:
+    else:
         logger.error("Failed to send Pushover notification (network error).")
 
 
+def send_pushover(
+    category: Category,
+    url: str,
+    api_token: str,
+    user_key: str,
+    client: httpx.Client,
+) -> None:
+    payload = _pushover_payload(category, url, api_token, user_key)
+    try:
+        response = client.post(PUSHOVER_API_URL, data=payload)
+        response.raise_for_status()
+        logger.info("Pushover notification sent for '%s'.", category_label(category))
+    except httpx.HTTPError as exc:
+        _log_pushover_error(exc)
+
+
+@dataclass(frozen=True, slots=True)
+class Alert:
+    category: Category
+    url: str
+    user_key: str
+
+
+def _batch_payload(alerts: list[Alert], api_token: str) -> dict:
+    """Payload for one Pushover message covering several alerts for the same user."""
+    if len(alerts) == 1:
+        alert = alerts[0]
+        return _pushover_payload(alert.category, alert.url, api_token, alert.user_key)
+
+    labels = [category_label(a.category) for a in alerts]
+    urls = {a.url for a in alerts}
+    return {
+        "token": api_token,
+        "user": alerts[0].user_key,
+        "title": f"Varaosabotti: {len(alerts)} categories available",
+        "message": "Parts are now available for:\n" + "\n".join(f"• {label}" for label in labels),
+        # Link the page if every alert came from the same one
+        "url": urls.pop() if len(urls) == 1 else "https://www.varaosahaku.fi",
+        "url_title": "View on varaosahaku.fi",
+        "priority": 1,
+        "sound": "bugle",
+    }
+
+
+class NotificationQueue:
+    """Delivers Pushover alerts from a background worker, off the polling path.
+
+    Alerts that arrive within ``window`` seconds of each other are coalesced
+    into one message per user. Rate limiting, server and network errors are
+    retried with exponential backoff. The queue owns its own connection pool
+    unless a client is given.
+    """
+
+    def __init__(
+        self,
+        api_token: str,
+        user_key: str,
+        *,
+        window: float = 2.0,
+        retries: int = 3,
+        backoff: float = 1.0,
+        api_url: str = PUSHOVER_API_URL,
+        client: httpx.AsyncClient | None = None,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.api_token = api_token
+        self.user_key = user_key
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self.api_url = api_url
+        self._client = client
+        self._owns_client = client is None
+        self.metrics = metrics
+        self._queue: asyncio.Queue[Alert | None] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "NotificationQueue":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=4))
+        self._worker = asyncio.create_task(self._run(), name="pushover")
+
+    def put(self, category: Category, url: str, user_key: str | None = None) -> None:
+        self._queue.put_nowait(Alert(category, url, user_key or self.user_key))
+
+    async def close(self) -> None:
+        """Send everything still queued, then stop the worker."""
+        if self._worker is not None:
+            self._queue.put_nowait(None)
+            await self._worker
+            self._worker = None
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            alert = await self._queue.get()
+            if alert is None:
+                return
+            batch = [alert]
+            stopping = False
+            deadline = loop.time() + self.window
+            while (timeout := deadline - loop.time()) > 0:
+                try:
+                    alert = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if alert is None:
+                    stopping = True
+                    break
+                batch.append(alert)
+
+            by_user: dict[str, list[Alert]] = {}
+            for alert in batch:
+                by_user.setdefault(alert.user_key, []).append(alert)
+            for alerts in by_user.values():
+                await self._send(alerts)
+
+            if stopping:
+                return
+
+    async def _send(self, alerts: list[Alert]) -> None:
+        started = time.perf_counter()
+        with span("notify.send"):
+            ok = await self._deliver(alerts)
+        if self.metrics is not None:
+            self.metrics.observe_notification(time.perf_counter() - started, ok=ok)
+
+    async def _deliver(self, alerts: list[Alert]) -> bool:
+        payload = _batch_payload(alerts, self.api_token)
+        labels = ", ".join(f"'{category_label(a.category)}'" for a in alerts)
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._client.post(self.api_url, data=payload)
+                response.raise_for_status()
+                logger.info("Pushover notification sent for %s.", labels)
+                return True
+            except httpx.HTTPError as exc:
+                retryable = not isinstance(exc, httpx.HTTPStatusError) or (
+                    exc.response.status_code == 429 or exc.response.status_code >= 500
+                )
+                if not retryable or attempt == self.retries:
+                    _log_pushover_error(exc)
+                    return False
+                delay = self.backoff * 2**attempt
+                logger.debug("Pushover send failed, retrying in %.1fs.", delay)
+                await asyncio.sleep(delay)
+
+
 def notify(
     category: Category,
     url: str,
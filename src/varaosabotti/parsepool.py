@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from varaosabotti.models import Category, CategorySnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def free_threaded() -> bool:
+    """True on a free-threaded (3.13t) interpreter running with the GIL disabled."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def parse_snapshot(body: bytes, encoding: str, backend: str) -> dict:
+    """Parse a page in a worker and return it in ``CategorySnapshot.to_dict`` form.
+
+    The columnar dict pickles to a fraction of the size of a list of
+    ``Category`` objects.
+    """
+    # Imported here so thread workers share the parent's modules and process
+    # workers pay for the parser imports only once
+    from varaosabotti.scraper import parse_categories
+
+    html = body.decode(encoding, errors="replace")
+    return CategorySnapshot.from_categories(parse_categories(html, backend)).to_dict()
+
+
+class ParsePool:
+    """Parses raw page bodies off the event loop, so fetching continues while pages are parsed.
+
+    Uses worker processes, or threads on a free-threaded interpreter where
+    threads parse in parallel without pickling.
+    """
+
+    def __init__(self, workers: int, *, threads: bool | None = None) -> None:
+        self.workers = workers
+        self.threads = free_threaded() if threads is None else threads
+        self._executor: Executor | None = None
+
+    def __enter__(self) -> "ParsePool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self.threads:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="parse")
+        else:
+            # Forking a process that runs an event loop and threads is unsafe
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+        logger.info("Parsing pages in %d worker %s.", self.workers, "threads" if self.threads else "processes")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, body: bytes, encoding: str, backend: str) -> list[Category]:
+        if self._executor is None:
+            raise RuntimeError("ParsePool is not started")
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(self._executor, parse_snapshot, body, encoding, backend)
+        return CategorySnapshot.from_dict(data).to_categories()
@@ -0,0 +1,147 @@
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+# Installed by ``recording()``; while it is None every span is a shared no-op
+_recorder: "SpanRecorder | None" = None
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class SpanRecorder:
+    """Accumulated count, total and worst duration of each named stage."""
+
+    def __init__(self) -> None:
+        self.spans: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        stats = self.spans.get(name)
+        if stats is None:
+            self.spans[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def report(self) -> str:
+        lines = [f"{'stage':<24} {'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+        for name, (count, total, worst) in sorted(self.spans.items()):
+            lines.append(
+                f"{name:<24} {int(count):>7} {total * 1000:>10.2f} {total / count * 1000:>9.3f} {worst * 1000:>9.3f}"
+            )
+        return "\n".join(lines)
+
+
+def span(name: str) -> contextlib.AbstractContextManager[None]:
+    """Time a stage of the poll cycle, if spans are being recorded."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return _recorder.span(name)
+
+
+def add_span(name: str, seconds: float) -> None:
+    """Record a duration that was measured anyway (decode and body read times)."""
+    if _recorder is not None:
+        _recorder.add(name, seconds)
+
+
+def is_recording() -> bool:
+    return _recorder is not None
+
+
+@contextlib.contextmanager
+def recording() -> Iterator[SpanRecorder]:
+    global _recorder
+    previous, _recorder = _recorder, SpanRecorder()
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+class HttpTrace:
+    """httpx ``trace`` extension that records connection setup and time to first byte."""
+
+    _STAGES = {
+        "connection.connect_tcp": "fetch.connect",
+        "connection.connect_unix_socket": "fetch.connect",
+        "connection.start_tls": "fetch.tls",
+        "http11.receive_response_headers": "fetch.ttfb",
+        "http2.receive_response_headers": "fetch.ttfb",
+    }
+
+    def __init__(self) -> None:
+        self._started: dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        name, _, phase = event_name.rpartition(".")
+        stage = self._STAGES.get(name)
+        if stage is None:
+            return
+        if phase == "started":
+            self._started[name] = time.perf_counter()
+        elif phase == "complete" and name in self._started:
+            add_span(stage, time.perf_counter() - self._started.pop(name))
+
+
+async def profile_cycles(
+    cycle: Callable[[], Awaitable[None]],
+    cycles: int,
+    *,
+    mode: str = "cprofile",
+    output: str | Path = "varaosabotti-profile.txt",
+) -> SpanRecorder:
+    """Run ``cycle`` ``cycles`` times under cProfile or tracemalloc and write a report.
+
+    The report starts with the per-stage span table, followed by the top
+    functions by cumulative time, or the top allocation sites.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode!r}")
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    with recording() as recorder:
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                for _ in range(cycles):
+                    await cycle()
+            finally:
+                profiler.disable()
+            details = io.StringIO()
+            pstats.Stats(profiler, stream=details).sort_stats("cumulative").print_stats(40)
+            body = details.getvalue()
+        else:
+            tracemalloc.start(25)
+            try:
+                for _ in range(cycles):
+                    await cycle()
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:30]
+            body = f"Current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n\n"
+            body += "\n".join(str(stat) for stat in top)
+
+    report = f"Profile of {cycles} cycle(s) ({mode})\n\n{recorder.report()}\n\n{body}\n"
+    Path(output).write_text(report, encoding="utf-8")
+    logger.info("Profile of %d cycle(s) written to %s", cycles, output)
+    return recorder
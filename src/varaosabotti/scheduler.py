@@ -0,0 +1,101 @@
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+# Adaptive polling moves the interval within these factors of the configured one
+ADAPTIVE_MIN_FACTOR = 0.25
+ADAPTIVE_MAX_FACTOR = 4.0
+ADAPTIVE_SPEEDUP = 0.5
+ADAPTIVE_SLOWDOWN = 1.25
+
+
+@dataclass(frozen=True, slots=True)
+class PollOutcome:
+    ok: bool = True
+    changed: bool = False
+    status_code: int | None = None
+    retry_after: float | None = None
+
+    @property
+    def throttled(self) -> bool:
+        """Rate limiting, server errors and network errors call for backing off."""
+        if self.ok:
+            return False
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Parse a ``Retry-After`` header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class PollSchedule:
+    """Decides how long a page's poller sleeps after each poll.
+
+    Polls stay on a fixed grid so time spent fetching doesn't stretch the
+    period, with random jitter so many pages don't fire together. Rate
+    limiting and server errors back off exponentially, honouring
+    ``Retry-After``. With ``adaptive``, pages that change often are polled more
+    often and static pages less often.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        *,
+        jitter: float = 0.1,
+        adaptive: bool = False,
+        max_backoff: float = 3600.0,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.interval = interval
+        self.current = interval
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self._rng = rng or random.Random()
+        self._next_run: float | None = None
+
+    def start(self, now: float) -> None:
+        """Anchor the grid at the time of the first poll."""
+        self._next_run = now
+
+    def next_delay(self, outcome: PollOutcome, now: float) -> float:
+        if outcome.throttled:
+            self.failures += 1
+            delay = min(self.current * 2**self.failures, max(self.max_backoff, self.current))
+            if outcome.retry_after is not None:
+                delay = max(delay, outcome.retry_after)
+            # Restart the grid from the retry, and only ever jitter later
+            self._next_run = now + delay
+            return delay + self._rng.uniform(0, self.jitter) * self.current
+
+        self.failures = 0
+        if self.adaptive and outcome.ok:
+            self._adapt(outcome.changed)
+
+        if self._next_run is None:
+            self._next_run = now
+        self._next_run += self.current
+        if self._next_run < now:
+            # Fell behind (a slow poll); skip the missed slots
+            self._next_run = now
+        delay = self._next_run - now + self._rng.uniform(-self.jitter, self.jitter) * self.current
+        return max(0.0, delay)
+
+    def _adapt(self, changed: bool) -> None:
+        if changed:
+            self.current = max(self.interval * ADAPTIVE_MIN_FACTOR, self.current * ADAPTIVE_SPEEDUP)
+        else:
+            self.current = min(self.interval * ADAPTIVE_MAX_FACTOR, self.current * ADAPTIVE_SLOWDOWN)
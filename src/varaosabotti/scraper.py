@@ -1,13 +1,35 @@
+import hashlib
 import logging
+import sys
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 import httpx
-from bs4 import BeautifulSoup, Tag
-
-from varaosabotti.models import Category, CategoryStatus
+import lxml.html
+from lxml import etree
+
+from varaosabotti.config import DEFAULT_PARSER, PARSER_BACKENDS  # noqa: F401
+from varaosabotti.index import CategoryIndex
+from varaosabotti.models import Category, CategorySnapshot, CategoryStatus
+from varaosabotti.parsepool import ParsePool
+from varaosabotti.profiling import HttpTrace, add_span, is_recording, span
+from varaosabotti.state import StateStore, StoredPage
+from varaosabotti.transport import (
+    USER_AGENT,  # noqa: F401
+    ContentDecoder,
+    TransferLog,
+    TransferSample,
+)
+from varaosabotti.watchplan import WatchPlan
 
 logger = logging.getLogger(__name__)
 
-USER_AGENT = "varaosabotti/0.1.0"
+# BeautifulSoup is only imported when the bs4 backend is used
+if TYPE_CHECKING:
+    from bs4 import Tag
 
 
 def fetch_page(url: str, client: httpx.Client) -> str:
@@ -16,15 +38,389 @@ def fetch_page(url: str, client: httpx.Client) -> str:
     return response.text
 
 
-def parse_categories(html: str) -> list[Category]:
-    soup = BeautifulSoup(html, "lxml")
+@dataclass
+class CachedPage:
+    categories: list[Category]
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: bytes | None = None
+
+
+class PageCache:
+    """Per-URL validators, content digests and parsed categories.
+
+    Lets ``fetch_categories`` skip parsing when the server answers 304, or when
+    the category grid of a fresh response hashes the same as last time. With a
+    ``StateStore``, pages are loaded from it on first use and written back on
+    every fresh parse, so the cache survives restarts.
+    """
+
+    def __init__(self, store: StateStore | None = None) -> None:
+        self._pages: dict[str, CachedPage] = {}
+        self._store = store
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> CachedPage | None:
+        cached = self._pages.get(url)
+        if cached is None and self._store is not None:
+            stored = self._store.load_page(url)
+            if stored is not None:
+                cached = self._pages[url] = CachedPage(
+                    categories=stored.snapshot.to_categories(),
+                    etag=stored.etag,
+                    last_modified=stored.last_modified,
+                    digest=stored.digest,
+                )
+        return cached
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        cached = self.get(url)
+        headers: dict[str, str] = {}
+        if cached is None:
+            return headers
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def lookup(self, url: str, digest: bytes) -> list[Category] | None:
+        """Return the cached categories if the page content hashes the same as last time."""
+        cached = self.get(url)
+        if cached is not None and cached.digest == digest:
+            self.hits += 1
+            logger.debug("Parse cache hit for %s (%d hits, %d misses)", url, self.hits, self.misses)
+            return cached.categories
+        self.misses += 1
+        logger.debug("Parse cache miss for %s (%d hits, %d misses)", url, self.hits, self.misses)
+        return None
+
+    def store(
+        self,
+        url: str,
+        response: httpx.Response,
+        categories: list[Category],
+        digest: bytes | None = None,
+        *,
+        partial: bool = False,
+    ) -> None:
+        """Remember the categories parsed from ``response``.
+
+        A ``partial`` result had only some statuses read from the page, so it
+        is kept without validators or digest: the unchanged page must not
+        hand the stale statuses of the rest back to a later poll.
+        """
+        previous = self._pages.get(url)
+        cached = self._pages[url] = CachedPage(
+            categories=categories,
+            etag=None if partial else response.headers.get("ETag"),
+            last_modified=None if partial else response.headers.get("Last-Modified"),
+            digest=None if partial else digest,
+        )
+        if self._store is not None and cached != previous:
+            self._store.save_page(
+                url,
+                StoredPage(
+                    snapshot=CategorySnapshot.from_categories(categories),
+                    etag=cached.etag,
+                    last_modified=cached.last_modified,
+                    digest=cached.digest,
+                ),
+            )
+
+
+def page_digest(body: bytes) -> bytes:
+    """Hash the category grid region of a page, or the whole body if there is no grid.
+
+    Angular SSR output carries per-request noise (nonces, transfer state) outside
+    the grid, so hashing only the grid keeps the cache effective.
+    """
+    first = body.find(b"ngbdropdown")
+    if first != -1:
+        last = body.rfind(b"ngbdropdown")
+        # The group header of the first section sits between its div.col-12 and
+        # the first dropdown; the last item ends before the next closing div.
+        start = body.rfind(b"col-12", 0, first)
+        end = body.find(b"</div>", last)
+        body = body[max(start, 0) : end if end != -1 else len(body)]
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+async def fetch_categories(
+    url: str,
+    client: httpx.AsyncClient,
+    cache: PageCache | None = None,
+    backend: str = DEFAULT_PARSER,
+    *,
+    stream: bool = False,
+    stats: TransferLog | None = None,
+    pool: ParsePool | None = None,
+    plan: WatchPlan | None = None,
+) -> list[Category]:
+    """Fetch and parse a page, reusing the cached categories when it hasn't changed.
+
+    A page counts as unchanged when the server answers 304 to a conditional
+    request, or when its category grid hashes the same as on the previous poll.
+    With ``stream=True`` the body is parsed incrementally as it arrives and the
+    download stops once the category grid has been read (lxml backend only).
+    Bytes transferred and time spent decoding and parsing go to ``stats``.
+    With a ``pool``, the body is parsed in one of its workers. With a
+    ``plan``, a changed page only has its watched categories' statuses read
+    into the cached categories, and is parsed in full if the plan fails.
+    """
+    if stream and backend != "lxml":
+        raise ValueError("Streaming requires the lxml parser backend")
+    if stream and pool is not None:
+        raise ValueError("Streaming parses in the event loop and cannot use a parse pool")
+    if stream and plan is not None:
+        raise ValueError("Streaming parses as the page arrives and cannot use a watch plan")
+
+    headers = cache.request_headers(url) if cache is not None else {}
+    sample = TransferSample(url)
+    try:
+        if stream:
+            return await _fetch_categories_streaming(url, client, cache, headers, sample)
+        return await _fetch_categories_buffered(url, client, cache, backend, headers, sample, pool, plan)
+    finally:
+        if stats is not None and sample.status_code is not None:
+            stats.record(sample)
+
+
+async def _fetch_categories_buffered(
+    url: str,
+    client: httpx.AsyncClient,
+    cache: PageCache | None,
+    backend: str,
+    headers: dict[str, str],
+    sample: TransferSample,
+    pool: ParsePool | None,
+    plan: WatchPlan | None,
+) -> list[Category]:
+    request = client.build_request("GET", url, headers=headers, extensions=_trace_extensions())
+    response = await client.send(request, stream=True)
+    try:
+        sample.status_code = response.status_code
+        cached = _not_modified(url, response, cache)
+        if cached is not None:
+            return cached
+        response.raise_for_status()
+        body = b"".join([chunk async for chunk in _decoded_chunks(response, sample)])
+    finally:
+        await response.aclose()
+        sample.wire_bytes = response.num_bytes_downloaded
+
+    if cache is None:
+        return await _parse_body(body, response, backend, sample, pool)
+
+    digest = page_digest(body)
+    categories = cache.lookup(url, digest)
+    planned = False
+    if categories is None and plan is not None and (cached := cache.get(url)) is not None:
+        started = time.perf_counter()
+        with span("parse.plan"):
+            categories = plan.apply(body, response.charset_encoding or "utf-8", cached.categories)
+        sample.parse_seconds += time.perf_counter() - started
+        planned = categories is not None
+    if categories is None:
+        categories = await _parse_body(body, response, backend, sample, pool)
+    # Only the watched statuses were read; a watch added later needs the page parsed again
+    cache.store(url, response, categories, digest, partial=planned)
+    return categories
+
+
+def _trace_extensions() -> dict | None:
+    return {"trace": HttpTrace()} if is_recording() else None
+
+
+async def _parse_body(
+    body: bytes,
+    response: httpx.Response,
+    backend: str,
+    sample: TransferSample,
+    pool: ParsePool | None,
+) -> list[Category]:
+    started = time.perf_counter()
+    encoding = response.charset_encoding or "utf-8"
+    if pool is None:
+        categories = parse_categories(body.decode(encoding, errors="replace"), backend)
+    else:
+        categories = await pool.parse(body, encoding, backend)
+    sample.parse_seconds += time.perf_counter() - started
+    sample.parsed = True
+    return categories
+
+
+async def _decoded_chunks(response: httpx.Response, sample: TransferSample) -> AsyncIterator[bytes]:
+    """Yield the response body decoded, timing the decoding separately from the download."""
+    sample.encoding = response.headers.get("Content-Encoding", "identity")
+    if response.is_stream_consumed:
+        # The transport has read and decoded the body already (as with prebuilt responses)
+        async for chunk in response.aiter_bytes():
+            sample.body_bytes += len(chunk)
+            yield chunk
+        return
+
+    decoder = ContentDecoder(sample.encoding)
+    raw_chunks = aiter(response.aiter_raw())
+    read_seconds = 0.0
+    while True:
+        started = time.perf_counter()
+        raw = await anext(raw_chunks, None)
+        read_seconds += time.perf_counter() - started
+        if raw is None:
+            break
+        started = time.perf_counter()
+        chunk = decoder.decode(raw)
+        sample.decode_seconds += time.perf_counter() - started
+        sample.body_bytes += len(chunk)
+        yield chunk
+    started = time.perf_counter()
+    chunk = decoder.flush()
+    sample.decode_seconds += time.perf_counter() - started
+    add_span("fetch.body", read_seconds)
+    add_span("decode", sample.decode_seconds)
+    if chunk:
+        sample.body_bytes += len(chunk)
+        yield chunk
+
+
+def _not_modified(url: str, response: httpx.Response, cache: PageCache | None) -> list[Category] | None:
+    if response.status_code != httpx.codes.NOT_MODIFIED or cache is None:
+        return None
+    cached = cache.get(url)
+    if cached is not None:
+        logger.debug("Not modified: %s (reusing %d categories)", url, len(cached.categories))
+        return cached.categories
+    return None
+
+
+async def _fetch_categories_streaming(
+    url: str,
+    client: httpx.AsyncClient,
+    cache: PageCache | None,
+    headers: dict[str, str],
+    sample: TransferSample,
+) -> list[Category]:
+    async with client.stream("GET", url, headers=headers, extensions=_trace_extensions()) as response:
+        try:
+            sample.status_code = response.status_code
+            cached = _not_modified(url, response, cache)
+            if cached is not None:
+                return cached
+            response.raise_for_status()
+
+            reader = GridReader(encoding=response.charset_encoding or "utf-8")
+            async with aclosing(_decoded_chunks(response, sample)) as chunks:
+                async for chunk in chunks:
+                    started = time.perf_counter()
+                    reader.feed(chunk)
+                    sample.parse_seconds += time.perf_counter() - started
+                    if reader.done:
+                        logger.debug(
+                            "Category grid complete after %d bytes of %s, closing connection",
+                            reader.bytes_read,
+                            url,
+                        )
+                        break
+        finally:
+            sample.wire_bytes = response.num_bytes_downloaded
+        # Leaving the block closes the response, dropping any unread tail
+
+    started = time.perf_counter()
+    categories = _categories_from_tree(reader.close())
+    sample.parse_seconds += time.perf_counter() - started
+    sample.parsed = True
+    if cache is not None:
+        cache.store(url, response, categories)
+    return categories
+
+
+class GridReader:
+    """Incremental lxml parser that notices when the category grid has been read.
+
+    Category sections are sibling ``div.col-12`` elements. Once the element
+    enclosing the first (non-popular) section is closed, every section has
+    been seen and the rest of the page can be skipped.
+    """
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self._parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+        self._grid: etree._Element | None = None
+        self.bytes_read = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        self._parser.feed(chunk)
+        for event, el in self._parser.read_events():
+            if self.done:
+                continue
+            if event == "end":
+                if el is self._grid:
+                    self.done = True
+            elif self._grid is None and el.tag == "div" and el.get("ngbdropdown") is not None:
+                self._grid = _grid_element(el)
+
+    def close(self) -> etree._Element:
+        return self._parser.close()
+
+
+def _grid_element(container: etree._Element) -> etree._Element | None:
+    """Return the element enclosing the category sections, given the first dropdown container."""
+    if "col-lg-4" not in (container.get("class") or "").split():
+        return None
+    sections = _SECTION(container)
+    if not sections:
+        return None
+    # The section header precedes its first container, so it has been parsed already
+    header = _section_header(sections[0])
+    if header and "suosittuja" in header.lower():
+        return None
+    return sections[0].getparent()
+
+
+def parse_categories(html: str, backend: str = DEFAULT_PARSER) -> list[Category]:
+    """Extract categories from a page using the given parser backend.
+
+    ``lxml`` walks the tree with precompiled XPath and is several times faster;
+    ``bs4`` is the original BeautifulSoup implementation, kept as a fallback.
+    Both return the same list.
+    """
+    if backend == "lxml":
+        with span("parse.lxml"):
+            categories = _parse_categories_lxml(html)
+    elif backend == "bs4":
+        with span("parse.bs4"):
+            categories = _parse_categories_bs4(html)
+    else:
+        raise ValueError(f"Unknown parser backend: {backend!r}")
+
+    logger.debug(
+        "Parsed %d categories (%d active, %d inactive)",
+        len(categories),
+        sum(1 for c in categories if c.status == CategoryStatus.ACTIVE),
+        sum(1 for c in categories if c.status == CategoryStatus.INACTIVE),
+    )
+    return categories
+
+
+def _parse_categories_bs4(html: str) -> list[Category]:
+    from bs4 import BeautifulSoup, Tag
+
+    with span("parse.soup"):
+        soup = BeautifulSoup(html, "lxml")
     categories: list[Category] = []
 
     # Find all ngbdropdown containers that hold category links
-    containers = soup.select("div[ngbdropdown].col-lg-4")
+    with span("parse.select"):
+        containers = soup.select("div[ngbdropdown].col-lg-4")
 
     for container in containers:
-        group = _find_group_header(container)
+        with span("parse.group_header"):
+            group = _find_group_header(container)
+        if group:
+            group = sys.intern(group)
 
         # Skip the "Suosittuja osia" (popular parts) section to avoid duplicates
         if group and "suosittuja" in group.lower():
@@ -47,7 +443,7 @@ def parse_categories(html: str) -> list[Category]:
             parent_cat = _parse_link(toggle, group)
             if parent_cat:
                 categories.append(parent_cat)
-                parent_name = parent_cat.title
+                parent_name = sys.intern(parent_cat.title)
             else:
                 parent_name = None
 
@@ -62,80 +458,123 @@ def parse_categories(html: str) -> list[Category]:
                     if cat:
                         categories.append(cat)
 
-    logger.debug(
-        "Parsed %d categories (%d active, %d inactive)",
-        len(categories),
-        sum(1 for c in categories if c.status == CategoryStatus.ACTIVE),
-        sum(1 for c in categories if c.status == CategoryStatus.INACTIVE),
-    )
     return categories
 
 
+def _xpath_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_CONTAINERS = etree.XPath(f"//div[@ngbdropdown and {_xpath_class('col-lg-4')}]")
+_SECTION = etree.XPath(f"ancestor::div[{_xpath_class('col-12')}][1]")
+_SECTION_HEADER = etree.XPath("(.//h4)[1]")
+_FIRST_LINK = etree.XPath('(.//a[@queryparamshandling="preserve" and not(@ngbdropdownitem)])[1]')
+_TOGGLE = etree.XPath("(.//a[@ngbdropdowntoggle])[1]")
+_ITEMS = etree.XPath(".//a[@ngbdropdownitem]")
+_SPAN = etree.XPath("(.//span)[1]")
+
+
+def _parse_categories_lxml(html: str) -> list[Category]:
+    try:
+        with span("parse.tree"):
+            root = lxml.html.document_fromstring(html)
+    except etree.ParserError:
+        # Raised for empty documents
+        return []
+    return _categories_from_tree(root)
+
+
+def _categories_from_tree(root: etree._Element) -> list[Category]:
+    categories: list[Category] = []
+    # Group headers are resolved once per div.col-12 section, not once per
+    # container. Headers and parent titles are interned so the categories of
+    # every poll share the same string objects.
+    headers: dict[etree._Element | None, str | None] = {}
+
+    with span("parse.select"):
+        containers = _CONTAINERS(root)
+
+    for container in containers:
+        sections = _SECTION(container)
+        section = sections[0] if sections else None
+        if section not in headers:
+            with span("parse.group_header"):
+                header = _section_header(section)
+            headers[section] = sys.intern(header) if header else header
+        group = headers[section]
+
+        # Skip the "Suosittuja osia" (popular parts) section to avoid duplicates
+        if group and "suosittuja" in group.lower():
+            continue
+
+        # Simple category link (not a dropdown)
+        links = _FIRST_LINK(container)
+        if links and links[0].get("ngbdropdowntoggle") is None:
+            cat = _parse_element(links[0], group)
+            if cat:
+                categories.append(cat)
+            continue
+
+        # Dropdown toggle parent, then its sub-items (skip "Kaikki")
+        toggles = _TOGGLE(container)
+        if toggles:
+            parent_cat = _parse_element(toggles[0], group)
+            parent_name = None
+            if parent_cat:
+                categories.append(parent_cat)
+                parent_name = sys.intern(parent_cat.title)
+
+            for item in _ITEMS(container):
+                if item.get("title", "") == "Kaikki":
+                    continue
+                cat = _parse_element(item, group, parent=parent_name)
+                if cat:
+                    categories.append(cat)
+
+    return categories
+
+
+def _element_text(el: etree._Element) -> str:
+    # Same as BeautifulSoup's get_text(strip=True)
+    return "".join(t.strip() for t in el.itertext())
+
+
+def _section_header(section: etree._Element | None) -> str | None:
+    if section is None:
+        return None
+    h4 = _SECTION_HEADER(section)
+    return _element_text(h4[0]) if h4 else None
+
+
+def _parse_element(
+    el: etree._Element, group: str | None, parent: str | None = None
+) -> Category | None:
+    spans = _SPAN(el)
+    name = _element_text(spans[0]) if spans else ""
+    if not name:
+        return None
+
+    classes = (el.get("class") or "").split()
+    return Category(
+        name=name,
+        title=el.get("title", name),
+        href=el.get("href", ""),
+        status=CategoryStatus.INACTIVE if "disabled-link" in classes else CategoryStatus.ACTIVE,
+        group=group,
+        parent=parent,
+    )
+
+
 def find_category(categories: list[Category], name: str) -> list[Category]:
-    parts = [p.strip() for p in name.split("/")]
-
-    if len(parts) == 3:
-        # Group / Parent / Child
-        group_s, parent_s, child_s = (p.lower() for p in parts)
-        return [
-            c
-            for c in categories
-            if c.group
-            and c.parent
-            and c.group.lower() == group_s
-            and c.parent.lower() == parent_s
-            and _name_matches(c, child_s)
-        ]
-
-    if len(parts) == 2:
-        first, second = parts[0].lower(), parts[1].lower()
-
-        # Try parent / child first
-        parent_child = [
-            c
-            for c in categories
-            if c.parent
-            and c.parent.lower() == first
-            and _name_matches(c, second)
-        ]
-        if parent_child:
-            return parent_child
-
-        # Try group / name
-        return [
-            c
-            for c in categories
-            if c.group
-            and c.group.lower() == first
-            and _name_matches(c, second)
-        ]
-
-    # Single name — exact match on title or name
-    name_lower = name.lower()
-    return [c for c in categories if _name_matches(c, name_lower)]
+    return CategoryIndex(categories).find(name)
 
 
 def suggest_categories(categories: list[Category], name: str) -> list[str]:
     """Return up to 5 category titles containing the search term as a substring."""
-    name_lower = name.lower()
-    suggestions: list[str] = []
-    for c in categories:
-        if name_lower in c.title.lower() or name_lower in c.name.lower():
-            label = f"{c.parent} / {c.title}" if c.parent else c.title
-            if c.group:
-                label += f"  ({c.group})"
-            if label not in suggestions:
-                suggestions.append(label)
-            if len(suggestions) >= 5:
-                break
-    return suggestions
-
+    return CategoryIndex(categories).suggest(name)
 
-def _name_matches(cat: Category, search: str) -> bool:
-    return cat.title.lower() == search or cat.name.lower() == search
 
-
-def _get_status(tag: Tag) -> CategoryStatus:
+def _get_status(tag: "Tag") -> CategoryStatus:
     classes = tag.get("class", [])
     if "disabled-link" in classes:
         return CategoryStatus.INACTIVE
@@ -143,7 +582,7 @@ def _get_status(tag: Tag) -> CategoryStatus:
 
 
 def _parse_link(
-    tag: Tag, group: str | None, parent: str | None = None
+    tag: "Tag", group: str | None, parent: str | None = None
 ) -> Category | None:
     span = tag.select_one("span")
     name = span.get_text(strip=True) if span else ""
@@ -163,7 +602,9 @@ def _parse_link(
     )
 
 
-def _find_group_header(container: Tag) -> str | None:
+def _find_group_header(container: "Tag") -> str | None:
+    from bs4 import Tag
+
     # Walk up to the parent div.col-12 and find its h4
     col12 = container.find_parent("div", class_="col-12")
     if col12 and isinstance(col12, Tag):
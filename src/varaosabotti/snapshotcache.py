@@ -0,0 +1,94 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from varaosabotti.models import CategorySnapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 600
+DEFAULT_MAX_ENTRIES = 100
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "varaosabotti"
+
+
+class SnapshotCache:
+    """Recently parsed pages kept as JSON files, one per URL.
+
+    Lets ``--list-categories`` and category validation reuse a parse from
+    a few minutes ago instead of fetching the page again. Entries older
+    than ``ttl`` seconds are ignored, and the least recently used files
+    beyond ``max_entries`` are deleted. Reading an entry needs neither
+    httpx nor a parser.
+    """
+
+    def __init__(
+        self, directory: str | Path, *, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}.json"
+
+    def get(self, url: str, *, now: float | None = None) -> CategorySnapshot | None:
+        """The snapshot cached for ``url`` if it is fresh enough, else None."""
+        if self.ttl <= 0:
+            return None
+        path = self.path(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.debug("Ignoring unreadable cache entry %s: %s", path, exc)
+            return None
+        now = time.time() if now is None else now
+        age = now - entry.get("fetched", 0)
+        if entry.get("url") != url or not 0 <= age < self.ttl:
+            return None
+        # The modification time records when an entry was last used, for eviction
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        logger.debug("Using categories of %s cached %.0fs ago", url, age)
+        return CategorySnapshot.from_dict(entry["snapshot"])
+
+    def put(self, url: str, snapshot: CategorySnapshot, *, now: float | None = None) -> None:
+        if self.ttl <= 0:
+            return
+        entry = {"url": url, "fetched": time.time() if now is None else now, "snapshot": snapshot.to_dict()}
+        path = self.path(url)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, so readers never see half a file
+            partial = path.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+            os.replace(partial, path)
+        except OSError as exc:
+            logger.warning("Could not write the category cache %s: %s", path, exc)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries beyond ``max_entries``."""
+        entries = []
+        # Another process may evict or replace an entry at any moment
+        for entry in self.directory.glob("*.json"):
+            with contextlib.suppress(OSError):
+                entries.append((entry.stat().st_mtime, entry))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _mtime, entry in entries[: len(entries) - self.max_entries]:
+            with contextlib.suppress(OSError):
+                entry.unlink()
+
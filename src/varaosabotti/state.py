@@ -0,0 +1,101 @@
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from varaosabotti.config import Watch
+from varaosabotti.models import CategorySnapshot
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    digest BLOB,
+    snapshot TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watches (
+    url TEXT NOT NULL,
+    category TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (url, category)
+);
+"""
+
+
+@dataclass(frozen=True)
+class StoredPage:
+    snapshot: CategorySnapshot
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: bytes | None = None
+
+
+class StateStore:
+    """Monitor state kept in SQLite, so restarts and ``--once`` runs pick up where they left off.
+
+    Holds the last snapshot and validators of each page and whether each
+    watch has already been notified. The database is opened on first use.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            logger.debug("Opened state store %s", self.path)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def load_page(self, url: str) -> StoredPage | None:
+        row = self.conn.execute(
+            "SELECT snapshot, etag, last_modified, digest FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        snapshot = CategorySnapshot.from_dict(json.loads(row[0]))
+        return StoredPage(snapshot=snapshot, etag=row[1], last_modified=row[2], digest=row[3])
+
+    def save_page(self, url: str, page: StoredPage) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, digest, snapshot, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                page.etag,
+                page.last_modified,
+                page.digest,
+                json.dumps(page.snapshot.to_dict(), separators=(",", ":")),
+                time.time(),
+            ),
+        )
+
+    def watch_active(self, watch: Watch) -> bool | None:
+        """Return whether the watch was active (and notified) last time, or None if never checked."""
+        row = self.conn.execute(
+            "SELECT active FROM watches WHERE url = ? AND category = ?", (watch.url, watch.category)
+        ).fetchone()
+        return None if row is None else bool(row[0])
+
+    def set_watch_active(self, watch: Watch, active: bool) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO watches (url, category, active, updated) VALUES (?, ?, ?, ?)",
+            (watch.url, watch.category, int(active), time.time()),
+        )
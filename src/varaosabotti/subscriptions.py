@@ -0,0 +1,163 @@
+import fnmatch
+import re
+from collections.abc import Iterable
+
+from varaosabotti.models import Category
+
+REGEX_PREFIX = "re:"
+_GLOB_CHARS = frozenset("*?[")
+# Inline flags, like groups, change meaning once patterns are joined into one alternation
+_INLINE_FLAGS = re.compile(r"\(\?-?[aiLmsux]")
+
+
+class SubscriptionError(ValueError):
+    pass
+
+
+def is_pattern(expression: str) -> bool:
+    """True for a regex or an expression with wildcards, which can match categories added later."""
+    return expression.startswith(REGEX_PREFIX) or not _GLOB_CHARS.isdisjoint(expression)
+
+
+def check_expression(expression: str) -> None:
+    """Raise ``SubscriptionError`` if ``expression`` is not a valid category expression."""
+    _parse(expression)
+
+
+def _parse(expression: str) -> list[str] | re.Pattern:
+    if expression.startswith(REGEX_PREFIX):
+        try:
+            return re.compile(expression.removeprefix(REGEX_PREFIX), re.IGNORECASE)
+        except re.error as exc:
+            raise SubscriptionError(f"Invalid regular expression in '{expression}': {exc}") from exc
+    segments = [s.strip().casefold() for s in expression.split("/")]
+    if len(segments) > 3 or not all(segments):
+        raise SubscriptionError(f"'{expression}' is not a name, 'parent / name' or 'group / parent / name'")
+    return segments
+
+
+class _Node:
+    __slots__ = ("children", "wildcard", "globs", "subscribers")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.wildcard: _Node | None = None
+        self.globs: list[tuple[re.Pattern, _Node]] = []
+        self.subscribers: list[int] = []
+
+    def insert(self, segments: list[str], subscriber: int) -> None:
+        node = self
+        for segment in segments:
+            if segment == "*":
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            elif _GLOB_CHARS.isdisjoint(segment):
+                node = node.children.setdefault(segment, _Node())
+            else:
+                pattern = re.compile(fnmatch.translate(segment))
+                for existing, child in node.globs:
+                    if existing.pattern == pattern.pattern:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.globs.append((pattern, child))
+                    node = child
+        node.subscribers.append(subscriber)
+
+    def walk(self, path: tuple[str, ...], found: list[int]) -> None:
+        """Append the subscribers of every pattern that matches ``path``."""
+        if not path:
+            found.extend(self.subscribers)
+            return
+        segment, rest = path[0], path[1:]
+        child = self.children.get(segment)
+        if child is not None:
+            child.walk(rest, found)
+        if self.wildcard is not None:
+            self.wildcard.walk(rest, found)
+        for pattern, child in self.globs:
+            if pattern.match(segment):
+                child.walk(rest, found)
+
+
+class SubscriptionMatcher:
+    """Many category expressions compiled together and matched in one pass over a page.
+
+    An expression is a name, ``parent / name`` or ``group / parent / name``
+    as with ``CategoryIndex.find``, where a segment may use shell wildcards
+    (``Oviverhoilu / *``, ``Sisusta / *``, ``Kattoverhoilu*``), or ``re:``
+    followed by a regular expression searched in category titles. Matching
+    is case-insensitive. Path expressions go into prefix trees keyed by
+    segment, one per path form, so each category costs a few dict lookups
+    however many expressions there are. Regular expressions are combined
+    into one alternation, and tested one by one only for titles it matches,
+    unless one of them has groups or inline flags, which don't survive being
+    joined.
+    """
+
+    def __init__(self, expressions: Iterable[str]) -> None:
+        self.expressions = list(dict.fromkeys(expressions))
+        self._names = _Node()
+        # A two-segment expression is parent / name, or group / name if that finds nothing
+        self._parent_names = _Node()
+        self._group_names = _Node()
+        self._paths = _Node()
+        self._regexes: list[tuple[int, re.Pattern]] = []
+
+        for i, expression in enumerate(self.expressions):
+            parsed = _parse(expression)
+            if isinstance(parsed, re.Pattern):
+                self._regexes.append((i, parsed))
+            elif len(parsed) == 1:
+                self._names.insert(parsed, i)
+            elif len(parsed) == 2:
+                self._parent_names.insert(parsed, i)
+                self._group_names.insert(parsed, i)
+            else:
+                self._paths.insert(parsed, i)
+        self._any_regex = (
+            re.compile("|".join(f"(?:{p.pattern})" for _i, p in self._regexes), re.IGNORECASE)
+            if self._regexes and all(_joinable(p) for _i, p in self._regexes)
+            else None
+        )
+
+    def match(self, categories: list[Category]) -> dict[str, list[Category]]:
+        """Every expression's matches, in page order."""
+        matches: list[list[Category]] = [[] for _ in self.expressions]
+        by_group: dict[int, list[Category]] = {}
+        for c in categories:
+            found: list[int] = []
+            in_group: list[int] = []
+            title = c.title.casefold()
+            parent = c.parent.casefold() if c.parent else None
+            group = c.group.casefold() if c.group else None
+            for key in (title, name) if (name := c.name.casefold()) != title else (title,):
+                self._names.walk((key,), found)
+                if parent:
+                    self._parent_names.walk((parent, key), found)
+                if group:
+                    self._group_names.walk((group, key), in_group)
+                if group and parent:
+                    self._paths.walk((group, parent, key), found)
+            if self._regexes and (self._any_regex is None or self._any_regex.search(c.title)):
+                found.extend(i for i, pattern in self._regexes if pattern.search(c.title))
+
+            for i in found:
+                # Title and name are often equal; keep each category once
+                if not matches[i] or matches[i][-1] is not c:
+                    matches[i].append(c)
+            for i in in_group:
+                group_matches = by_group.setdefault(i, [])
+                if not group_matches or group_matches[-1] is not c:
+                    group_matches.append(c)
+
+        for i, group_matches in by_group.items():
+            if not matches[i]:
+                matches[i] = group_matches
+        return dict(zip(self.expressions, matches))
+
+
+def _joinable(pattern: re.Pattern) -> bool:
+    return not pattern.groups and not _INLINE_FLAGS.search(pattern.pattern)
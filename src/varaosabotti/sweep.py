@@ -0,0 +1,128 @@
+import json
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, TextIO
+
+from varaosabotti.config import DEFAULT_PARSER
+from varaosabotti.models import Category, CategoryStatus, category_label
+from varaosabotti.subscriptions import SubscriptionMatcher
+
+# The CLI imports this module for its options; fetching pulls in httpx and the parser
+if TYPE_CHECKING:
+    import httpx
+
+    from varaosabotti.parsepool import ParsePool
+
+SWEEP_FORMATS = ("table", "jsonl")
+
+
+@dataclass
+class SweepResult:
+    url: str
+    seconds: float
+    matches: list[Category] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "error"
+        if not self.matches:
+            return "not found"
+        if any(m.status is CategoryStatus.ACTIVE for m in self.matches):
+            return "active"
+        return "inactive"
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "status": self.status,
+            "matches": [{"category": category_label(m), "status": m.status.value} for m in self.matches],
+            "latency_ms": round(self.seconds * 1000, 1),
+            "error": self.error,
+        }
+
+
+def read_urls(lines: Iterable[str]) -> list[str]:
+    """URLs one per line, skipping blank lines, ``#`` comments and repeats."""
+    urls = (line.split("#", 1)[0].strip() for line in lines)
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+async def sweep(
+    urls: list[str],
+    expression: str,
+    client: "httpx.AsyncClient",
+    *,
+    concurrency: int = 10,
+    backend: str = DEFAULT_PARSER,
+    pool: "ParsePool | None" = None,
+) -> AsyncIterator[SweepResult]:
+    """Look ``expression`` up on every page, yielding each result as soon as its page is done."""
+    import asyncio
+
+    import httpx
+
+    from varaosabotti.scraper import fetch_categories
+
+    matcher = SubscriptionMatcher([expression])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(url: str) -> SweepResult:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                categories = await fetch_categories(url, client, backend=backend, pool=pool)
+            except httpx.HTTPStatusError as exc:
+                return SweepResult(url, time.perf_counter() - started, error=f"HTTP {exc.response.status_code}")
+            except httpx.HTTPError as exc:
+                return SweepResult(url, time.perf_counter() - started, error=type(exc).__name__)
+            seconds = time.perf_counter() - started
+        return SweepResult(url, seconds, matcher.match(categories)[expression])
+
+    tasks = [asyncio.ensure_future(check(url)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class SweepPrinter:
+    """Writes sweep results as they arrive, as an aligned table or as JSON lines."""
+
+    def __init__(self, out: TextIO, output_format: str = "table") -> None:
+        if output_format not in SWEEP_FORMATS:
+            raise ValueError(f"Unknown sweep format: {output_format!r}")
+        self.out = out
+        self.format = output_format
+        self.results: list[SweepResult] = []
+
+    def header(self) -> None:
+        if self.format == "table":
+            self._write(f"{'status':<10} {'matches':>7} {'ms':>7}  url")
+
+    def add(self, result: SweepResult) -> None:
+        self.results.append(result)
+        if self.format == "jsonl":
+            self._write(json.dumps(result.to_dict(), ensure_ascii=False))
+            return
+        self._write(f"{result.status:<10} {len(result.matches):>7} {result.seconds * 1000:>7.0f}  {result.url}")
+        for m in result.matches:
+            marker = "+" if m.status is CategoryStatus.ACTIVE else "-"
+            self._write(f"{'':>28}[{marker}] {category_label(m)}")
+        if result.error:
+            self._write(f"{'':>28}{result.error}")
+
+    def summary(self) -> None:
+        if self.format == "table":
+            active = sum(1 for r in self.results if r.status == "active")
+            failed = sum(1 for r in self.results if r.status == "error")
+            self._write(f"\n{active} of {len(self.results)} page(s) have an active match ({failed} failed)")
+
+    def _write(self, line: str) -> None:
+        # Flushed per line, so results show up while slower pages are still loading
+        self.out.write(line + "\n")
+        self.out.flush()
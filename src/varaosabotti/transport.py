@@ -0,0 +1,366 @@
+import argparse
+import importlib.util
+import logging
+import os
+import zlib
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+# httpx is imported where it's used, so option parsing doesn't pay for it
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "varaosabotti/0.1.0"
+
+DEFAULT_HEADERS = {"User-Agent": USER_AGENT, "Accept-Language": "fi"}
+
+CONTENT_ENCODINGS = ("zstd", "br", "gzip", "deflate", "identity")
+
+
+class TransportError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Connection pool, timeout and per-host limit settings shared by every HTTP client."""
+
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 10.0
+    read_timeout: float = 30.0
+    # None means unlimited
+    per_host_concurrency: int | None = None
+    per_host_rate: float | None = None
+    # None means every encoding this install can decode
+    accept_encoding: tuple[str, ...] | None = None
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "TransportConfig":
+        return cls(
+            max_connections=args.max_connections,
+            max_keepalive=args.max_keepalive,
+            keepalive_expiry=args.keepalive_expiry,
+            http2=args.http2,
+            connect_timeout=args.connect_timeout,
+            read_timeout=args.read_timeout,
+            per_host_concurrency=args.per_host_concurrency,
+            per_host_rate=args.per_host_rate,
+            accept_encoding=args.accept_encoding,
+        )
+
+    def validate(self) -> None:
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            raise TransportError("HTTP/2 needs the 'h2' package (uv pip install h2)")
+        if self.per_host_concurrency is not None and self.per_host_concurrency < 1:
+            raise TransportError("Per-host concurrency must be at least 1")
+        if self.per_host_rate is not None and self.per_host_rate <= 0:
+            raise TransportError("Per-host rate must be positive")
+        for encoding in self.accept_encoding or ():
+            if encoding not in CONTENT_ENCODINGS:
+                raise TransportError(f"Unknown content encoding: {encoding!r}")
+            if encoding not in available_encodings():
+                raise TransportError(f"No decoder installed for {encoding!r} responses")
+
+    def encodings(self) -> tuple[str, ...]:
+        return self.accept_encoding or available_encodings()
+
+    def client_options(self) -> dict:
+        import httpx
+
+        return {
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "http2": self.http2,
+            "headers": {**DEFAULT_HEADERS, "Accept-Encoding": ", ".join(self.encodings())},
+            "follow_redirects": True,
+        }
+
+
+def add_transport_arguments(parser: argparse.ArgumentParser) -> None:
+    env = os.environ.get
+    defaults = TransportConfig()
+    group = parser.add_argument_group("HTTP transport")
+    group.add_argument(
+        "--max-connections",
+        type=int,
+        default=int(env("VARAOSABOTTI_MAX_CONNECTIONS", defaults.max_connections)),
+        help=f"Connection pool size (default: {defaults.max_connections}, env: VARAOSABOTTI_MAX_CONNECTIONS)",
+    )
+    group.add_argument(
+        "--max-keepalive",
+        type=int,
+        default=int(env("VARAOSABOTTI_MAX_KEEPALIVE", defaults.max_keepalive)),
+        help=f"Idle connections kept open (default: {defaults.max_keepalive}, env: VARAOSABOTTI_MAX_KEEPALIVE)",
+    )
+    group.add_argument(
+        "--keepalive-expiry",
+        type=float,
+        default=float(env("VARAOSABOTTI_KEEPALIVE_EXPIRY", defaults.keepalive_expiry)),
+        help="Seconds an idle connection is kept open "
+        f"(default: {defaults.keepalive_expiry:g}, env: VARAOSABOTTI_KEEPALIVE_EXPIRY)",
+    )
+    group.add_argument(
+        "--http2",
+        action="store_true",
+        default=env("VARAOSABOTTI_HTTP2", "") not in ("", "0"),
+        help="Multiplex requests over HTTP/2 (needs the h2 package, env: VARAOSABOTTI_HTTP2)",
+    )
+    group.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=float(env("VARAOSABOTTI_CONNECT_TIMEOUT", defaults.connect_timeout)),
+        help=f"Connect timeout in seconds (default: {defaults.connect_timeout:g}, env: VARAOSABOTTI_CONNECT_TIMEOUT)",
+    )
+    group.add_argument(
+        "--read-timeout",
+        type=float,
+        default=float(env("VARAOSABOTTI_READ_TIMEOUT", defaults.read_timeout)),
+        help=f"Read timeout in seconds (default: {defaults.read_timeout:g}, env: VARAOSABOTTI_READ_TIMEOUT)",
+    )
+    group.add_argument(
+        "--per-host-concurrency",
+        type=int,
+        default=_optional(env("VARAOSABOTTI_PER_HOST_CONCURRENCY"), int),
+        help="Maximum requests in flight to one host (env: VARAOSABOTTI_PER_HOST_CONCURRENCY)",
+    )
+    group.add_argument(
+        "--per-host-rate",
+        type=float,
+        default=_optional(env("VARAOSABOTTI_PER_HOST_RATE"), float),
+        help="Maximum requests per second to one host (env: VARAOSABOTTI_PER_HOST_RATE)",
+    )
+    group.add_argument(
+        "--accept-encoding",
+        type=_encoding_list,
+        default=_optional(env("VARAOSABOTTI_ACCEPT_ENCODING"), _encoding_list),
+        metavar="LIST",
+        help="Comma-separated content encodings to offer, e.g. 'gzip' or 'identity' "
+        f"(default: {', '.join(available_encodings())}, env: VARAOSABOTTI_ACCEPT_ENCODING)",
+    )
+
+
+def _optional[T](value: str | None, convert: Callable[[str], T]) -> T | None:
+    return convert(value) if value else None
+
+
+def _encoding_list(value: str) -> tuple[str, ...]:
+    return tuple(e.strip().lower() for e in value.split(",") if e.strip())
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Content encodings this install can decode, most compact first."""
+    encodings = []
+    if importlib.util.find_spec("zstandard") is not None:
+        encodings.append("zstd")
+    if importlib.util.find_spec("brotli") is not None or importlib.util.find_spec("brotlicffi") is not None:
+        encodings.append("br")
+    return (*encodings, "gzip", "deflate", "identity")
+
+
+def create_client(config: TransportConfig) -> "httpx.Client":
+    import httpx
+
+    return httpx.Client(**config.client_options())
+
+
+def create_async_client(config: TransportConfig, *, host_limits: bool = True) -> "httpx.AsyncClient":
+    """Create an async client; per-host limits apply unless ``host_limits`` is False."""
+    import httpx
+
+    from varaosabotti.hostlimits import HostLimitedTransport
+
+    options = config.client_options()
+    if host_limits and (config.per_host_concurrency or config.per_host_rate):
+        inner = httpx.AsyncHTTPTransport(limits=options.pop("limits"), http2=options.pop("http2"))
+        options["transport"] = HostLimitedTransport(
+            inner, concurrency=config.per_host_concurrency, rate=config.per_host_rate
+        )
+    return httpx.AsyncClient(**options)
+
+
+class ContentDecoder:
+    """Undoes a response's ``Content-Encoding`` chunk by chunk.
+
+    The fetch layer reads raw bytes and decodes them itself, so that wire size
+    and decode time can be measured separately from parsing.
+    """
+
+    def __init__(self, content_encoding: str | None) -> None:
+        codings = [c.strip().lower() for c in (content_encoding or "").split(",") if c.strip()]
+        # Codings are listed in the order they were applied
+        self._decoders = [_decoder(c) for c in reversed(codings) if c != "identity"]
+
+    def decode(self, data: bytes) -> bytes:
+        try:
+            for decoder in self._decoders:
+                data = decoder.decompress(data)
+        except Exception as exc:
+            # zlib, brotli and zstandard each raise their own error types
+            raise _decoding_error(str(exc)) from exc
+        return data
+
+    def flush(self) -> bytes:
+        data = b""
+        try:
+            for decoder in self._decoders:
+                data = decoder.decompress(data) + decoder.flush()
+        except Exception as exc:
+            raise _decoding_error(str(exc)) from exc
+        return data
+
+
+def _decoding_error(message: str) -> Exception:
+    import httpx
+
+    return httpx.DecodingError(message)
+
+
+def _decoder(coding: str):
+    if coding == "gzip":
+        return zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if coding == "deflate":
+        return _DeflateDecoder()
+    if coding == "br":
+        return _BrotliDecoder()
+    if coding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise _decoding_error(f"Unsupported content encoding: {coding!r}")
+
+
+class _DeflateDecoder:
+    """'deflate' is sent both zlib-wrapped and raw; try the former first."""
+
+    def __init__(self) -> None:
+        self._first = True
+        self._obj = zlib.decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        first, self._first = self._first, False
+        try:
+            return self._obj.decompress(data)
+        except zlib.error:
+            if not first:
+                raise
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliDecoder:
+    def __init__(self) -> None:
+        try:
+            import brotli
+
+            self.decompress = brotli.Decompressor().process
+        except ImportError:
+            import brotlicffi
+
+            self.decompress = brotlicffi.Decompressor().decompress
+
+    def flush(self) -> bytes:
+        return b""
+
+
+@dataclass(slots=True)
+class TransferSample:
+    """What one fetch cost: bytes on the wire and after decoding, and time spent on each."""
+
+    url: str
+    status_code: int | None = None
+    encoding: str = "identity"
+    wire_bytes: int = 0
+    body_bytes: int = 0
+    decode_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    parsed: bool = False
+
+
+@dataclass
+class TransferTotals:
+    requests: int = 0
+    parses: int = 0
+    wire_bytes: int = 0
+    body_bytes: int = 0
+    decode_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    encodings: Counter[str] = field(default_factory=Counter)
+
+    def add(self, sample: TransferSample) -> None:
+        self.requests += 1
+        self.parses += sample.parsed
+        self.wire_bytes += sample.wire_bytes
+        self.body_bytes += sample.body_bytes
+        self.decode_seconds += sample.decode_seconds
+        self.parse_seconds += sample.parse_seconds
+        if sample.body_bytes:
+            self.encodings[sample.encoding] += 1
+
+    def describe(self) -> str:
+        saved = 1 - self.wire_bytes / self.body_bytes if self.body_bytes else 0.0
+        encodings = ", ".join(f"{e} x{n}" for e, n in self.encodings.most_common()) or "no bodies"
+        return (
+            f"{self.requests} request(s), {_format_bytes(self.wire_bytes)} on the wire, "
+            f"{_format_bytes(self.body_bytes)} decoded ({saved:.0%} saved; {encodings}), "
+            f"decode {self.decode_seconds * 1000:.1f} ms, "
+            f"{self.parses} parse(s) in {self.parse_seconds * 1000:.1f} ms"
+        )
+
+
+class TransferLog:
+    """Per-URL totals of the ``TransferSample`` of every fetch."""
+
+    def __init__(self) -> None:
+        self.pages: dict[str, TransferTotals] = {}
+        self.latest: dict[str, TransferSample] = {}
+
+    def record(self, sample: TransferSample) -> None:
+        self.latest[sample.url] = sample
+        totals = self.pages.get(sample.url)
+        if totals is None:
+            totals = self.pages[sample.url] = TransferTotals()
+        totals.add(sample)
+        logger.debug(
+            "Fetched %s (%s): %s on the wire, %s %s in %.1f ms, parsed in %.1f ms",
+            sample.url,
+            sample.status_code,
+            _format_bytes(sample.wire_bytes),
+            _format_bytes(sample.body_bytes),
+            sample.encoding,
+            sample.decode_seconds * 1000,
+            sample.parse_seconds * 1000,
+        )
+
+    def total(self) -> TransferTotals:
+        total = TransferTotals()
+        for totals in self.pages.values():
+            total.requests += totals.requests
+            total.parses += totals.parses
+            total.wire_bytes += totals.wire_bytes
+            total.body_bytes += totals.body_bytes
+            total.decode_seconds += totals.decode_seconds
+            total.parse_seconds += totals.parse_seconds
+            total.encodings.update(totals.encodings)
+        return total
+
+
+def _format_bytes(n: int) -> str:
+    if n < 1024:
+        return f"{n} B"
+    if n < 1024 * 1024:
+        return f"{n / 1024:.1f} KiB"
+    return f"{n / (1024 * 1024):.1f} MiB"
@@ -0,0 +1,110 @@
+import logging
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+
+from varaosabotti.events import CategoryKey, category_key
+from varaosabotti.models import Category, CategoryStatus
+
+logger = logging.getLogger(__name__)
+
+_CLASS = re.compile(rb'\sclass="([^"]*)"')
+
+
+@dataclass(frozen=True, slots=True)
+class _Target:
+    position: int
+    href: str
+    title: str
+
+
+class WatchPlan:
+    """Where a page's watched categories are, so a poll can read just their status.
+
+    Built from a full parse. Each watched category is found again by its
+    ``href`` and ``title`` attributes with a byte search over the raw body,
+    and its status read from the anchor's class, which costs a tiny fraction
+    of parsing the whole page. When an anchor is missing, or its copies on
+    the page disagree, ``apply`` gives up and the page has to be parsed.
+    """
+
+    def __init__(self, categories: list[Category], targets: list[_Target]) -> None:
+        self.categories = categories
+        self._targets = targets
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, categories: list[Category], keys: Iterable[CategoryKey]) -> "WatchPlan | None":
+        """Plan the watched ``keys`` of a page, or None if they can't be told apart by their anchors."""
+        wanted = set(keys)
+        if not wanted:
+            return None
+        positions: dict[CategoryKey, int] = {}
+        anchors: dict[tuple[str, str], int] = {}
+        for i, c in enumerate(categories):
+            anchors[c.href, c.title] = anchors.get((c.href, c.title), 0) + 1
+            if category_key(c) in wanted:
+                positions[category_key(c)] = i
+        if len(positions) != len(wanted):
+            return None
+        targets = []
+        for i in positions.values():
+            c = categories[i]
+            # Another category behind the same anchor would be indistinguishable
+            if not c.href or anchors[c.href, c.title] > 1:
+                return None
+            targets.append(_Target(i, _attribute("href", c.href), _attribute("title", c.title)))
+        return cls(categories, targets)
+
+    def apply(self, body: bytes, encoding: str, categories: list[Category]) -> list[Category] | None:
+        """Return ``categories`` with the watched statuses read from ``body``.
+
+        The list is returned as is when no watched status changed, and a
+        patched copy when one did. None means the plan no longer matches the
+        page. Statuses of unwatched categories are left as they were.
+        """
+        if categories is not self.categories:
+            return None
+        patched: list[Category] | None = None
+        for target in self._targets:
+            status = _scan(
+                body,
+                target.href.encode(encoding, "xmlcharrefreplace"),
+                target.title.encode(encoding, "xmlcharrefreplace"),
+            )
+            if status is None:
+                self.misses += 1
+                logger.debug("Watch plan no longer matches (%d hits, %d misses)", self.hits, self.misses)
+                return None
+            if status is not categories[target.position].status:
+                if patched is None:
+                    patched = list(categories)
+                patched[target.position] = replace(categories[target.position], status=status)
+        self.hits += 1
+        return categories if patched is None else patched
+
+
+def _attribute(name: str, value: str) -> str:
+    # Serialised the way Angular's server renderer writes attributes
+    escaped = value.replace("&", "&amp;").replace('"', "&quot;")
+    return f'{name}="{escaped}"'
+
+
+def _scan(body: bytes, href: bytes, title: bytes) -> CategoryStatus | None:
+    """The status of every ``<a>`` with this href and title, or None if none or they disagree."""
+    status = None
+    pos = body.find(href)
+    while pos != -1:
+        start = body.rfind(b"<", 0, pos)
+        end = body.find(b">", pos)
+        tag = body[start:end]
+        if tag[:2] == b"<a" and tag[2:3].isspace() and title in tag:
+            match = _CLASS.search(tag)
+            disabled = match is not None and b"disabled-link" in match.group(1).split()
+            found = CategoryStatus.INACTIVE if disabled else CategoryStatus.ACTIVE
+            if status is not None and found is not status:
+                return None
+            status = found
+        pos = body.find(href, pos + len(href))
+    return status
@@ -40,6 +40,12 @@ SAMPLE_HTML = """\
 """
 
 
+@pytest.fixture(autouse=True)
+def _snapshot_cache_dir(tmp_path, monkeypatch):
+    # Keep the CLI's category cache out of the home directory and apart per test
+    monkeypatch.setenv("VARAOSABOTTI_CACHE_DIR", str(tmp_path / "cache"))
+
+
 @pytest.fixture
 def sample_html():
     return SAMPLE_HTML
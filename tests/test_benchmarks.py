@@ -0,0 +1,32 @@
+from benchmarks.pages import PageSpec, generate_page
+from benchmarks.run import compare, main
+from varaosabotti.models import CategoryStatus
+from varaosabotti.scraper import parse_categories
+
+
+def _described(categories):
+    return [(c.group, c.parent, c.title, c.status == CategoryStatus.ACTIVE) for c in categories]
+
+
+def test_generated_page_parses_as_described():
+    page = generate_page(PageSpec(groups=3, containers_per_group=5, dropdown_ratio=0.5, seed=1))
+    assert _described(parse_categories(page.html)) == page.categories
+    assert _described(parse_categories(page.html, "bs4")) == page.categories
+
+
+def test_spec_for_size():
+    for size in (10, 1000):
+        page = generate_page(PageSpec.for_size(size, noise_kib=1))
+        assert 0.5 * size < len(page) < 2 * size
+
+
+def test_compare_flags_regressions():
+    baseline = [{"name": "parse/lxml", "categories": 10, "parses_per_sec": 100.0}]
+    assert compare([{"name": "parse/lxml", "categories": 10, "parses_per_sec": 85.0}], baseline, 0.2) == []
+    assert compare([{"name": "parse/lxml", "categories": 10, "parses_per_sec": 70.0}], baseline, 0.2)
+
+
+def test_main_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+    assert main(["--sizes", "10", "--min-time", "0", "--output", str(output)]) == 0
+    assert main(["--sizes", "10", "--min-time", "0", "--compare", str(output), "--tolerance", "1"]) == 0
@@ -0,0 +1,102 @@
+import logging
+
+import pytest
+
+from varaosabotti.cli import build_parser, list_categories, main, run_monitor
+from varaosabotti.config import Watch
+from varaosabotti.snapshotcache import SnapshotCache
+
+URL_A = "https://example.com/a"
+URL_B = "https://example.com/b"
+
+
+def _args(**overrides):
+    args = build_parser().parse_args(["--once"])
+    vars(args).update(overrides)
+    return args
+
+
+def test_run_monitor_shares_fetch_per_url(httpx_mock, sample_html, caplog):
+    httpx_mock.add_response(url=URL_A, text=sample_html)
+    httpx_mock.add_response(url=URL_B, text=sample_html)
+    watches = [
+        Watch(url=URL_A, category="Active Simple"),
+        Watch(url=URL_A, category="Child Inactive"),
+        Watch(url=URL_B, category="Parent Toggle / Child Active"),
+    ]
+    with caplog.at_level(logging.INFO):
+        run_monitor(_args(), watches)
+
+    # One validation fetch per page, reused for the first iteration
+    assert [str(r.url) for r in httpx_mock.get_requests()] == [URL_A, URL_B]
+    assert caplog.text.count("ALERT") == 2
+    assert "Still inactive: Parent Toggle / Child Inactive" in caplog.text
+
+
+def test_run_monitor_exits_on_unknown_category(httpx_mock, sample_html, caplog):
+    httpx_mock.add_response(url=URL_A, text=sample_html)
+    watches = [
+        Watch(url=URL_A, category="Active Simple"),
+        Watch(url=URL_A, category="Child"),
+    ]
+    with caplog.at_level(logging.ERROR), pytest.raises(SystemExit):
+        run_monitor(_args(), watches)
+    assert "Category 'Child' not found" in caplog.text
+    assert "Did you mean" in caplog.text
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tracemalloc"])
+def test_profile_writes_report(httpx_mock, sample_html, tmp_path, mode):
+    httpx_mock.add_response(url=URL_A, text=sample_html, is_reusable=True)
+    output = tmp_path / "profile.txt"
+    run_monitor(
+        _args(profile=3, profile_mode=mode, profile_output=str(output), parser="bs4"),
+        [Watch(url=URL_A, category="Active Simple")],
+    )
+    report = output.read_text()
+    assert f"Profile of 3 cycle(s) ({mode})" in report
+    for stage in ("parse.soup", "parse.select", "parse.group_header", "find_category", "decode"):
+        assert stage in report
+    # Validation plus two more cycles; the first cycle reuses the validation parse
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_profile_leaves_state_alone(httpx_mock, sample_html, tmp_path, caplog):
+    """A profiled run sends no alerts, so the next real run still alerts."""
+    httpx_mock.add_response(url=URL_A, text=sample_html, is_reusable=True)
+    watches = [Watch(url=URL_A, category="Active Simple")]
+    state = str(tmp_path / "state.db")
+    run_monitor(_args(profile=1, profile_output=str(tmp_path / "profile.txt"), state=state), watches)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        run_monitor(_args(state=state), watches)
+    assert caplog.text.count("ALERT: 'Active Simple") == 1
+
+
+def test_list_categories_uses_cache(httpx_mock, sample_html, tmp_path, capsys):
+    httpx_mock.add_response(url=URL_A, text=sample_html)
+    cache = SnapshotCache(tmp_path, ttl=60)
+    list_categories(URL_A, cache=cache)
+    first = capsys.readouterr().out
+    list_categories(URL_A, cache=cache)
+    assert capsys.readouterr().out == first
+    assert "Total: 5 categories (3 active, 2 inactive)" in first
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_failed_validation_is_cached_for_the_next_run(httpx_mock, sample_html, caplog):
+    httpx_mock.add_response(url=URL_A, text=sample_html)
+    for category in ("Child", "Chlid Active"):
+        with caplog.at_level(logging.ERROR), pytest.raises(SystemExit):
+            run_monitor(_args(), [Watch(url=URL_A, category=category)])
+    assert "Category 'Chlid Active' not found" in caplog.text
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_max_concurrency_must_be_positive(monkeypatch, capsys, value):
+    monkeypatch.setattr("sys.argv", ["varaosabotti", "--url", URL_A, "--category", "X", "--max-concurrency", value])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    assert "--max-concurrency must be at least 1" in capsys.readouterr().err
@@ -0,0 +1,100 @@
+import pytest
+
+from varaosabotti.config import ConfigError, Watch, group_by_url, load_watches
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "watches.toml"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_load_watches(tmp_path):
+    path = _write(
+        tmp_path,
+        """
+[[watch]]
+url = "https://example.com/a"
+category = "Kattoverhoilu"
+
+[[watch]]
+url = "https://example.com/b"
+category = "Oviverhoilu / Vasen"
+""",
+    )
+    assert load_watches(path) == [
+        Watch(url="https://example.com/a", category="Kattoverhoilu"),
+        Watch(url="https://example.com/b", category="Oviverhoilu / Vasen"),
+    ]
+
+
+def test_load_watches_default_url(tmp_path):
+    path = _write(
+        tmp_path,
+        """
+url = "https://example.com/a"
+
+[[watch]]
+category = "Kattoverhoilu"
+
+[[watch]]
+category = "Hattuhylly"
+""",
+    )
+    assert [w.url for w in load_watches(path)] == ["https://example.com/a"] * 2
+
+
+def test_load_watches_drops_duplicates(tmp_path):
+    path = _write(
+        tmp_path,
+        """
+[[watch]]
+url = "https://example.com/a"
+category = "X"
+
+[[watch]]
+url = "https://example.com/a"
+category = "X"
+""",
+    )
+    assert len(load_watches(path)) == 1
+
+
+def test_load_watches_missing_category(tmp_path):
+    path = _write(tmp_path, '[[watch]]\nurl = "https://example.com/a"\n')
+    with pytest.raises(ConfigError, match="missing 'category'"):
+        load_watches(path)
+
+
+def test_load_watches_entry_not_a_table(tmp_path):
+    config = _write(tmp_path, 'watch = [{ url = "https://example.com/a", category = "A" }, "B"]\n')
+    with pytest.raises(ConfigError, match="Watch #2 .*not a table"):
+        load_watches(config)
+
+
+def test_load_watches_no_entries(tmp_path):
+    with pytest.raises(ConfigError, match="no \\[\\[watch\\]\\]"):
+        load_watches(_write(tmp_path, 'url = "https://example.com/a"\n'))
+
+
+def test_load_watches_invalid_toml(tmp_path):
+    with pytest.raises(ConfigError, match="Invalid config"):
+        load_watches(_write(tmp_path, "[[watch]\n"))
+
+
+def test_load_watches_missing_file(tmp_path):
+    with pytest.raises(ConfigError, match="Cannot read"):
+        load_watches(tmp_path / "nope.toml")
+
+
+def test_group_by_url():
+    a1 = Watch(url="a", category="1")
+    b1 = Watch(url="b", category="1")
+    a2 = Watch(url="a", category="2")
+    assert group_by_url([a1, b1, a2]) == {"a": [a1, a2], "b": [b1]}
+
+
+def test_load_watches_invalid_pattern(tmp_path):
+    path = _write(tmp_path, '[[watch]]\nurl = "https://example.com/a"\ncategory = "re:(("\n')
+    with pytest.raises(ConfigError, match="Watch #1 .*Invalid regular expression"):
+        load_watches(path)
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import stat
+
+import httpx
+import pytest
+
+from varaosabotti.cli import build_parser, control
+from varaosabotti.config import Watch
+from varaosabotti.control import ControlError, ControlServer, send_command
+from varaosabotti.engine import Monitor
+from varaosabotti.models import CategorySnapshot
+
+URL = "https://example.com/a"
+
+
+def _daemon(socket_path, script, watches=()):
+    """Run a daemon, watchless by default, call ``script(send)`` from a thread and return its result."""
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor(list(watches), client, interval=3600, jitter=0)
+            async with ControlServer(monitor, str(socket_path)):
+                runner = asyncio.create_task(monitor.run(forever=True))
+                result = await asyncio.to_thread(script, lambda **request: send_command(str(socket_path), request))
+                monitor.stop()
+                await asyncio.wait_for(runner, 5)
+            return result
+
+    return asyncio.run(main())
+
+
+def test_add_list_remove(httpx_mock, sample_html, tmp_path):
+    httpx_mock.add_response(url=URL, text=sample_html, is_reusable=True)
+
+    def script(send):
+        return [
+            send(command="add", url=URL, category="Active Simple"),
+            send(command="add", url=URL, category="Active Simple"),
+            send(command="add", url=URL, category="Child"),
+            send(command="add", url=URL, category="Parent Toggle / Child Inactive", interval=60),
+            send(command="list"),
+            send(command="dump"),
+            send(command="remove", url=URL, category="Active Simple"),
+            send(command="remove", url=URL, category="Active Simple"),
+            send(command="list"),
+        ]
+
+    added, duplicate, missing, child, listed, dump, removed, gone, remaining = _daemon(tmp_path / "ctl.sock", script)
+    assert added == {"ok": True, "matches": ["Active Simple  (Test Group)"]}
+    assert duplicate["ok"] is False and "Already watching" in duplicate["error"]
+    assert missing["ok"] is False
+    assert "Child Active" in " ".join(missing["suggestions"])
+    assert child["matches"] == ["Parent Toggle / Child Inactive  (Test Group)"]
+    assert [(w["category"], w["active"]) for w in listed["watches"]] == [
+        ("Active Simple", True),
+        ("Parent Toggle / Child Inactive", False),
+    ]
+    assert dump["pages"][URL]["interval"] == 60
+    assert dump["pages"][URL]["categories"] == 5
+    assert removed == {"ok": True}
+    assert gone["ok"] is False
+    assert [w["category"] for w in remaining["watches"]] == ["Parent Toggle / Child Inactive"]
+    # A second watch on a page already polled reuses its parse
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_add_rejects_invalid_watches(httpx_mock, tmp_path):
+    def script(send):
+        return [
+            send(command="add", url=URL, category="Active Simple", interval=interval)
+            for interval in (-1, 0, "60", True, 1.5)
+        ] + [send(command="add", url=URL, category="re:(("), send(command="add", url=URL, category="")]
+
+    replies = _daemon(tmp_path / "ctl.sock", script)
+    assert all(reply["ok"] is False for reply in replies)
+    assert "'interval' must be" in replies[0]["error"]
+    assert "Invalid regular expression" in replies[-2]["error"]
+    # Rejected before the page is fetched
+    assert not httpx_mock.get_requests()
+
+
+def test_watches_are_named_by_url_and_category(httpx_mock, sample_html, tmp_path):
+    """A config watch with an interval is found by the url and category alone."""
+    httpx_mock.add_response(url=URL, text=sample_html, is_reusable=True)
+
+    def script(send):
+        return [
+            send(command="add", url=URL, category="Active Simple"),
+            send(command="remove", url=URL, category="Active Simple"),
+            send(command="list"),
+        ]
+
+    duplicate, removed, listed = _daemon(
+        tmp_path / "ctl.sock", script, [Watch(url=URL, category="Active Simple", interval=60)]
+    )
+    assert duplicate["ok"] is False and "Already watching" in duplicate["error"]
+    assert removed == {"ok": True}
+    assert listed["watches"] == []
+
+
+def test_check_and_categories(httpx_mock, sample_html, tmp_path):
+    httpx_mock.add_response(url=URL, text=sample_html, is_reusable=True)
+
+    def script(send):
+        return [
+            send(command="categories", url=URL),
+            send(command="check", url=URL),
+            send(command="add", url=URL, category="Active Simple"),
+            send(command="check"),
+            send(command="nope"),
+        ]
+
+    categories, unknown_page, _added, checked, unknown = _daemon(tmp_path / "ctl.sock", script)
+    assert categories["ok"] is True
+    assert categories["source"] == "fetch"
+    assert categories["snapshot"]["titles"][:2] == ["Active Simple", "Inactive Simple"]
+    assert unknown_page["ok"] is False
+    assert checked["pages"][URL]["ok"] is True
+    assert unknown["ok"] is False and "Unknown command" in unknown["error"]
+
+
+def test_categories_of_a_fast_path_page_are_fetched(httpx_mock, sample_html, tmp_path):
+    """Polls through a watch plan leave unwatched statuses stale, so they aren't reported."""
+    child_active = sample_html.replace(
+        'class="my-2 disabled-link text-danger" href="/child-i"', 'class="my-2" href="/child-i"'
+    )
+    for html in (sample_html, child_active, child_active):
+        httpx_mock.add_response(url=URL, text=html)
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor([Watch(url=URL, category="Active Simple")], client, interval=60, fast_path=True)
+            await monitor.check_page(URL)
+            await monitor.check_page(URL)
+            server = ControlServer(monitor, str(tmp_path / "ctl.sock"))
+            return await server.dispatch({"command": "categories", "url": URL})
+
+    reply = asyncio.run(main())
+    assert reply["source"] == "fetch"
+    snapshot = CategorySnapshot.from_dict(reply["snapshot"])
+    assert snapshot.active_count == 4
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_stop_without_daemon_mode(httpx_mock, sample_html, tmp_path):
+    httpx_mock.add_response(url=URL, text=sample_html, is_reusable=True)
+    socket_path = str(tmp_path / "ctl.sock")
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor([Watch(url=URL, category="Active Simple")], client, interval=3600, jitter=0)
+            async with ControlServer(monitor, socket_path):
+                runner = asyncio.create_task(monitor.run())
+                reply = await asyncio.to_thread(send_command, socket_path, {"command": "stop"})
+                await asyncio.wait_for(runner, 5)
+            return reply
+
+    assert asyncio.run(main()) == {"ok": True}
+
+
+def test_malformed_requests_get_a_reply(tmp_path):
+    socket_path = str(tmp_path / "ctl.sock")
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            async with ControlServer(Monitor([], client, interval=60), socket_path):
+                reader, writer = await asyncio.open_unix_connection(socket_path)
+                replies = []
+                for line in (b"not json\n", b"\xff\xfe\n"):
+                    writer.write(line)
+                    replies.append(json.loads(await reader.readline()))
+                writer.close()
+                await writer.wait_closed()
+                return replies
+
+    assert asyncio.run(main()) == [{"ok": False, "error": "Request is not valid JSON"}] * 2
+
+
+def test_socket_is_private_and_removed(tmp_path):
+    path = tmp_path / "ctl.sock"
+    # Left behind by a daemon that was killed
+    path.touch()
+
+    async def main():
+        async with httpx.AsyncClient() as client:
+            async with ControlServer(Monitor([], client, interval=60), str(path)):
+                return stat.S_IMODE(os.stat(path).st_mode)
+
+    assert asyncio.run(main()) == 0o600
+    assert not path.exists()
+
+
+def test_send_command_without_daemon(tmp_path):
+    with pytest.raises(ControlError, match="Cannot reach the daemon"):
+        send_command(str(tmp_path / "missing.sock"), {"command": "list"})
+
+
+def test_ctl_without_daemon_exits_nonzero(tmp_path, capsys):
+    args = build_parser().parse_args(["--control-socket", str(tmp_path / "missing.sock"), "--ctl", "list"])
+    assert control(args) == 1
+    assert "Cannot reach the daemon" in capsys.readouterr().err
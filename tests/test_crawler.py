@@ -0,0 +1,143 @@
+import asyncio
+import csv
+import io
+import re
+
+import httpx
+import pytest
+
+from varaosabotti.cli import build_parser, run_crawl
+from varaosabotti.crawler import CrawlCheckpoint, Crawler, normalize_url, write_catalog
+from varaosabotti.transport import TransportConfig
+
+HOST = "https://www.example.com"
+START = f"{HOST}/fi-fi/pb/Hae/Autonosat/s19/Polestar/2"
+
+
+def _page(group, links):
+    items = "".join(
+        f'<div ngbdropdown class="col-lg-4 col-sm-12 my-1"><a queryparamshandling="preserve" '
+        f'class="my-2{"" if active else " disabled-link"}" href="{href}" title="{title}">'
+        f"<span>{title}</span></a></div>"
+        for title, href, active in links
+    )
+    return f'<html><body><div class="col-12"><h4>{group}</h4>{items}</div></body></html>'
+
+
+# A make/model page, two category pages (one reached by three spellings) and leaf pages
+SITE = {
+    "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2": _page(
+        "Polestar 2",
+        [
+            ("Sisusta", "2/Sisusta", True),
+            ("Kori", "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Kori/", True),
+            ("Kori uudestaan", f"{HOST.upper()}:443/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Kori#top", True),
+            ("Moottori", "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Moottori", False),
+            ("Muualla", "https://elsewhere.example.com/osa", True),
+            ("Puuttuu", "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Puuttuu", True),
+        ],
+    ),
+    "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Sisusta": _page(
+        "Sisusta",
+        [("Kattoverhoilu", "Sisusta/Kattoverhoilu", True), ("Hattuhylly", "Sisusta/Hattuhylly", False)],
+    ),
+    "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Kori": _page("Kori", [("Puskuri", "Kori/Puskuri", True)]),
+    "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Sisusta/Kattoverhoilu": _page("Kattoverhoilu", []),
+    "/fi-fi/pb/Hae/Autonosat/s19/Polestar/2/Kori/Puskuri": _page("Puskuri", []),
+}
+
+
+@pytest.fixture
+def site(httpx_mock):
+    def respond(request):
+        html = SITE.get(request.url.path)
+        if html is None:
+            return httpx.Response(404, text="Not found")
+        return httpx.Response(200, html=html)
+
+    httpx_mock.add_callback(respond, url=re.compile(f"{HOST}/.*"), is_reusable=True, is_optional=True)
+    return httpx_mock
+
+
+def _crawl(**kwargs):
+    async def crawl():
+        async with httpx.AsyncClient() as client:
+            return await Crawler(client, **kwargs).crawl(START)
+
+    return {p.url: p for p in asyncio.run(crawl())}
+
+
+def _requested(httpx_mock):
+    return sorted(str(r.url).removeprefix(START) for r in httpx_mock.get_requests())
+
+
+@pytest.mark.parametrize(
+    ("href", "expected"),
+    [
+        ("Kori/", "https://www.example.com/a/Kori"),
+        ("../b?y=2&x=1#frag", "https://www.example.com/b?x=1&y=2"),
+        ("HTTPS://WWW.Example.com:443//a/%4b%c3%a4", "https://www.example.com/a/K%C3%A4"),
+        ("http://www.example.com:8080/", "http://www.example.com:8080/"),
+        ("mailto:someone@example.com", None),
+        ("javascript:void(0)", None),
+    ],
+)
+def test_normalize_url(href, expected):
+    assert normalize_url(href, "https://www.example.com/a/") == expected
+
+
+def test_crawl_follows_active_links_once(site):
+    pages = _crawl(max_depth=2)
+    # Kori is linked three ways but fetched once; inactive and off-host links are not followed
+    assert _requested(site) == ["", "/Kori", "/Kori/Puskuri", "/Puuttuu", "/Sisusta", "/Sisusta/Kattoverhoilu"]
+    assert pages[f"{START}/Puuttuu"].error == "HTTP 404"
+    assert pages[START].links == [f"{START}/Sisusta", f"{START}/Kori", f"{START}/Puuttuu"]
+
+    out = io.StringIO()
+    assert write_catalog(pages.values(), out) == 9
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert rows[0] == {
+        "url": START,
+        "group": "Polestar 2",
+        "parent": "",
+        "title": "Sisusta",
+        "status": "active",
+        "href": "2/Sisusta",
+    }
+    assert {(r["title"], r["status"]) for r in rows if r["url"].endswith("/Sisusta")} == {
+        ("Kattoverhoilu", "active"),
+        ("Hattuhylly", "inactive"),
+    }
+
+
+def test_crawl_limits(site):
+    assert set(_crawl(max_depth=0)) == {START}
+    assert len(_crawl(max_depth=5, max_pages=3)) == 3
+
+
+def test_crawl_resumes_from_checkpoint(site, tmp_path):
+    path = tmp_path / "crawl.jsonl"
+    checkpoint = CrawlCheckpoint(path)
+    first = _crawl(max_pages=4, checkpoint=checkpoint, concurrency=1)
+    checkpoint.close()
+    # A crawl killed while writing leaves a partial line behind
+    with open(path, "a") as f:
+        f.write('{"url": "https://www.exa')
+
+    checkpoint = CrawlCheckpoint(path)
+    second = _crawl(checkpoint=checkpoint)
+    checkpoint.close()
+    assert set(first) < set(second)
+    assert len(second) == 6
+    # The failed page was tried again on resume; every other page was fetched once
+    requested = _requested(site)
+    assert requested.count("/Puuttuu") == 2
+    assert len(requested) == len(set(requested)) + 1
+
+
+def test_cli_writes_catalog(site, tmp_path):
+    output = tmp_path / "catalog.csv"
+    args = build_parser().parse_args(["--url", START, "--crawl", "--crawl-depth", "1", "--crawl-output", str(output)])
+    run_crawl(args, TransportConfig.from_args(args))
+    rows = list(csv.DictReader(output.open()))
+    assert {r["url"] for r in rows} == {START, f"{START}/Sisusta", f"{START}/Kori"}
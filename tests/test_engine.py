@@ -0,0 +1,258 @@
+import asyncio
+import logging
+
+import httpx
+
+from varaosabotti.config import Watch
+from varaosabotti.engine import Monitor
+from varaosabotti.notifier import NotificationQueue
+
+URL = "https://example.com/a"
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _monitor(watches, **kwargs):
+    kwargs.setdefault("interval", 60)
+    kwargs.setdefault("once", True)
+    async with httpx.AsyncClient() as client:
+        monitor = Monitor(watches, client, **kwargs)
+        assert await monitor.validate()
+        await monitor.run()
+        return monitor
+
+
+def test_page_interval_uses_most_eager_watch():
+    watches = [
+        Watch(url=URL, category="A", interval=120),
+        Watch(url=URL, category="B", interval=30),
+        Watch(url="https://example.com/b", category="C"),
+    ]
+    monitor = Monitor(watches, httpx.AsyncClient(), interval=300)
+    assert monitor.page_interval(URL) == 30
+    assert monitor.page_interval("https://example.com/b") == 300
+
+
+def test_validate_reports_missing(httpx_mock, sample_html, caplog):
+    httpx_mock.add_response(url=URL, text=sample_html)
+
+    async def validate():
+        async with httpx.AsyncClient() as client:
+            return await Monitor([Watch(url=URL, category="Nope")], client, interval=60).validate()
+
+    with caplog.at_level(logging.ERROR):
+        assert _run(validate()) is False
+    assert "Category 'Nope' not found" in caplog.text
+
+
+def test_validate_tolerates_network_error(httpx_mock, sample_html, caplog):
+    httpx_mock.add_exception(httpx.ConnectError("boom"), url=URL)
+    httpx_mock.add_response(url=URL, text=sample_html)
+    with caplog.at_level(logging.WARNING):
+        monitor = _run(_monitor([Watch(url=URL, category="Active Simple")]))
+    assert "Could not validate" in caplog.text
+    assert monitor.previously_active[Watch(url=URL, category="Active Simple")] is True
+
+
+def test_alerts_are_queued_for_delivery(httpx_mock, sample_html):
+    httpx_mock.add_response(url=URL, text=sample_html)
+    httpx_mock.add_response(url="https://api.pushover.net/1/messages.json", json={"status": 1})
+
+    async def monitor_with_queue():
+        async with NotificationQueue("tok", "usr", window=0) as notifications:
+            await _monitor([Watch(url=URL, category="Parent Toggle")], notifications=notifications)
+
+    _run(monitor_with_queue())
+    request = httpx_mock.get_request(url="https://api.pushover.net/1/messages.json")
+    assert b"Parent+Toggle" in request.content
+
+
+def test_run_logs_transfer_summary(httpx_mock, sample_html, caplog):
+    httpx_mock.add_response(url=URL, text=sample_html)
+    with caplog.at_level(logging.INFO):
+        monitor = _run(_monitor([Watch(url=URL, category="Active Simple")]))
+    assert monitor.transfers.pages[URL].requests == 1
+    assert "Transfer summary (lxml): 1 request(s)" in caplog.text
+
+
+def test_run_records_metrics(httpx_mock, sample_html):
+    httpx_mock.add_response(url=URL, text=sample_html)
+    watch = Watch(url=URL, category="Active Simple")
+    monitor = _run(_monitor([watch]))
+    assert monitor.metrics.fetch_seconds.count == 1
+    assert monitor.metrics.parse_seconds.count == 1
+    assert monitor.metrics.categories[URL] == (3, 2)
+    assert watch in monitor.metrics.last_success
+
+
+def test_poll_keeps_cadence(httpx_mock, sample_html):
+    """Repeated polls are scheduled on the interval grid, not interval after each fetch."""
+    httpx_mock.add_response(url=URL, text=sample_html, is_reusable=True)
+
+    async def poll_for(seconds):
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor(
+                [Watch(url=URL, category="Active Simple", interval=1)], client, interval=60, jitter=0
+            )
+            try:
+                await asyncio.wait_for(monitor.run(), seconds)
+            except TimeoutError:
+                pass
+
+    _run(poll_for(2.5))
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_added_watch_shortens_the_running_poll_interval(httpx_mock, sample_html):
+    httpx_mock.add_response(url=URL, text=sample_html, is_reusable=True)
+
+    async def poll():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor([Watch(url=URL, category="Active Simple")], client, interval=300, jitter=0)
+            runner = asyncio.create_task(monitor.run(forever=True))
+            while not httpx_mock.get_requests():
+                await asyncio.sleep(0.01)
+            await monitor.add_watch(Watch(url=URL, category="Child Inactive", interval=1))
+            await asyncio.sleep(2.5)
+            monitor.stop()
+            await asyncio.wait_for(runner, 5)
+            return monitor
+
+    monitor = _run(poll())
+    assert monitor.dump()["pages"][URL]["interval"] == 1
+    # The first poll, then one a second once the eager watch was added
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_events_drive_notifications(httpx_mock, sample_html, caplog):
+    """Only watches touched by a change are re-checked, and a re-activation alerts again."""
+    inactive = sample_html.replace(
+        'class="my-2" href="/active"', 'class="my-2 disabled-link" href="/active"'
+    )
+    for html in (sample_html, inactive, inactive, sample_html):
+        httpx_mock.add_response(url=URL, text=html)
+
+    async def poll_four_times():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor(
+                [Watch(url=URL, category="Active Simple"), Watch(url=URL, category="Child Inactive")],
+                client,
+                interval=60,
+            )
+            for _ in range(4):
+                await monitor.check_page(URL)
+
+    with caplog.at_level(logging.INFO):
+        _run(poll_four_times())
+    assert caplog.text.count("ALERT: 'Active Simple") == 2
+    # Child Inactive never changes, so it is only reported by the first check
+    assert caplog.text.count("Still inactive: Parent Toggle / Child Inactive") == 1
+
+
+def test_state_store_survives_restart(httpx_mock, sample_html, caplog, tmp_path):
+    """A second --once run neither re-validates nor re-alerts for an already notified category."""
+    from varaosabotti.state import StateStore
+
+    httpx_mock.add_response(url=URL, text=sample_html, headers={"ETag": '"v1"'})
+    httpx_mock.add_response(url=URL, status_code=304, match_headers={"If-None-Match": '"v1"'})
+    watches = [Watch(url=URL, category="Active Simple")]
+
+    for _ in range(2):
+        store = StateStore(tmp_path / "state.db")
+        with caplog.at_level(logging.WARNING):
+            _run(_monitor(watches, store=store))
+        store.close()
+
+    assert caplog.text.count("ALERT") == 1
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_check_page_reports_throttling(httpx_mock):
+    httpx_mock.add_response(url=URL, status_code=429, headers={"Retry-After": "120"})
+
+    async def check():
+        async with httpx.AsyncClient() as client:
+            return await Monitor([Watch(url=URL, category="X")], client, interval=60).check_page(URL)
+
+    outcome = _run(check())
+    assert outcome.throttled
+    assert outcome.retry_after == 120.0
+
+
+def test_fast_path_reads_watched_statuses_without_parsing(httpx_mock, sample_html, caplog):
+    disabled = 'class="my-2 disabled-link" href="/active"'
+    unwatched_changed = sample_html.replace('class="my-2" href="/parent"', 'class="my-2 disabled-link" href="/parent"')
+    watched_changed = unwatched_changed.replace('class="my-2" href="/active"', disabled)
+    moved = watched_changed.replace('href="/active"', 'href="/active-2"')
+    for html in (sample_html, unwatched_changed, watched_changed, moved, moved.replace(disabled[:-16], 'class="my-2"')):
+        httpx_mock.add_response(url=URL, text=html)
+
+    async def poll():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor([Watch(url=URL, category="Active Simple")], client, interval=60, fast_path=True)
+            parsed = []
+            for _ in range(5):
+                await monitor.check_page(URL)
+                parsed.append(monitor.transfers.latest[URL].parsed)
+            return monitor, parsed
+
+    with caplog.at_level(logging.INFO):
+        monitor, parsed = _run(poll())
+    # The moved anchor makes the plan miss, and the next poll plans again
+    assert parsed == [True, False, False, True, False]
+    assert monitor.dump()["pages"][URL]["plan"] == {"hits": 3, "misses": 1}
+    assert caplog.text.count("ALERT: 'Active Simple") == 2
+    assert "Still inactive: Active Simple" in caplog.text
+
+
+def test_watch_added_on_fast_path_page_sees_unwatched_changes(httpx_mock, sample_html, caplog):
+    """Statuses the plan didn't read aren't trusted for a watch added later, even if the page stays the same."""
+    child_active = sample_html.replace(
+        'class="my-2 disabled-link text-danger" href="/child-i"', 'class="my-2" href="/child-i"'
+    )
+    for html in (sample_html, child_active, child_active):
+        httpx_mock.add_response(url=URL, text=html, headers={"ETag": '"v1"'})
+
+    async def poll():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor([Watch(url=URL, category="Active Simple")], client, interval=60, fast_path=True)
+            await monitor.check_page(URL)
+            await monitor.check_page(URL)
+            assert not monitor.transfers.latest[URL].parsed
+            await monitor.add_watch(Watch(url=URL, category="Child Inactive"))
+            await monitor.check_page(URL)
+            return monitor
+
+    with caplog.at_level(logging.INFO):
+        monitor = _run(poll())
+    assert caplog.text.count("ALERT: 'Parent Toggle / Child Inactive") == 1
+    assert monitor.previously_active[Watch(url=URL, category="Child Inactive")]
+
+
+def test_pattern_watches_are_matched_in_one_pass(httpx_mock, sample_html, caplog):
+    newly_added = sample_html.replace(
+        "</div>\n  </div>\n</div>",
+        '<a ngbdropdownitem class="my-2" href="/child-n" title="Child New"><span>Child New</span></a>'
+        "</div>\n  </div>\n</div>",
+        1,
+    )
+    for html in (sample_html, newly_added):
+        httpx_mock.add_response(url=URL, text=html)
+    watches = [Watch(url=URL, category="Parent Toggle / *"), Watch(url=URL, category="re:^inactive")]
+
+    async def poll_twice():
+        async with httpx.AsyncClient() as client:
+            monitor = Monitor(watches, client, interval=60, fast_path=True)
+            await monitor.check_page(URL)
+            await monitor.check_page(URL)
+            return monitor
+
+    with caplog.at_level(logging.INFO):
+        monitor = _run(poll_twice())
+    assert caplog.text.count("ALERT: 'Parent Toggle / Child Active") == 1
+    assert "Still inactive: Inactive Simple" in caplog.text
+    # Patterns can match categories added later, so they aren't planned
+    assert monitor.dump()["pages"][URL]["plan"] is None
+    assert len(monitor._watched_keys[watches[0]]) == 3
@@ -0,0 +1,61 @@
+from dataclasses import replace
+
+from varaosabotti.events import CategoryEvent, ChangeKind, category_key, diff_snapshots
+from varaosabotti.models import CategorySnapshot, CategoryStatus
+
+
+def _snapshot(categories):
+    return CategorySnapshot.from_categories(categories)
+
+
+def _flip(category):
+    status = CategoryStatus.INACTIVE if category.status is CategoryStatus.ACTIVE else CategoryStatus.ACTIVE
+    return replace(category, status=status)
+
+
+def test_first_snapshot_has_no_events(sample_categories):
+    assert diff_snapshots(None, _snapshot(sample_categories)) == []
+
+
+def test_unchanged_snapshot_has_no_events(sample_categories):
+    assert diff_snapshots(_snapshot(sample_categories), _snapshot(sample_categories)) == []
+
+
+def test_status_changes(sample_categories):
+    changed = list(sample_categories)
+    changed[0] = _flip(changed[0])
+    changed[4] = _flip(changed[4])
+    events = diff_snapshots(_snapshot(sample_categories), _snapshot(changed))
+    assert events == [
+        CategoryEvent(ChangeKind.DEACTIVATED, changed[0]),
+        CategoryEvent(ChangeKind.ACTIVATED, changed[4]),
+    ]
+
+
+def test_added_and_removed(sample_categories):
+    changed = sample_categories[1:] + [replace(sample_categories[0], title="New", name="New")]
+    events = diff_snapshots(_snapshot(sample_categories), _snapshot(changed))
+    assert [(e.kind, e.category.title) for e in events] == [
+        (ChangeKind.ADDED, "New"),
+        (ChangeKind.REMOVED, "Active Simple"),
+    ]
+
+
+def test_status_change_with_layout_change(sample_categories):
+    changed = [_flip(sample_categories[1])] + sample_categories[2:]
+    events = diff_snapshots(_snapshot(sample_categories), _snapshot(changed))
+    assert [(e.kind, e.category.title) for e in events] == [
+        (ChangeKind.ACTIVATED, "Inactive Simple"),
+        (ChangeKind.REMOVED, "Active Simple"),
+    ]
+
+
+def test_duplicate_keys_pair_in_order(sample_categories):
+    dup = sample_categories[0]
+    events = diff_snapshots(_snapshot([dup]), _snapshot([dup, _flip(dup)]))
+    assert [e.kind for e in events] == [ChangeKind.ADDED]
+
+
+def test_event_key(sample_categories):
+    event = CategoryEvent(ChangeKind.ADDED, sample_categories[3])
+    assert event.key == category_key(sample_categories[3]) == ("Test Group", "Parent Toggle", "Child Active")
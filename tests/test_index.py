@@ -0,0 +1,72 @@
+from varaosabotti.index import CategoryIndex
+from varaosabotti.models import Category, CategoryStatus
+
+
+def _cat(title, *, name=None, group=None, parent=None):
+    return Category(
+        name=name or title,
+        title=title,
+        href=f"/{title}",
+        status=CategoryStatus.ACTIVE,
+        group=group,
+        parent=parent,
+    )
+
+
+def test_find_matches_title_or_name():
+    cats = [_cat("Hattuhylly", name="Takahylly")]
+    index = CategoryIndex(cats)
+    assert index.find("hattuhylly") == cats
+    assert index.find("TAKAHYLLY") == cats
+
+
+def test_find_keeps_page_order():
+    cats = [
+        _cat("Vasen", group="Sisusta Ovet", parent="Oviverhoilu"),
+        _cat("Vasen", group="Kori", parent="Lokasuoja"),
+    ]
+    assert CategoryIndex(cats).find("Vasen") == cats
+
+
+def test_find_path_forms(sample_categories):
+    index = CategoryIndex(sample_categories)
+    assert [c.href for c in index.find("Parent Toggle / Child Active")] == ["/child-a"]
+    assert [c.href for c in index.find("test group / active simple")] == ["/active"]
+    assert [c.href for c in index.find("Test Group / Parent Toggle / Child Inactive")] == ["/child-i"]
+    assert index.find("Test Group / Nope / Child Active") == []
+    assert index.find("a / b / c / d") == []
+
+
+def test_find_parent_child_preferred_over_group_name():
+    cats = [
+        _cat("Vasen", group="Oviverhoilu"),
+        _cat("Vasen", group="G", parent="Oviverhoilu"),
+    ]
+    assert CategoryIndex(cats).find("Oviverhoilu / Vasen") == [cats[1]]
+
+
+def test_find_agrees_with_linear_scan(sample_categories):
+    index = CategoryIndex(sample_categories)
+    for c in sample_categories:
+        assert c in index.find(c.title)
+
+
+def test_suggest_substring():
+    cats = [_cat("Kattoverhoilu"), _cat("Oviverhoilu", parent="Ovet"), _cat("Hattuhylly")]
+    assert CategoryIndex(cats).suggest("verhoil") == ["Kattoverhoilu", "Ovet / Oviverhoilu"]
+
+
+def test_suggest_short_needle():
+    cats = [_cat("Kattoverhoilu"), _cat("Hattuhylly")]
+    assert CategoryIndex(cats).suggest("yl") == ["Hattuhylly"]
+
+
+def test_suggest_trigram_across_title_and_name_is_verified():
+    # "abc" + "cde" trigrams are split between title and name, but "abcde" occurs in neither
+    cats = [_cat("xabcx", name="ycdey")]
+    assert CategoryIndex(cats).suggest("abcde") == []
+
+
+def test_suggest_deduplicates_labels():
+    cats = [_cat("Same"), _cat("Same")]
+    assert CategoryIndex(cats).suggest("same") == ["Same"]
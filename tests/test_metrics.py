@@ -0,0 +1,54 @@
+import asyncio
+
+from varaosabotti.config import Watch
+from varaosabotti.metrics import Histogram, Metrics, MetricsServer
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.render("h")
+    assert lines[:3] == ['h_bucket{le="0.1"} 2', 'h_bucket{le="1"} 3', 'h_bucket{le="+Inf"} 4']
+    assert lines[-1] == "h_count 4"
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.set_categories("https://example.com/a", 3, 2)
+    metrics.http_error(503)
+    metrics.http_error(503)
+    metrics.http_error(None)
+    metrics.poll_succeeded([Watch(url="https://example.com/a", category='Say "hi"')], now=100.0)
+    text = metrics.render(now=130.0)
+    assert 'varaosabotti_categories{url="https://example.com/a",status="inactive"} 2' in text
+    assert 'varaosabotti_http_errors_total{code="503"} 2' in text
+    assert "varaosabotti_network_errors_total 1" in text
+    assert 'category="Say \\"hi\\""} 30.000' in text
+
+
+def _get(port, path):
+    async def go():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    return go()
+
+
+def test_server_serves_metrics():
+    async def go():
+        metrics = Metrics()
+        metrics.observe_fetch(0.2)
+        async with MetricsServer(metrics, port=0) as server:
+            found = await _get(server.port, "/metrics")
+            missing = await _get(server.port, "/")
+        return found, missing
+
+    found, missing = asyncio.run(go())
+    assert found.startswith(b"HTTP/1.1 200 OK")
+    assert b"varaosabotti_fetch_duration_seconds_count 1" in found
+    assert missing.startswith(b"HTTP/1.1 404")
@@ -1,4 +1,4 @@
-from varaosabotti.models import Category, CategoryStatus
+from varaosabotti.models import Category, CategorySnapshot, CategoryStatus
 
 
 def test_category_status_values():
@@ -19,3 +19,39 @@ def test_category_defaults():
     cat = Category(name="X", title="X", href="/x", status=CategoryStatus.ACTIVE)
     assert cat.group is None
     assert cat.parent is None
+
+
+def test_category_has_slots():
+    cat = Category(name="X", title="X", href="/x", status=CategoryStatus.ACTIVE)
+    assert not hasattr(cat, "__dict__")
+
+
+# --- CategorySnapshot ---
+
+
+def test_snapshot_round_trip(sample_categories):
+    snapshot = CategorySnapshot.from_categories(sample_categories)
+    assert len(snapshot) == 5
+    assert snapshot.to_categories() == sample_categories
+
+
+def test_snapshot_status_bitmap(sample_categories):
+    snapshot = CategorySnapshot.from_categories(sample_categories)
+    # Active Simple, Parent Toggle and Child Active
+    assert snapshot.active == 0b01101
+    assert snapshot.active_count == 3
+    assert snapshot.status(1) == CategoryStatus.INACTIVE
+
+
+def test_snapshot_index_out_of_range(sample_categories):
+    snapshot = CategorySnapshot.from_categories(sample_categories)
+    try:
+        snapshot[5]
+        assert False, "Expected IndexError"
+    except IndexError:
+        pass
+
+
+def test_empty_snapshot():
+    assert len(CategorySnapshot()) == 0
+    assert CategorySnapshot.from_categories([]) == CategorySnapshot()
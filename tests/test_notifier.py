@@ -1,9 +1,20 @@
+import asyncio
 import logging
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs
 
 import httpx
 
+from varaosabotti.metrics import Metrics
 from varaosabotti.models import Category, CategoryStatus
-from varaosabotti.notifier import category_label, log_alert, notify, send_pushover
+from varaosabotti.notifier import (
+    NotificationQueue,
+    category_label,
+    log_alert,
+    notify,
+    send_pushover,
+)
 
 
 def _make_cat(*, parent=None, group=None):
@@ -103,3 +114,114 @@ def test_notify_with_pushover(httpx_mock, caplog):
     client.close()
     assert "ALERT" in caplog.text
     assert httpx_mock.get_request() is not None
+
+
+# --- NotificationQueue ---
+
+PUSHOVER = "https://api.pushover.net/1/messages.json"
+
+
+def _cat_titled(title, group="G"):
+    return Category(name=title, title=title, href=f"/{title}", status=CategoryStatus.ACTIVE, group=group)
+
+
+def _deliver(alerts, **kwargs):
+    async def go():
+        async with NotificationQueue("tok", "usr", backoff=0, **kwargs) as queue:
+            for args in alerts:
+                queue.put(*args)
+
+    asyncio.run(go())
+
+
+def test_queue_coalesces_alerts_per_user(httpx_mock):
+    httpx_mock.add_response(url=PUSHOVER, json={"status": 1}, is_reusable=True)
+    _deliver(
+        [
+            (_cat_titled("A"), "https://example.com/p"),
+            (_cat_titled("B"), "https://example.com/p"),
+            (_cat_titled("C"), "https://example.com/p", "other"),
+        ],
+        window=0.5,
+    )
+    requests = httpx_mock.get_requests()
+    assert len(requests) == 2
+    combined = parse_qs(requests[0].content.decode())
+    assert combined["user"] == ["usr"]
+    assert combined["title"] == ["Varaosabotti: 2 categories available"]
+    assert "A  (G)" in combined["message"][0] and "B  (G)" in combined["message"][0]
+    assert combined["url"] == ["https://example.com/p"]
+    assert parse_qs(requests[1].content.decode())["user"] == ["other"]
+
+
+def test_queue_single_alert_uses_plain_message(httpx_mock):
+    httpx_mock.add_response(url=PUSHOVER, json={"status": 1})
+    _deliver([(_cat_titled("A"), "https://example.com/p")], window=0)
+    sent = parse_qs(httpx_mock.get_request().content.decode())
+    assert sent["title"] == ["Varaosabotti: A  (G)"]
+
+
+def test_queue_retries_server_errors(httpx_mock):
+    httpx_mock.add_response(url=PUSHOVER, status_code=503)
+    httpx_mock.add_exception(httpx.ConnectError("boom"), url=PUSHOVER)
+    httpx_mock.add_response(url=PUSHOVER, json={"status": 1})
+    _deliver([(_cat_titled("A"), "https://example.com/p")], window=0)
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_queue_does_not_retry_client_errors(httpx_mock, caplog):
+    httpx_mock.add_response(url=PUSHOVER, status_code=400, json={"errors": ["invalid token"]})
+    with caplog.at_level(logging.ERROR):
+        _deliver([(_cat_titled("A"), "https://example.com/p")], window=0)
+    assert len(httpx_mock.get_requests()) == 1
+    assert "invalid token" in caplog.text
+
+
+def test_queue_gives_up_after_retries(httpx_mock, caplog):
+    httpx_mock.add_response(url=PUSHOVER, status_code=500, is_reusable=True)
+    with caplog.at_level(logging.ERROR):
+        _deliver([(_cat_titled("A"), "https://example.com/p")], window=0, retries=2)
+    assert len(httpx_mock.get_requests()) == 3
+    assert "Pushover error: HTTP 500" in caplog.text
+
+
+def test_queue_records_metrics(httpx_mock):
+    httpx_mock.add_response(url=PUSHOVER, json={"status": 1})
+    httpx_mock.add_response(url=PUSHOVER, status_code=400)
+    metrics = Metrics()
+    _deliver(
+        [(_cat_titled("A"), "https://example.com/p"), (_cat_titled("B"), "https://example.com/p", "other")],
+        window=0.5,
+        metrics=metrics,
+    )
+    assert metrics.notification_seconds.count == 2
+    assert metrics.notification_failures == 1
+
+
+def test_queue_against_stub_server():
+    """Deliver to a real local HTTP server instead of a mocked transport."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(self.rfile.read(int(self.headers["Content-Length"])))
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b'{"status": 1}')
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        _deliver(
+            [(_cat_titled("A"), "https://example.com/p")],
+            window=0,
+            api_url=f"http://127.0.0.1:{server.server_port}/1/messages.json",
+        )
+    finally:
+        server.shutdown()
+    assert len(received) == 1
+    assert b"token=tok" in received[0]
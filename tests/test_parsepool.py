@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+import pytest
+
+from varaosabotti.parsepool import ParsePool, parse_snapshot
+from varaosabotti.scraper import PageCache, fetch_categories, parse_categories
+
+
+def test_parse_snapshot_is_columnar(sample_html):
+    data = parse_snapshot(sample_html.encode(), "utf-8", "lxml")
+    assert data["titles"][0] == "Active Simple"
+    assert data["active"] == 0b01101
+
+
+@pytest.mark.parametrize("threads", [False, True])
+def test_pool_matches_inline_parse(sample_html, threads):
+    async def go():
+        with ParsePool(2, threads=threads) as pool:
+            return await asyncio.gather(*(pool.parse(sample_html.encode(), "utf-8", "lxml") for _ in range(4)))
+
+    for categories in asyncio.run(go()):
+        assert categories == parse_categories(sample_html)
+
+
+def test_fetch_categories_with_pool(httpx_mock, sample_html):
+    httpx_mock.add_response(url="https://example.com", text=sample_html)
+
+    async def go():
+        with ParsePool(1, threads=True) as pool:
+            async with httpx.AsyncClient() as client:
+                return await fetch_categories("https://example.com", client, PageCache(), pool=pool)
+
+    assert asyncio.run(go()) == parse_categories(sample_html)
+
+
+def test_streaming_rejects_pool():
+    async def go():
+        async with httpx.AsyncClient() as client:
+            await fetch_categories("https://example.com", client, stream=True, pool=ParsePool(1))
+
+    with pytest.raises(ValueError, match="parse pool"):
+        asyncio.run(go())
@@ -0,0 +1,25 @@
+import time
+
+from varaosabotti.profiling import add_span, is_recording, recording, span
+
+
+def test_spans_are_noops_when_not_recording():
+    assert not is_recording()
+    with span("parse"):
+        pass
+    add_span("decode", 1.0)
+    assert span("a") is span("b")
+
+
+def test_recording_accumulates_spans():
+    with recording() as recorder:
+        for _ in range(3):
+            with span("parse"):
+                time.sleep(0.001)
+        add_span("decode", 0.5)
+    assert not is_recording()
+    count, total, worst = recorder.spans["parse"]
+    assert count == 3
+    assert total >= 0.003 and worst <= total
+    assert recorder.spans["decode"] == [1, 0.5, 0.5]
+    assert "parse" in recorder.report()
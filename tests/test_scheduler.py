@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from varaosabotti.scheduler import PollOutcome, PollSchedule, parse_retry_after
+
+OK = PollOutcome()
+CHANGED = PollOutcome(changed=True)
+
+
+def _schedule(interval=60, **kwargs):
+    kwargs.setdefault("jitter", 0)
+    schedule = PollSchedule(interval, rng=random.Random(0), **kwargs)
+    schedule.start(0.0)
+    return schedule
+
+
+def test_fixed_cadence_compensates_fetch_time():
+    schedule = _schedule()
+    # The poll took 5 seconds, so the sleep is 55 to keep the 60-second grid
+    assert schedule.next_delay(OK, 5.0) == 55.0
+    assert schedule.next_delay(OK, 60.0 + 20.0) == 40.0
+
+
+def test_slow_poll_skips_missed_slots():
+    schedule = _schedule()
+    assert schedule.next_delay(OK, 150.0) == 0.0
+    assert schedule.next_delay(OK, 150.0) == 60.0
+
+
+def test_jitter_stays_within_bounds():
+    schedule = _schedule(jitter=0.1)
+    now = 0.0
+    for _ in range(100):
+        delay = schedule.next_delay(OK, now)
+        assert 54.0 <= delay <= 66.0
+        now += 60.0
+
+
+def test_backoff_on_server_errors():
+    schedule = _schedule()
+    error = PollOutcome(ok=False, status_code=503)
+    assert [schedule.next_delay(error, 0.0) for _ in range(3)] == [120.0, 240.0, 480.0]
+    assert schedule.failures == 3
+    # Recovery resets the backoff
+    schedule.next_delay(OK, 480.0)
+    assert schedule.failures == 0
+
+
+def test_backoff_is_capped():
+    schedule = _schedule(max_backoff=300)
+    error = PollOutcome(ok=False)
+    delays = [schedule.next_delay(error, 0.0) for _ in range(10)]
+    assert max(delays) == 300.0
+
+
+def test_retry_after_is_honoured():
+    schedule = _schedule()
+    assert schedule.next_delay(PollOutcome(ok=False, status_code=429, retry_after=900.0), 0.0) == 900.0
+
+
+def test_client_errors_do_not_back_off():
+    schedule = _schedule()
+    assert schedule.next_delay(PollOutcome(ok=False, status_code=404), 0.0) == 60.0
+    assert schedule.failures == 0
+
+
+def test_adaptive_interval():
+    schedule = _schedule(adaptive=True)
+    schedule.next_delay(CHANGED, 0.0)
+    assert schedule.current == 30.0
+    for _ in range(20):
+        schedule.next_delay(CHANGED, 0.0)
+    assert schedule.current == 15.0
+    for _ in range(50):
+        schedule.next_delay(OK, 0.0)
+    assert schedule.current == 240.0
+
+
+def test_non_adaptive_interval_is_fixed():
+    schedule = _schedule()
+    schedule.next_delay(CHANGED, 0.0)
+    assert schedule.current == 60.0
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, None),
+        ("", None),
+        ("120", 120.0),
+        ("Thu, 01 Jan 1970 00:02:00 GMT", 60.0),
+        ("soon", None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value, now=60.0) == expected
@@ -1,12 +1,23 @@
+import asyncio
+import gzip
+
 import httpx
+import pytest
+from pytest_httpx import IteratorStream
 
 from varaosabotti.models import CategoryStatus
 from varaosabotti.scraper import (
+    GridReader,
+    PageCache,
+    fetch_categories,
     fetch_page,
     find_category,
+    page_digest,
     parse_categories,
     suggest_categories,
 )
+from varaosabotti.transport import TransferLog
+from tests.conftest import SAMPLE_HTML
 
 
 # --- parse_categories ---
@@ -54,6 +65,54 @@ def test_parse_categories_empty_html():
     assert parse_categories("<html><body></body></html>") == []
 
 
+EDGE_HTML = """\
+<html><body>
+<div ngbdropdown class="col-lg-4"><a queryparamshandling="preserve" href="/nogroup"><span> No <b>Group</b> </span></a></div>
+<div class="row col-12"><div><h4> Outer <!-- comment --> Header </h4></div>
+  <div class="col-12"><div ngbdropdown class="col-lg-4 extra">
+    <a ngbdropdowntoggle queryparamshandling="preserve" class="disabled-link" href="/toggle"><span>Toggle</span></a>
+    <a ngbdropdownitem href="/child"><span>Child</span></a>
+    <a ngbdropdownitem class="x disabled-link" title="No Name"><span></span></a>
+  </div></div>
+  <div ngbdropdown class="col-lg-4">
+    <a queryparamshandling="merge" href="/other"><span>Other</span></a>
+    <a queryparamshandling="preserve" href="/preserved" title="Preserved"><span>Preserved</span></a>
+  </div>
+  <div ngbdropdown class="col-lg-40"><a queryparamshandling="preserve" href="/not-a-container"><span>X</span></a></div>
+</div>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", ["lxml", "bs4"])
+def test_parse_categories_interns_repeated_strings(sample_html, backend):
+    first = parse_categories(sample_html, backend)
+    second = parse_categories(sample_html, backend)
+    assert first[0].group is second[4].group
+    assert second[3].parent is second[4].parent is first[3].parent
+
+
+@pytest.mark.parametrize("html", [SAMPLE_HTML, EDGE_HTML, "", "<html></html>"])
+def test_parse_categories_backends_agree(html):
+    assert parse_categories(html, "lxml") == parse_categories(html, "bs4")
+
+
+def test_parse_categories_edge_cases():
+    by_title = {c.title: c for c in parse_categories(EDGE_HTML)}
+    assert by_title["NoGroup"].group is None
+    # The nearest div.col-12 decides the group, even if it has no header
+    assert by_title["Child"].group is None
+    assert by_title["Child"].parent == "Toggle"
+    assert by_title["Toggle"].status == CategoryStatus.INACTIVE
+    assert by_title["Preserved"].group == "OuterHeader"
+    assert "X" not in by_title
+
+
+def test_parse_categories_unknown_backend(sample_html):
+    with pytest.raises(ValueError, match="Unknown parser backend"):
+        parse_categories(sample_html, "regex")
+
+
 # --- find_category ---
 
 
@@ -130,3 +189,200 @@ def test_fetch_page(httpx_mock):
     result = fetch_page("https://example.com", client)
     assert result == "<html>ok</html>"
     client.close()
+
+
+# --- fetch_categories ---
+
+
+def _fetch_twice(url, cache):
+    async def go():
+        async with httpx.AsyncClient() as client:
+            first = await fetch_categories(url, client, cache)
+            second = await fetch_categories(url, client, cache)
+            return first, second
+
+    return asyncio.run(go())
+
+
+def test_fetch_categories_not_modified_reuses_parse(httpx_mock, sample_html):
+    httpx_mock.add_response(
+        url="https://example.com",
+        text=sample_html,
+        headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+    httpx_mock.add_response(
+        url="https://example.com",
+        status_code=304,
+        match_headers={"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+    first, second = _fetch_twice("https://example.com", PageCache())
+    assert len(first) == 5
+    assert second is first
+
+
+def test_fetch_categories_without_validators(httpx_mock, sample_html):
+    httpx_mock.add_response(url="https://example.com", text=sample_html, is_reusable=True)
+    cache = PageCache()
+    _fetch_twice("https://example.com", cache)
+    assert cache.request_headers("https://example.com") == {}
+    assert all("If-None-Match" not in r.headers for r in httpx_mock.get_requests())
+
+
+def test_fetch_categories_same_content_skips_parse(httpx_mock, sample_html):
+    # Different noise outside the category grid on each response
+    httpx_mock.add_response(url="https://example.com", text=sample_html.replace("<body>", "<body><p>1</p>"))
+    httpx_mock.add_response(url="https://example.com", text=sample_html.replace("<body>", "<body><p>2</p>"))
+    cache = PageCache()
+    first, second = _fetch_twice("https://example.com", cache)
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fetch_categories_changed_content_reparses(httpx_mock, sample_html):
+    httpx_mock.add_response(url="https://example.com", text=sample_html)
+    httpx_mock.add_response(
+        url="https://example.com",
+        text=sample_html.replace('class="my-2 disabled-link text-danger" href="/inactive"', 'class="my-2" href="/inactive"'),
+    )
+    cache = PageCache()
+    first, second = _fetch_twice("https://example.com", cache)
+    assert second is not first
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert all(c.status == CategoryStatus.ACTIVE for c in second if c.href == "/inactive")
+
+
+def test_fetch_categories_records_transfer(httpx_mock, sample_html):
+    compressed = gzip.compress(sample_html.encode())
+    httpx_mock.add_response(
+        url="https://example.com",
+        headers={"Content-Encoding": "gzip"},
+        stream=IteratorStream([compressed[:100], compressed[100:]]),
+    )
+    stats = TransferLog()
+
+    async def go():
+        async with httpx.AsyncClient() as client:
+            return await fetch_categories("https://example.com", client, stats=stats)
+
+    assert asyncio.run(go()) == parse_categories(sample_html)
+    totals = stats.pages["https://example.com"]
+    assert totals.wire_bytes == len(compressed)
+    assert totals.body_bytes == len(sample_html.encode())
+    assert totals.parses == 1
+    assert totals.encodings == {"gzip": 1}
+
+
+def test_fetch_categories_records_not_modified(httpx_mock, sample_html):
+    httpx_mock.add_response(url="https://example.com", text=sample_html, headers={"ETag": '"v1"'})
+    httpx_mock.add_response(url="https://example.com", status_code=304)
+    stats = TransferLog()
+
+    async def go():
+        cache = PageCache()
+        async with httpx.AsyncClient() as client:
+            await fetch_categories("https://example.com", client, cache, stats=stats)
+            await fetch_categories("https://example.com", client, cache, stats=stats)
+
+    asyncio.run(go())
+    totals = stats.pages["https://example.com"]
+    assert (totals.requests, totals.parses) == (2, 1)
+    assert totals.body_bytes == len(sample_html.encode())
+
+
+# --- page_digest ---
+
+
+def test_page_digest_ignores_noise_outside_grid(sample_html):
+    noisy = sample_html.replace("</body>", "<script>nonce=123</script></body>")
+    assert page_digest(sample_html.encode()) == page_digest(noisy.encode())
+
+
+def test_page_digest_without_grid():
+    assert page_digest(b"<html>a</html>") != page_digest(b"<html>b</html>")
+
+
+# --- streaming ---
+
+GRID_THEN_TAIL_HTML = SAMPLE_HTML.replace("<body>", '<body><div class="row">').replace(
+    '<div class="col-12">\n  <h4>Suosittuja', '</div><footer>tail</footer><div class="col-12">\n  <h4>Suosittuja'
+)
+
+
+def _chunks(html, size=128):
+    data = html.encode()
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_grid_reader_stops_after_grid():
+    reader = GridReader()
+    chunks = _chunks(GRID_THEN_TAIL_HTML)
+    for chunk in chunks:
+        reader.feed(chunk)
+        if reader.done:
+            break
+    assert reader.done
+    assert reader.bytes_read < len(GRID_THEN_TAIL_HTML.encode())
+
+
+def test_grid_reader_truncated_page():
+    reader = GridReader()
+    reader.feed(SAMPLE_HTML.replace("</body></html>", "").encode())
+    assert not reader.done
+
+
+def test_fetch_categories_streaming_stops_early(httpx_mock):
+    served = []
+
+    def body():
+        for chunk in _chunks(GRID_THEN_TAIL_HTML):
+            served.append(chunk)
+            yield chunk
+
+    httpx_mock.add_response(url="https://example.com", stream=IteratorStream(body()))
+
+    async def go():
+        async with httpx.AsyncClient() as client:
+            return await fetch_categories("https://example.com", client, stream=True)
+
+    categories = asyncio.run(go())
+    assert categories == parse_categories(SAMPLE_HTML)
+    assert len(served) < len(_chunks(GRID_THEN_TAIL_HTML))
+
+
+def test_fetch_categories_streaming_records_transfer(httpx_mock):
+    httpx_mock.add_response(url="https://example.com", stream=IteratorStream(_chunks(GRID_THEN_TAIL_HTML)))
+    stats = TransferLog()
+
+    async def go():
+        async with httpx.AsyncClient() as client:
+            return await fetch_categories("https://example.com", client, stream=True, stats=stats)
+
+    asyncio.run(go())
+    totals = stats.pages["https://example.com"]
+    assert 0 < totals.body_bytes < len(GRID_THEN_TAIL_HTML.encode())
+    assert totals.wire_bytes == totals.body_bytes
+    assert totals.parses == 1
+
+
+def test_fetch_categories_streaming_not_modified(httpx_mock, sample_html):
+    httpx_mock.add_response(url="https://example.com", text=sample_html, headers={"ETag": '"v1"'})
+    httpx_mock.add_response(url="https://example.com", status_code=304, match_headers={"If-None-Match": '"v1"'})
+
+    async def go():
+        cache = PageCache()
+        async with httpx.AsyncClient() as client:
+            first = await fetch_categories("https://example.com", client, cache, stream=True)
+            second = await fetch_categories("https://example.com", client, cache, stream=True)
+            return first, second
+
+    first, second = asyncio.run(go())
+    assert second is first
+
+
+def test_fetch_categories_streaming_requires_lxml():
+    async def go():
+        async with httpx.AsyncClient() as client:
+            await fetch_categories("https://example.com", client, backend="bs4", stream=True)
+
+    with pytest.raises(ValueError, match="lxml"):
+        asyncio.run(go())
@@ -0,0 +1,48 @@
+import os
+
+from varaosabotti.models import CategorySnapshot
+from varaosabotti.snapshotcache import SnapshotCache
+
+URL = "https://example.com/a"
+
+
+def test_round_trip(tmp_path, sample_categories):
+    cache = SnapshotCache(tmp_path, ttl=60)
+    assert cache.get(URL) is None
+    cache.put(URL, CategorySnapshot.from_categories(sample_categories), now=1000)
+    assert cache.get(URL, now=1059).to_categories() == sample_categories
+    assert cache.get("https://example.com/b", now=1000) is None
+
+
+def test_expired_entries_are_ignored(tmp_path, sample_categories):
+    cache = SnapshotCache(tmp_path, ttl=60)
+    cache.put(URL, CategorySnapshot.from_categories(sample_categories), now=1000)
+    assert cache.get(URL, now=1060) is None
+    # An entry from the future (a clock that jumped back) is not trusted either
+    assert cache.get(URL, now=900) is None
+
+
+def test_zero_ttl_disables(tmp_path, sample_categories):
+    cache = SnapshotCache(tmp_path, ttl=0)
+    cache.put(URL, CategorySnapshot.from_categories(sample_categories))
+    assert cache.get(URL) is None
+    assert not tmp_path.joinpath(cache.path(URL).name).exists()
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = SnapshotCache(tmp_path)
+    cache.path(URL).write_text("{not json")
+    assert cache.get(URL) is None
+
+
+def test_least_recently_used_are_evicted(tmp_path, sample_categories):
+    cache = SnapshotCache(tmp_path, ttl=60, max_entries=2)
+    snapshot = CategorySnapshot.from_categories(sample_categories)
+    urls = [f"https://example.com/{i}" for i in range(3)]
+    for i, url in enumerate(urls[:2]):
+        cache.put(url, snapshot)
+        os.utime(cache.path(url), (i, i))
+    # Reading the oldest entry makes the other one least recently used
+    assert cache.get(urls[0]) is not None
+    cache.put(urls[2], snapshot)
+    assert [cache.get(url) is not None for url in urls] == [True, False, True]
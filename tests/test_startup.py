@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time of varaosabotti.cli, best of a few runs
+STARTUP_BUDGET_MS = 150
+
+
+def _import_times(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+@pytest.mark.parametrize(
+    ("code", "heavy"),
+    [
+        ("import varaosabotti.cli", ["httpx", "bs4", "lxml", "asyncio", "sqlite3"]),
+        # What --test-notification loads on top of the CLI
+        ("import varaosabotti.cli, varaosabotti.notifier", ["bs4", "lxml", "sqlite3"]),
+        # Monitoring with the default lxml parser never needs BeautifulSoup
+        ("import varaosabotti.cli, varaosabotti.engine", ["bs4"]),
+    ],
+)
+def test_heavy_modules_are_not_imported(code, heavy):
+    imported = _import_times(code)
+    assert [m for m in heavy if m in imported] == []
+
+
+def test_cli_import_within_budget():
+    best = min(_import_times("import varaosabotti.cli")["varaosabotti.cli"] for _ in range(3))
+    assert best < STARTUP_BUDGET_MS, f"importing varaosabotti.cli took {best:.0f} ms"
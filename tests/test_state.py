@@ -0,0 +1,57 @@
+import sqlite3
+
+from varaosabotti.config import Watch
+from varaosabotti.models import CategorySnapshot
+from varaosabotti.state import StateStore, StoredPage
+
+
+def test_store_is_opened_lazily(tmp_path):
+    path = tmp_path / "sub" / "state.db"
+    store = StateStore(path)
+    assert not path.exists()
+    assert store.load_page("https://example.com") is None
+    assert path.exists()
+    store.close()
+
+
+def test_store_uses_wal(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    store.close()
+
+
+def test_page_round_trip(tmp_path, sample_categories):
+    page = StoredPage(
+        snapshot=CategorySnapshot.from_categories(sample_categories),
+        etag='"v1"',
+        last_modified="Wed, 01 Jan 2025 00:00:00 GMT",
+        digest=b"\x00\x01",
+    )
+    store = StateStore(tmp_path / "state.db")
+    store.save_page("https://example.com", page)
+    store.close()
+
+    # A fresh store (as after a restart) sees the same page
+    reopened = StateStore(tmp_path / "state.db")
+    assert reopened.load_page("https://example.com") == page
+    assert reopened.load_page("https://example.com").snapshot.to_categories() == sample_categories
+    reopened.close()
+
+
+def test_watch_state(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    watch = Watch(url="https://example.com", category="X")
+    assert store.watch_active(watch) is None
+    store.set_watch_active(watch, True)
+    assert store.watch_active(watch) is True
+    store.set_watch_active(watch, False)
+    assert store.watch_active(watch) is False
+    store.close()
+
+
+def test_store_readable_by_sqlite(tmp_path):
+    store = StateStore(tmp_path / "state.db")
+    store.set_watch_active(Watch(url="u", category="c"), True)
+    store.close()
+    with sqlite3.connect(tmp_path / "state.db") as conn:
+        assert conn.execute("SELECT url, category, active FROM watches").fetchall() == [("u", "c", 1)]
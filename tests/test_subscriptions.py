@@ -0,0 +1,83 @@
+import pytest
+
+from benchmarks.pages import PageSpec, generate_page
+from varaosabotti.index import CategoryIndex
+from varaosabotti.models import Category, CategoryStatus
+from varaosabotti.scraper import parse_categories
+from varaosabotti.subscriptions import (
+    SubscriptionError,
+    SubscriptionMatcher,
+    check_expression,
+    is_pattern,
+)
+
+
+def _titles(matches):
+    return [c.title for c in matches]
+
+
+def test_wildcards(sample_categories):
+    found = SubscriptionMatcher(
+        ["Parent Toggle / *", "test group / *", "*Simple", "Test Group / Parent Toggle / Child*", "Nope / *"]
+    ).match(sample_categories)
+    assert _titles(found["Parent Toggle / *"]) == ["Child Active", "Child Inactive"]
+    # Everything in the group, at any level
+    assert _titles(found["test group / *"]) == _titles(sample_categories)
+    assert _titles(found["*Simple"]) == ["Active Simple", "Inactive Simple"]
+    assert _titles(found["Test Group / Parent Toggle / Child*"]) == ["Child Active", "Child Inactive"]
+    assert found["Nope / *"] == []
+
+
+def test_regex(sample_categories):
+    found = SubscriptionMatcher(["re:^child", "re:simple$", r"re:\bactive"]).match(sample_categories)
+    assert _titles(found["re:^child"]) == ["Child Active", "Child Inactive"]
+    assert _titles(found["re:simple$"]) == ["Active Simple", "Inactive Simple"]
+    assert _titles(found[r"re:\bactive"]) == ["Active Simple", "Child Active"]
+
+
+def test_regexes_that_cannot_be_joined(sample_categories):
+    """Inline flags, named groups and backreferences work alongside other regexes."""
+    bb = Category(name="Bb", title="Bb", href="/bb", status=CategoryStatus.ACTIVE)
+    expressions = ["re:(?i)^child", "re:simple$", "re:(?P<side>active)", "re:(?P<side>inactive)", r"re:(b)\1"]
+    found = SubscriptionMatcher(expressions).match([*sample_categories, bb])
+    assert _titles(found["re:(?i)^child"]) == ["Child Active", "Child Inactive"]
+    assert _titles(found["re:simple$"]) == ["Active Simple", "Inactive Simple"]
+    assert _titles(found["re:(?P<side>active)"]) == ["Active Simple", "Inactive Simple", "Child Active", "Child Inactive"]
+    assert _titles(found["re:(?P<side>inactive)"]) == ["Inactive Simple", "Child Inactive"]
+    assert _titles(found[r"re:(b)\1"]) == ["Bb"]
+
+
+def test_exact_expressions_agree_with_index():
+    page = generate_page(PageSpec.for_size(300, seed=3))
+    categories = parse_categories(page.html)
+    expressions = []
+    for group, parent, title, _active in page.categories[::7]:
+        expressions += [title, f"{parent or group} / {title}", f"{group} / {parent} / {title}", title.upper()]
+    found = SubscriptionMatcher(expressions).match(categories)
+    index = CategoryIndex(categories)
+    for expression in expressions:
+        assert found[expression] == index.find(expression), expression
+
+
+def test_index_find_accepts_patterns(sample_categories):
+    assert _titles(CategoryIndex(sample_categories).find("Parent Toggle / Child *")) == [
+        "Child Active",
+        "Child Inactive",
+    ]
+
+
+def test_duplicate_expressions_share_a_result(sample_categories):
+    matcher = SubscriptionMatcher(["Child Active", "Child Active"])
+    assert matcher.expressions == ["Child Active"]
+
+
+@pytest.mark.parametrize("expression", ["re:(", "a / b / c / d", "a // b", " / "])
+def test_invalid_expressions(expression):
+    with pytest.raises(SubscriptionError):
+        check_expression(expression)
+
+
+def test_is_pattern():
+    assert not is_pattern("Oviverhoilu / Vasen")
+    assert is_pattern("Oviverhoilu / *")
+    assert is_pattern("re:^Ovi")
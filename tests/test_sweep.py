@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+import re
+
+import httpx
+import pytest
+
+from varaosabotti import cli
+from varaosabotti.sweep import SweepPrinter, SweepResult, read_urls, sweep
+
+HOST = "https://www.example.com"
+MODELS = {
+    "/Polestar/2": [("Kattoverhoilu", True), ("Hattuhylly", False)],
+    "/Volvo/XC40": [("Kattoverhoilu", False)],
+    "/Volvo/V60": [("Hattuhylly", True)],
+}
+
+
+def _page(links):
+    items = "".join(
+        f'<div ngbdropdown class="col-lg-4 col-sm-12 my-1"><a queryparamshandling="preserve" '
+        f'class="my-2{"" if active else " disabled-link"}" href="/{title}" title="{title}">'
+        f"<span>{title}</span></a></div>"
+        for title, active in links
+    )
+    return f'<html><body><div class="col-12"><h4>Sisusta</h4>{items}</div></body></html>'
+
+
+@pytest.fixture
+def site(httpx_mock):
+    def respond(request):
+        links = MODELS.get(request.url.path)
+        if links is None:
+            return httpx.Response(404, text="Not found")
+        return httpx.Response(200, html=_page(links))
+
+    httpx_mock.add_callback(respond, url=re.compile(f"{HOST}/.*"), is_reusable=True, is_optional=True)
+    return httpx_mock
+
+
+def _sweep(urls, expression, **kwargs):
+    async def run():
+        async with httpx.AsyncClient() as client:
+            return [r async for r in sweep(urls, expression, client, **kwargs)]
+
+    return {r.url: r for r in asyncio.run(run())}
+
+
+def test_read_urls_skips_blanks_comments_and_repeats():
+    lines = ["# Models\n", f"{HOST}/a\n", "\n", f"  {HOST}/b  # estate\n", f"{HOST}/a\n"]
+    assert read_urls(lines) == [f"{HOST}/a", f"{HOST}/b"]
+
+
+def test_sweep_checks_every_url(site):
+    urls = [f"{HOST}{path}" for path in (*MODELS, "/Puuttuu")]
+    results = _sweep(urls, "Kattoverhoilu", concurrency=2)
+
+    assert set(results) == set(urls)
+    assert results[f"{HOST}/Polestar/2"].status == "active"
+    assert results[f"{HOST}/Volvo/XC40"].status == "inactive"
+    assert results[f"{HOST}/Volvo/V60"].status == "not found"
+    assert results[f"{HOST}/Puuttuu"].status == "error"
+    assert results[f"{HOST}/Puuttuu"].error == "HTTP 404"
+    assert all(r.seconds >= 0 for r in results.values())
+
+
+def test_sweep_matches_patterns(site):
+    results = _sweep([f"{HOST}/Polestar/2", f"{HOST}/Volvo/V60"], "Sisusta / *")
+    assert [m.title for m in results[f"{HOST}/Polestar/2"].matches] == ["Kattoverhoilu", "Hattuhylly"]
+    assert [m.title for m in results[f"{HOST}/Volvo/V60"].matches] == ["Hattuhylly"]
+
+
+def test_printer_table_and_jsonl(site):
+    results = list(_sweep([f"{HOST}/Polestar/2", f"{HOST}/Puuttuu"], "Sisusta / *").values())
+
+    table = io.StringIO()
+    printer = SweepPrinter(table)
+    printer.header()
+    for result in results:
+        printer.add(result)
+    printer.summary()
+    text = table.getvalue()
+    assert "[+] Kattoverhoilu" in text
+    assert "[-] Hattuhylly" in text
+    assert "HTTP 404" in text
+    assert text.rstrip().endswith("1 of 2 page(s) have an active match (1 failed)")
+
+    lines = io.StringIO()
+    printer = SweepPrinter(lines, "jsonl")
+    printer.header()
+    for result in results:
+        printer.add(result)
+    printer.summary()
+    records = {r["url"]: r for r in map(json.loads, lines.getvalue().splitlines())}
+    assert records[f"{HOST}/Polestar/2"]["matches"] == [
+        {"category": "Kattoverhoilu  (Sisusta)", "status": "active"},
+        {"category": "Hattuhylly  (Sisusta)", "status": "inactive"},
+    ]
+    assert records[f"{HOST}/Puuttuu"]["status"] == "error"
+
+
+def test_printer_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        SweepPrinter(io.StringIO(), "csv")
+
+
+def test_result_status_prefers_error():
+    assert SweepResult("u", 0.1, error="ConnectError").status == "error"
+
+
+def test_cli_sweep(site, tmp_path, capsys, monkeypatch):
+    urls = tmp_path / "models.txt"
+    urls.write_text(f"{HOST}/Polestar/2\n{HOST}/Volvo/XC40\n")
+    monkeypatch.setattr("sys.argv", ["varaosabotti", "--sweep", str(urls), "--category", "Kattoverhoilu"])
+    with pytest.raises(SystemExit) as exc:
+        cli.main()
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert f"{HOST}/Polestar/2" in out
+    assert "1 of 2 page(s) have an active match (0 failed)" in out
+
+
+def test_cli_sweep_needs_a_category(tmp_path, monkeypatch):
+    urls = tmp_path / "models.txt"
+    urls.write_text(f"{HOST}/Polestar/2\n")
+    monkeypatch.delenv("VARAOSABOTTI_CATEGORY", raising=False)
+    monkeypatch.setattr("sys.argv", ["varaosabotti", "--sweep", str(urls)])
+    with pytest.raises(SystemExit) as exc:
+        cli.main()
+    assert exc.value.code == 2
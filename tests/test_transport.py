@@ -0,0 +1,167 @@
+import asyncio
+import gzip
+import zlib
+
+import httpx
+import pytest
+
+from varaosabotti.cli import build_parser
+from varaosabotti.hostlimits import HostLimitedTransport
+from varaosabotti.transport import (
+    ContentDecoder,
+    TransferLog,
+    TransferSample,
+    TransportConfig,
+    TransportError,
+    available_encodings,
+    create_async_client,
+    create_client,
+)
+
+
+def test_config_from_args():
+    args = build_parser().parse_args(
+        ["--max-connections", "50", "--connect-timeout", "2", "--read-timeout", "8", "--per-host-rate", "5"]
+    )
+    config = TransportConfig.from_args(args)
+    assert config.max_connections == 50
+    assert config.per_host_rate == 5.0
+    assert config.per_host_concurrency is None
+
+
+def test_client_uses_split_timeouts():
+    client = create_client(TransportConfig(connect_timeout=2, read_timeout=8))
+    assert client.timeout.connect == 2
+    assert client.timeout.read == 8
+    assert client.headers["User-Agent"].startswith("varaosabotti/")
+    client.close()
+
+
+def test_validate_rejects_bad_limits():
+    with pytest.raises(TransportError):
+        TransportConfig(per_host_concurrency=0).validate()
+    with pytest.raises(TransportError):
+        TransportConfig(per_host_rate=-1).validate()
+
+
+def test_client_offers_available_encodings():
+    client = create_client(TransportConfig())
+    assert client.headers["Accept-Encoding"] == ", ".join(available_encodings())
+    assert "gzip" in available_encodings()
+    client.close()
+
+
+def test_accept_encoding_option():
+    args = build_parser().parse_args(["--accept-encoding", "gzip, identity"])
+    config = TransportConfig.from_args(args)
+    assert config.accept_encoding == ("gzip", "identity")
+    assert create_client(config).headers["Accept-Encoding"] == "gzip, identity"
+
+
+def test_validate_rejects_unknown_encoding(monkeypatch):
+    with pytest.raises(TransportError, match="Unknown"):
+        TransportConfig(accept_encoding=("lzma",)).validate()
+    monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+    with pytest.raises(TransportError, match="decoder"):
+        TransportConfig(accept_encoding=("br",)).validate()
+
+
+def _decode_in_chunks(encoding, data, size=7):
+    decoder = ContentDecoder(encoding)
+    out = b"".join(decoder.decode(data[i : i + size]) for i in range(0, len(data), size))
+    return out + decoder.flush()
+
+
+@pytest.mark.parametrize(
+    ("encoding", "encode"),
+    [
+        ("gzip", gzip.compress),
+        ("deflate", zlib.compress),
+        # Some servers send raw deflate without the zlib wrapper
+        ("deflate", lambda d: zlib.compress(d)[2:-4]),
+        ("identity", lambda d: d),
+        (None, lambda d: d),
+        ("deflate, gzip", lambda d: gzip.compress(zlib.compress(d))),
+    ],
+)
+def test_content_decoder(encoding, encode):
+    body = b"<html>" + b"osat " * 200 + b"</html>"
+    assert _decode_in_chunks(encoding, encode(body)) == body
+
+
+def test_content_decoder_errors():
+    with pytest.raises(httpx.DecodingError):
+        ContentDecoder("lzma")
+    with pytest.raises(httpx.DecodingError):
+        ContentDecoder("gzip").decode(b"not gzip at all")
+
+
+def test_transfer_log_totals():
+    log = TransferLog()
+    log.record(TransferSample("https://a", 200, "gzip", 100, 400, 0.001, 0.01, parsed=True))
+    log.record(TransferSample("https://a", 304))
+    log.record(TransferSample("https://b", 200, "identity", 300, 300, parsed=False))
+    assert log.pages["https://a"].requests == 2
+    total = log.total()
+    assert (total.requests, total.parses, total.wire_bytes, total.body_bytes) == (3, 1, 400, 700)
+    assert total.encodings == {"gzip": 1, "identity": 1}
+    assert "43% saved" in total.describe()
+
+
+def test_validate_http2_needs_h2(monkeypatch):
+    monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+    with pytest.raises(TransportError, match="h2"):
+        TransportConfig(http2=True).validate()
+
+
+class _SlowTransport(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.started: list[float] = []
+
+    async def handle_async_request(self, request):
+        self.started.append(asyncio.get_running_loop().time())
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        return httpx.Response(200, text="ok")
+
+
+def _fire(transport, urls):
+    async def go():
+        async with httpx.AsyncClient(transport=transport) as client:
+            await asyncio.gather(*(client.get(url) for url in urls))
+
+    asyncio.run(go())
+
+
+def test_host_concurrency_limit():
+    inner = _SlowTransport()
+    _fire(HostLimitedTransport(inner, concurrency=2), ["https://a.example/"] * 6)
+    assert inner.peak == 2
+
+
+def test_host_limits_are_per_host():
+    inner = _SlowTransport()
+    _fire(HostLimitedTransport(inner, concurrency=1), ["https://a.example/", "https://b.example/"] * 2)
+    assert inner.peak == 2
+
+
+def test_host_rate_limit():
+    inner = _SlowTransport()
+    _fire(HostLimitedTransport(inner, rate=20), ["https://a.example/"] * 4)
+    # Four requests at 20/s span at least three 50 ms gaps
+    assert inner.started[-1] - inner.started[0] >= 0.14
+
+
+def test_async_client_applies_host_limits(httpx_mock):
+    httpx_mock.add_response(url="https://a.example/", is_reusable=True)
+
+    async def go():
+        async with create_async_client(TransportConfig(per_host_concurrency=1)) as client:
+            responses = await asyncio.gather(*(client.get("https://a.example/") for _ in range(3)))
+            return [r.status_code for r in responses]
+
+    assert asyncio.run(go()) == [200, 200, 200]
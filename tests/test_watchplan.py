@@ -0,0 +1,73 @@
+from varaosabotti.events import category_key
+from varaosabotti.models import CategoryStatus
+from varaosabotti.scraper import parse_categories
+from varaosabotti.watchplan import WatchPlan
+
+
+def _plan(html, *titles):
+    categories = parse_categories(html)
+    keys = [category_key(c) for c in categories if c.title in titles]
+    return categories, WatchPlan.build(categories, keys)
+
+
+def test_unchanged_statuses_return_the_same_list(sample_html):
+    categories, plan = _plan(sample_html, "Active Simple", "Child Inactive")
+    # Only an unwatched category changed
+    html = sample_html.replace('class="my-2" href="/parent"', 'class="my-2 disabled-link" href="/parent"')
+    assert plan.apply(html.encode(), "utf-8", categories) is categories
+    assert plan.hits == 1
+
+
+def test_changed_status_is_patched(sample_html):
+    categories, plan = _plan(sample_html, "Active Simple")
+    html = sample_html.replace('class="my-2" href="/active"', 'class="my-2 disabled-link" href="/active"')
+    patched = plan.apply(html.encode(), "utf-8", categories)
+    assert patched is not categories
+    assert patched[0].status is CategoryStatus.INACTIVE
+    assert patched[1:] == categories[1:]
+    assert categories[0].status is CategoryStatus.ACTIVE
+
+
+def test_missing_anchor_needs_a_full_parse(sample_html):
+    categories, plan = _plan(sample_html, "Child Active")
+    html = sample_html.replace('href="/child-a"', 'href="/child-a2"')
+    assert plan.apply(html.encode(), "utf-8", categories) is None
+    assert plan.misses == 1
+
+
+def test_disagreeing_copies_need_a_full_parse(sample_html):
+    categories, plan = _plan(sample_html, "Active Simple")
+    # The popular section repeats the category with another status
+    html = sample_html.replace(
+        'class="my-2" href="/popular" title="Popular Item"',
+        'class="my-2 disabled-link" href="/active" title="Active Simple"',
+    )
+    assert plan.apply(html.encode(), "utf-8", categories) is None
+
+
+def test_plan_is_tied_to_its_parse(sample_html):
+    categories, plan = _plan(sample_html, "Active Simple")
+    assert plan.apply(sample_html.encode(), "utf-8", categories) is categories
+    # An equal list from another parse isn't the one the plan was built from
+    assert plan.apply(sample_html.encode(), "utf-8", parse_categories(sample_html)) is None
+
+
+def test_unplannable_watches(sample_html):
+    categories = parse_categories(sample_html)
+    assert WatchPlan.build(categories, []) is None
+    assert WatchPlan.build(categories, [("Test Group", None, "Nope")]) is None
+
+
+def test_escaped_and_non_ascii_attributes():
+    html = (
+        '<div class="col-12"><h4>Kori</h4><div ngbdropdown class="col-lg-4">'
+        '<a queryparamshandling="preserve" class="my-2" href="/osa?a=1&amp;b=2" title="Hattuhylly &amp; lukko">'
+        "<span>Hattuhylly &amp; lukko</span></a></div>"
+        '<div ngbdropdown class="col-lg-4"><a queryparamshandling="preserve" class="my-2" href="/o" title="Jäähdytin">'
+        "<span>Jäähdytin</span></a></div></div>"
+    )
+    categories, plan = _plan(html, "Hattuhylly & lukko", "Jäähdytin")
+    assert plan is not None
+    latin1 = html.replace('class="my-2" href="/o"', 'class="my-2 disabled-link" href="/o"').encode("latin-1")
+    patched = plan.apply(latin1, "latin-1", categories)
+    assert [c.status for c in patched] == [CategoryStatus.ACTIVE, CategoryStatus.INACTIVE]